@@ -1,31 +1,64 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
 import jsonschema
 import requests
 import logging
+from urllib3.util.retry import Retry
 
 from UPISAS.exceptions import ServerNotReachable, IncompleteJSONSchema
+from UPISAS.instrumentation import InstrumentedAdapter
+
+# settings of the shared keep-alive sessions, see configure_http_sessions()
+http_session_settings = {"pool_size": 10, "retries": 2, "backoff": 0.2}
+http_sessions = {}
+http_sessions_lock = threading.Lock()
+
+# compiled JSON Schema validators, keyed by the hash of their schema (see get_schema_validator())
+schema_validators = OrderedDict()
+# id(schema) -> (schema, validator), so that the schema object a caller passes on every call is not re-serialized
+schema_validators_by_id = OrderedDict()
+schema_validators_lock = threading.Lock()
+SCHEMA_VALIDATORS_MAX = 32
+
 
-pull_image_tasks = {}
+def configure_http_sessions(pool_size=None, retries=None, backoff=None):
+    """ Change the pool size and the retry/backoff policy of the shared sessions. Existing sessions are recreated."""
+    with http_sessions_lock:
+        if pool_size is not None: http_session_settings["pool_size"] = pool_size
+        if retries is not None: http_session_settings["retries"] = retries
+        if backoff is not None: http_session_settings["backoff"] = backoff
+        for session in http_sessions.values():
+            session.close()
+        http_sessions.clear()
 
 
-def show_progress(line, progress):
-    """ Show task progress (red for download, green for extract). Used when pulling images."""
-    if line['status'] == 'Downloading':
-        id = f'[red][Download {line["id"]}]'
-    elif line['status'] == 'Extracting':
-        id = f'[green][Extract  {line["id"]}]'
-    else:
-        # skip other statuses
-        return
-    if id not in pull_image_tasks.keys():
-        pull_image_tasks[id] = progress.add_task(f"{id}", total=line['progressDetail']['total'])
-    else:
-        progress.update(pull_image_tasks[id], completed=line['progressDetail']['current'])
+def get_http_session(url):
+    """ Return the shared keep-alive session for the host of the given url, creating it on first use.
+    Only idempotent requests are retried, POSTs to execute endpoints are sent exactly once.
+    Requests are timed by UPISAS.instrumentation when it is enabled."""
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with http_sessions_lock:
+        session = http_sessions.get(host)
+        if session is None:
+            retry = Retry(total=http_session_settings["retries"], backoff_factor=http_session_settings["backoff"],
+                          status_forcelist=(502, 503, 504), allowed_methods=frozenset({"GET"}), raise_on_status=False)
+            adapter = InstrumentedAdapter(pool_connections=1, pool_maxsize=http_session_settings["pool_size"],
+                                          max_retries=retry)
+            session = requests.Session()
+            session.mount(host, adapter)
+            http_sessions[host] = session
+        return session
 
 
 def get_response_for_get_request(url):
     try:
         logging.info("GET request to " + str(url))
-        response = requests.get(url)
+        response = get_http_session(url).get(url)
         return response
     except requests.exceptions.ConnectionError as e:
         logging.error(e)
@@ -33,6 +66,38 @@ def get_response_for_get_request(url):
         raise ServerNotReachable
 
 
+def get_schema_validator(json_schema):
+    """ Return a validator for json_schema, compiling it (and checking the schema itself) only the first time
+    that schema is seen. Raises jsonschema.exceptions.SchemaError for invalid schemas, which are never cached.
+    A schema object is looked up by identity first, so schemas must not be modified in place once validated against."""
+    entry = schema_validators_by_id.get(id(json_schema))
+    if entry is not None and entry[0] is json_schema:
+        return entry[1]
+    key = hashlib.sha1(json.dumps(json_schema, sort_keys=True).encode()).hexdigest()
+    with schema_validators_lock:
+        validator = schema_validators.get(key)
+        if validator is not None:
+            schema_validators.move_to_end(key)
+            remember_schema_object(json_schema, validator)
+            return validator
+    validator_class = jsonschema.validators.validator_for(json_schema)
+    validator_class.check_schema(json_schema)
+    validator = validator_class(json_schema)
+    with schema_validators_lock:
+        schema_validators[key] = validator
+        while len(schema_validators) > SCHEMA_VALIDATORS_MAX:
+            schema_validators.popitem(last=False)
+        remember_schema_object(json_schema, validator)
+    return validator
+
+
+def remember_schema_object(json_schema, validator):
+    """ Called with schema_validators_lock held. The schema is kept referenced so that its id is not reused. """
+    schema_validators_by_id[id(json_schema)] = (json_schema, validator)
+    while len(schema_validators_by_id) > SCHEMA_VALIDATORS_MAX:
+        schema_validators_by_id.popitem(last=False)
+
+
 def validate_schema(json_instance, json_schema):
     try:
         incomplete_warning_message = "No complete JSON Schema provided for validation"
@@ -40,7 +105,9 @@ def validate_schema(json_instance, json_schema):
             json_instance_keys = sorted(json_instance.keys())
             json_schema_keys = sorted(json_schema["properties"].keys())
             if json_instance_keys == json_schema_keys:
-                jsonschema.validate(json_instance, json_schema)
+                error = jsonschema.exceptions.best_match(get_schema_validator(json_schema).iter_errors(json_instance))
+                if error is not None:
+                    raise error
                 logging.info("JSON object validated by JSON Schema")
             else:
                 logging.error(incomplete_warning_message + " Keys misaligned")
@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class ActionExecutor:
+    """
+    Runs planned adaptation actions on background workers, so that the monitor and analyze phases keep
+    running while an adaptation is in flight. Every submitted action gets a Future, and its status
+    (queued, running) is tracked in Knowledge.in_flight_actions until it finishes. Finished actions
+    are moved to Knowledge.execution_results, and passed to on_finished when it is set.
+    The workers only write those two fields, under Knowledge.lock. Any other change to the Knowledge an outcome
+    implies is left to the MAPE-K loop, which picks the outcomes up with collect_finished().
+    """
+
+    def __init__(self, knowledge, max_workers=4, on_finished=None):
+        self.knowledge = knowledge
+        self.on_finished = on_finished
+        self.lock = knowledge.lock
+        self.finished = queue.SimpleQueue()  # outcomes not collected by the MAPE-K loop yet
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mape-k-execute")
+
+    @staticmethod
+    def action_key(action):
+        """Identifies an action by what it changes, so the same remediation planned twice has the same key."""
+        return (action.get("operation"),
+                action.get("serviceImplementationName") or action.get("serviceID") or action.get("weightsId"),
+                action.get("address"),
+                action.get("port"))
+
+    def is_in_flight(self, action):
+        with self.lock:
+            return self.action_key(action) in self.knowledge.in_flight_actions
+
+    def submit(self, action, perform, depends_on=()):
+        """
+        Queues perform(action) and returns its Future. The action only starts once every future in depends_on
+        is done. If the same action is already in flight, its existing Future is returned instead.
+        """
+        key = self.action_key(action)
+        with self.lock:
+            entry = self.knowledge.in_flight_actions.get(key)
+            if entry is not None:
+                return entry["future"]
+            entry = {"action": action, "status": "queued", "submitted_at": time.time(), "future": Future()}
+            self.knowledge.in_flight_actions[key] = entry
+        return self.after(depends_on, lambda: self._run(key, entry, perform), entry["future"])
+
+    def after(self, depends_on, fn, future=None):
+        """
+        Runs fn() on a worker once every future in depends_on is done, and returns the Future of its result.
+        Waiting does not hold a worker: fn is only queued when the last dependency finishes.
+        """
+        future = Future() if future is None else future
+        depends_on = list(depends_on)
+        remaining = [len(depends_on)]
+        counter_lock = threading.Lock()
+
+        def start():
+            try:
+                self.pool.submit(self._resolve, future, fn)
+            except RuntimeError:
+                # the pool is shutting down, finish the chain on the thread that completed the dependency
+                self._resolve(future, fn)
+
+        def dependency_done(_):
+            with counter_lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                start()
+
+        if not depends_on:
+            start()
+        for dependency in depends_on:
+            dependency.add_done_callback(dependency_done)
+        return future
+
+    @staticmethod
+    def _resolve(future, fn):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    def collect_finished(self):
+        """The outcomes of the actions finished since the last call, oldest first."""
+        outcomes = []
+        while True:
+            try:
+                outcomes.append(self.finished.get_nowait())
+            except queue.Empty:
+                return outcomes
+
+    def _run(self, key, entry, perform):
+        result = None
+        try:
+            entry["status"] = "running"
+            result = perform(entry["action"])
+            return result
+        except Exception as e:
+            logging.error(f"action {entry['action']} failed: {e}")
+            result = {"action": entry["action"], "error": str(e)}
+            raise
+        finally:
+            with self.lock:
+                self.knowledge.in_flight_actions.pop(key, None)
+                failed = result is None or "error" in result
+                outcome = {
+                    "action": entry["action"],
+                    "status": "failed" if failed else "done",
+                    "result": result,
+                    "submitted_at": entry["submitted_at"],
+                    "finished_at": time.time()}
+                self.knowledge.execution_results.append(outcome)
+            self.finished.put(outcome)
+            if self.on_finished is not None:
+                self.on_finished(outcome)
+
+    def shutdown(self, wait_for_actions=True):
+        self.pool.shutdown(wait=wait_for_actions)
@@ -0,0 +1,212 @@
+"""
+Benchmark of the MAPE-K loop of the RAMSES strategies, driven against the in-process simulator.
+
+Every tick is split into phases, each timed separately: monitor fetch, JSON decode, history update (what
+monitor() does after decoding), analyze, plan and execute. qos_window times UPISAS.qos.compute_qos_for_payload()
+over the window since the first tick on the same payload; it is not part of the loop of the strategies. Optionally the memory allocated by each phase is
+traced too. Results are written as JSON, so runs on different commits can be compared:
+
+    python -m UPISAS.benchmark --services 50 200 --instances 3 --ticks 100 --output bench.json
+    python -m UPISAS.benchmark --services 50 200 --ticks 100 --compare bench.json
+
+Allocation tracing slows the loop down, so latencies measured with --allocations are not comparable
+with latencies measured without it.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from UPISAS import get_http_session
+from UPISAS.exemplars.simulator import SimulatedRAMSES
+from UPISAS.qos import compute_qos_for_payload
+
+PHASES = ("monitor_fetch", "json_decode", "history_update", "qos_window", "analyze", "plan", "execute")
+
+
+def load_strategy(variant):
+    if variant == "reactive":
+        from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+    elif variant == "baseline":
+        from UPISAS.strategies.baseline_reactive_strategy import ReactiveAdaptationManager
+    else:
+        raise ValueError(f"unknown strategy variant {variant}")
+    return ReactiveAdaptationManager
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(values):
+    """Distribution of a list of values, in the unit of the values."""
+    if not values:
+        return {}
+    return {"mean": sum(values) / len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "p99": percentile(values, 99), "max": max(values)}
+
+
+class PhaseTimer:
+    """Measures the wall time (and with trace_allocations the peak traced memory) of every phase of a tick."""
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.durations = {phase: [] for phase in PHASES}
+        self.allocations = {phase: [] for phase in PHASES}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name].append((time.perf_counter() - started) * 1000)
+            if self.trace_allocations:
+                self.allocations[name].append(tracemalloc.get_traced_memory()[1] - before)
+
+
+def inject_failures(simulator, failure_rate, rng):
+    """Fails every active instance with probability failure_rate."""
+    with simulator.lock:
+        instances = [instance.instance_id for service in simulator.services.values()
+                     for instance in service.instances.values() if not instance.failed]
+    for instance_id in instances:
+        if rng.random() < failure_rate:
+            simulator.fail_instance(instance_id)
+
+
+def run_benchmark(variant="reactive", services=10, instances=2, endpoints=3, ticks=50, failure_rate=0.0,
+                  trace_allocations=False, seed=0):
+    """Runs ticks MAPE-K iterations of a strategy variant against a fresh simulator and returns the result dict."""
+    strategy_class = load_strategy(variant)
+    exemplar = SimulatedRAMSES(services=services, instances_per_service=instances, endpoints_per_service=endpoints,
+                               boot_delay=0, seed=seed)
+    rng = random.Random(seed)
+    monitor_url = exemplar.base_endpoint + "/monitor"
+    strategy = strategy_class(exemplar, monitor_url, exemplar.base_endpoint + "/execute", exemplar.lb_url)
+    strategy.readiness.interval = 0
+    session = get_http_session(monitor_url)
+    timer = PhaseTimer(trace_allocations)
+    baselines = None
+    if trace_allocations:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        # the strategies report on stdout, which would dominate the measurements in a terminal
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(ticks):
+                inject_failures(exemplar.simulator, failure_rate, rng)
+                with timer.phase("monitor_fetch"):
+                    response = session.get(monitor_url)
+                    response.raise_for_status()
+                    body = response.content
+                with timer.phase("json_decode"):
+                    data = json.loads(body)
+                with timer.phase("history_update"):
+                    strategy._update_knowledge(data)
+                if baselines is None:
+                    baselines = {snapshot["instanceId"]: snapshot for service_data in data.values()
+                                 for snapshot in service_data.get("snapshot") or [] if snapshot.get("instanceId")}
+                with timer.phase("qos_window"):
+                    compute_qos_for_payload(data, baselines)
+                with timer.phase("analyze"):
+                    strategy.analyze()
+                with timer.phase("plan"):
+                    strategy.plan()
+                with timer.phase("execute"):
+                    strategy.execute()
+    finally:
+        elapsed = time.perf_counter() - started
+        if trace_allocations:
+            tracemalloc.stop()
+        strategy.executor.shutdown(wait_for_actions=False)
+        exemplar.stop_container()
+
+    result = {
+        "strategy": variant,
+        "services": services,
+        "instances": instances,
+        "endpoints": endpoints,
+        "failure_rate": failure_rate,
+        "ticks": ticks,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else None,
+        "phases_ms": {phase: summarize(values) for phase, values in timer.durations.items()},
+    }
+    if trace_allocations:
+        result["allocations_bytes"] = {phase: summarize(values) for phase, values in timer.allocations.items()}
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """Prints the change of ticks/s and of the p50 of every phase against a previous result file."""
+    previous = {(r["strategy"], r["services"], r["instances"], r["failure_rate"]): r for r in baseline["results"]}
+    for result in results:
+        key = (result["strategy"], result["services"], result["instances"], result["failure_rate"])
+        before = previous.get(key)
+        if before is None:
+            continue
+        print(f"{result['strategy']} {result['services']}x{result['instances']} failure_rate={result['failure_rate']}: "
+              f"ticks/s {before['ticks_per_second']:.1f} -> {result['ticks_per_second']:.1f}")
+        for phase in PHASES:
+            old, new = before["phases_ms"].get(phase, {}).get("p50"), result["phases_ms"].get(phase, {}).get("p50")
+            if old and new:
+                print(f"    {phase:<15} p50 {old:8.3f} ms -> {new:8.3f} ms ({(new - old) / old * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="MAPE-K loop benchmark against the RAMSES simulator")
+    parser.add_argument("--strategy", nargs="+", default=["reactive", "baseline"], choices=["reactive", "baseline"])
+    parser.add_argument("--services", nargs="+", type=int, default=[10, 50])
+    parser.add_argument("--instances", type=int, default=2)
+    parser.add_argument("--endpoints", type=int, default=3)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--failure-rate", nargs="+", type=float, default=[0.0])
+    parser.add_argument("--allocations", action="store_true", help="trace the memory allocated by every phase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for variant in args.strategy:
+        for services in args.services:
+            for failure_rate in args.failure_rate:
+                result = run_benchmark(variant, services, args.instances, args.endpoints, args.ticks, failure_rate,
+                                       args.allocations, args.seed)
+                results.append(result)
+                phases = ", ".join(f"{phase} {stats['p50']:.2f}" for phase, stats in result["phases_ms"].items())
+                print(f"{variant} {services}x{args.instances} failure_rate={failure_rate}: "
+                      f"{result['ticks_per_second']:.1f} ticks/s, p50 ms: {phases}")
+
+    report = {"commit": current_commit(), "python": platform.python_version(), "created": time.time(),
+              "allocations": args.allocations, "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
@@ -0,0 +1,161 @@
+"""
+Event-driven status of the Docker containers of an exemplar.
+
+ContainerStateTracker lists the containers once and then follows the Docker events stream on a background thread,
+so status queries are answered from memory instead of a container.reload() or `docker inspect` per call, and
+listeners learn about containers dying or turning unhealthy as soon as Docker reports it.
+"""
+import logging
+import threading
+import time
+
+import docker
+
+# status a container ends up in after an event, for the actions that change it
+STATUS_AFTER = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "destroy": "removed",
+}
+# statuses and health states in which a container does not serve requests
+DOWN = {"exited", "dead", "removed", "unhealthy"}
+
+
+class ContainerStateTracker:
+
+    def __init__(self, client=None, containers=None, labels=None, reconnect_delay=1):
+        self.client = client or docker.from_env()
+        self.containers = set(containers or [])  # names or ids to track, all containers when empty
+        self.labels = list(labels or [])  # label filters such as "com.docker.compose.project=ramses"
+        self.reconnect_delay = reconnect_delay
+        self.lock = threading.Lock()
+        self.states = {}  # container id -> {"name", "status", "health"}
+        self.names = {}  # container name -> container id
+        self.listeners = []
+        self.events = None
+        self.thread = None
+        self.running = False
+        self.ready = threading.Event()
+
+    def _tracked(self, container_id, name):
+        return not self.containers or container_id in self.containers or name in self.containers
+
+    def _snapshot(self):
+        """Lists the tracked containers and returns the time from which events must be followed."""
+        since = int(time.time())
+        if self.containers:
+            # looked up one by one, a list filter cannot match names and ids at once
+            containers = []
+            for container in self.containers:
+                try:
+                    containers.append(self.client.containers.get(container))
+                except docker.errors.NotFound:
+                    pass
+        else:
+            containers = self.client.containers.list(all=True, filters={"label": self.labels} if self.labels else {})
+        states, names = {}, {}
+        for container in containers:
+            if self._tracked(container.id, container.name):
+                health = container.attrs.get("State", {}).get("Health", {}).get("Status")
+                states[container.id] = {"name": container.name, "status": container.status, "health": health}
+                names[container.name] = container.id
+        with self.lock:
+            self.states, self.names = states, names
+        return since
+
+    def start(self):
+        """Takes the initial snapshot and starts following the events; returns self."""
+        self.running = True
+        since = self._snapshot()
+        self.thread = threading.Thread(target=self._follow, args=(since,), name="container-events", daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.events is not None:
+            self.events.close()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def _follow(self, since):
+        filters = {"type": "container"}
+        if self.containers:
+            filters["container"] = sorted(self.containers)
+        if self.labels:
+            filters["label"] = self.labels
+        while self.running:
+            try:
+                self.events = self.client.events(since=since, filters=filters, decode=True)
+                self.ready.set()
+                for event in self.events:
+                    self._apply(event)
+            except docker.errors.DockerException as e:
+                logging.warning(f"Docker events stream interrupted: {e}")
+            if not self.running:
+                break
+            # the stream ended without stop(): the daemon restarted or the connection dropped, so events may be lost
+            time.sleep(self.reconnect_delay)
+            try:
+                since = self._snapshot()
+            except docker.errors.DockerException as e:
+                logging.warning(f"Cannot list the containers: {e}")
+
+    def _apply(self, event):
+        action = event.get("Action") or event.get("status") or ""
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID") or event.get("id")
+        name = actor.get("Attributes", {}).get("name")
+        if not self._tracked(container_id, name):
+            return
+        with self.lock:
+            state = self.states.setdefault(container_id, {"name": name, "status": None, "health": None})
+            if name:
+                state["name"] = name
+                self.names[name] = container_id
+            if action.startswith("health_status:"):
+                state["health"] = action.partition(":")[2].strip()
+            elif action in STATUS_AFTER:
+                state["status"] = STATUS_AFTER[action]
+            elif action != "oom":
+                return
+            state = dict(state)
+        for listener in list(self.listeners):
+            try:
+                listener(state["name"], state, action)
+            except Exception as e:
+                logging.error(f"container state listener failed: {e}")
+
+    def subscribe(self, listener):
+        """Calls listener(name, state, action) on every status or health change of a tracked container."""
+        self.listeners.append(listener)
+
+    def _state(self, container):
+        return self.states.get(container) or self.states.get(self.names.get(container))
+
+    def status(self, container):
+        """Status of a container, by name or id: created, running, paused, exited, removed or None when unknown."""
+        with self.lock:
+            state = self._state(container)
+            return state["status"] if state else None
+
+    def health(self, container):
+        with self.lock:
+            state = self._state(container)
+            return state["health"] if state else None
+
+    def statuses(self):
+        """{container name: status} of all tracked containers."""
+        with self.lock:
+            return {state["name"]: state["status"] for state in self.states.values()}
+
+    def is_down(self, container):
+        with self.lock:
+            state = self._state(container)
+            return bool(state) and (state["status"] in DOWN or state["health"] in DOWN)
@@ -1,10 +1,10 @@
 import docker
 from abc import ABC, abstractmethod
-from rich.progress import Progress
-from UPISAS import show_progress
 import logging
 from docker.errors import DockerException
 from UPISAS.exceptions import DockerImageNotFoundOnDockerHub
+from UPISAS.images import prepull_images
+from UPISAS.container_state import ContainerStateTracker
 
 logging.getLogger().setLevel(logging.INFO)
 
@@ -15,13 +15,24 @@ class Exemplar(ABC):
     A class which encapsulates a self-adaptive exemplar run in a docker container.
     """
     _container_name = ""
+    state_tracker = None  # ContainerStateTracker serving get_container_status(), see track_state()
+
     def __init__(self, base_endpoint: "string with the URL of the exemplar's HTTP server", \
-                 docker_kwargs,
+                 docker_kwargs: "arguments of the single container to create, None for exemplars managing their own" =None,
                  auto_start: "Whether to immediately start the container after creation" =False,
                  ):
         '''Create an instance of the Exemplar class'''
         self.base_endpoint = base_endpoint
+        self.exemplar_container = None
+        if docker_kwargs is not None:
+            self.create_container(docker_kwargs)
+        if auto_start:
+            self.start_container()
+
+    def create_container(self, docker_kwargs):
+        '''Creates the container of the exemplar from docker_kwargs, pulling its image from DockerHub if needed'''
         image_name = docker_kwargs["image"]
+        self.image_name = image_name
         image_owner = image_name.split("/")[0]
         try:
             docker_client = docker.from_env()
@@ -33,9 +44,7 @@ class Exemplar(ABC):
                 images_from_owner = docker_client.images.search(image_owner)
                 if image_name.split(":")[0] in [i["name"] for i in images_from_owner]:
                     logging.info(f"image '{image_name}' found on DockerHub, pulling it")
-                    with Progress() as progress:
-                        for line in docker_client.api.pull(image_name, stream=True, decode=True):
-                            show_progress(line, progress)
+                    self.prepull(client=docker_client)
                 else:
                     logging.error(f"image '{image_name}' not found on DockerHub, exiting!")
                     raise DockerImageNotFoundOnDockerHub
@@ -45,8 +54,14 @@ class Exemplar(ABC):
             # TODO: Properly catch various errors. Currently, a lot of errors might be caught here.
             # Please check the logs if that happens.
             raise e
-        if auto_start:
-            self.start_container()
+
+    def required_images(self):
+        '''The images the exemplar needs'''
+        return [self.image_name]
+
+    def prepull(self, max_workers=4, client=None, check_remote=False):
+        '''Pulls the required images that are not present yet, concurrently, see UPISAS.images.prepull_images'''
+        return prepull_images(self.required_images(), max_workers=max_workers, client=client, check_remote=check_remote)
 
     @abstractmethod
     def start_run(self):
@@ -121,8 +136,27 @@ class Exemplar(ABC):
             logging.warning(e)
             logging.warning("cannot unpause container")
 
+    def reset(self):
+        '''Brings the exemplar back to the state of a fresh start without recreating its container, so it can be
+        reused by the next run. Returns False when that cannot be guaranteed and the exemplar has to be recreated.'''
+        try:
+            logging.info("resetting container...")
+            self.exemplar_container.restart()
+            return self.get_container_status() == "running"
+        except (docker.errors.APIError, AttributeError) as e:
+            logging.error(e)
+            logging.error("cannot reset container")
+            return False
+
+    def track_state(self, client=None):
+        '''Follows the Docker events of the container, so get_container_status() is answered without an API call'''
+        self.state_tracker = ContainerStateTracker(client, containers=[self.exemplar_container.id]).start()
+        return self.state_tracker
+
     def get_container_status(self):
         if self.exemplar_container:
+            if self.state_tracker is not None and self.state_tracker.running:
+                return self.state_tracker.status(self.exemplar_container.id) or "removed"
             self.exemplar_container.reload()
             return self.exemplar_container.status
         return "removed"
@@ -0,0 +1,47 @@
+import logging
+
+
+class WarmExemplarPool:
+    """
+    Keeps exemplars running between experiment runs instead of creating and tearing them down every time.
+    acquire() hands out an idle exemplar after Exemplar.reset() brought it back to its baseline, or a new one from
+    factory when there is none. When a reset fails the exemplar is stopped and replaced by a new one, so every run
+    starts from the same state either way. With warm=False every exemplar is stopped on release (cold runs).
+    """
+
+    def __init__(self, factory, warm=True):
+        self.factory = factory  # callable returning a started exemplar
+        self.warm = warm
+        self.idle = []
+        self.stats = {"cold_starts": 0, "warm_resets": 0, "failed_resets": 0}
+
+    def acquire(self):
+        while self.idle:
+            exemplar = self.idle.pop()
+            if exemplar.reset():
+                self.stats["warm_resets"] += 1
+                return exemplar
+            self.stats["failed_resets"] += 1
+            logging.warning("exemplar could not be reset to its baseline, replacing it")
+            self._stop(exemplar)
+        self.stats["cold_starts"] += 1
+        return self.factory()
+
+    def release(self, exemplar):
+        """Returns an exemplar after its run; it is reset when acquired again."""
+        if self.warm:
+            self.idle.append(exemplar)
+        else:
+            self._stop(exemplar)
+
+    def close(self):
+        """Stops every idle exemplar, call it after the experiment."""
+        while self.idle:
+            self._stop(self.idle.pop())
+
+    @staticmethod
+    def _stop(exemplar):
+        try:
+            exemplar.stop_container()
+        except Exception as e:
+            logging.error(f"failed to stop exemplar: {e}")
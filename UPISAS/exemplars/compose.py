@@ -0,0 +1,216 @@
+import logging
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+import yaml
+
+from UPISAS.container_state import ContainerStateTracker
+from UPISAS.exemplar import Exemplar
+from UPISAS.images import compose_images
+
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+
+
+def compose_project_name(compose_file, environ=None):
+    """The project name docker compose uses for compose_file: COMPOSE_PROJECT_NAME, its name: key or its directory."""
+    environ = os.environ if environ is None else environ
+    if environ.get("COMPOSE_PROJECT_NAME"):
+        return environ["COMPOSE_PROJECT_NAME"]
+    with open(compose_file) as file:
+        name = (yaml.safe_load(file) or {}).get("name")
+    if not name:
+        name = os.path.basename(os.path.dirname(os.path.abspath(compose_file)))
+    return re.sub(r"[^a-z0-9_-]", "", name.lower())
+
+
+def load_compose_services(compose_file):
+    """{service: definition} of the services: key of compose_file, in file order."""
+    with open(compose_file) as file:
+        return dict((yaml.safe_load(file) or {}).get("services") or {})
+
+
+def depends_on(definition):
+    """The services a compose service definition depends on, from the list or the mapping form of depends_on."""
+    return list(definition.get("depends_on") or ()) if isinstance(definition, dict) else []
+
+
+class ComposeExemplar(Exemplar):
+    """
+    An exemplar made of the services of a docker compose file.
+    The stack is created and removed with `docker compose up/down`, which also handle networks, volumes and
+    dependencies; in between, every service container is handled through the Docker SDK. The lifecycle methods
+    take an optional list of services and act on them concurrently, all services by default; restart_services()
+    restarts them in the order of their depends_on.
+    """
+
+    def __init__(self, base_endpoint, compose_dir, compose_file="docker-compose.yml", auto_start=False,
+                 client=None, max_workers=8):
+        self.compose_dir = compose_dir
+        self.compose_file = os.path.join(compose_dir, compose_file)
+        self.project = compose_project_name(self.compose_file)
+        self.service_definitions = load_compose_services(self.compose_file)
+        self.services = list(self.service_definitions)
+        # service -> services it depends on, from depends_on; subclasses may add dependencies the file leaves implicit
+        self.dependencies = {service: depends_on(definition) for service, definition in self.service_definitions.items()}
+        self.max_workers = max_workers
+        self._client = client
+        self.service_containers = {}  # service -> docker Container, see refresh_containers()
+        super().__init__(base_endpoint, auto_start=auto_start)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = docker.from_env()
+        return self._client
+
+    def required_images(self):
+        return compose_images(self.compose_file)
+
+    def refresh_containers(self):
+        """Looks up the containers of the project once; returns {service: Container}."""
+        containers = self.client.containers.list(all=True, filters={"label": f"{PROJECT_LABEL}={self.project}"})
+        self.service_containers = {container.labels.get(SERVICE_LABEL): container for container in containers}
+        return self.service_containers
+
+    def _containers(self, services=None):
+        if not self.service_containers:
+            self.refresh_containers()
+        services = self.services if services is None else list(services)
+        unknown = [service for service in services if service not in self.service_containers]
+        if unknown:
+            self.refresh_containers()
+        return {service: self.service_containers[service] for service in services if service in self.service_containers}
+
+    def for_each_service(self, action, services=None):
+        """
+        Calls action(container) for the container of every service concurrently.
+        Returns {service: result}; failures are logged and returned as the exception.
+        """
+        containers = self._containers(services)
+        if not containers:
+            return {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(containers))) as pool:
+            futures = {service: pool.submit(action, container) for service, container in containers.items()}
+            for service, future in futures.items():
+                try:
+                    results[service] = future.result()
+                except docker.errors.APIError as e:
+                    logging.error(f"{service}: {e}")
+                    results[service] = e
+        return results
+
+    def start_container(self, services=None):
+        '''Creates and starts the stack with `docker compose up -d`, or starts the containers of services'''
+        if services is None:
+            try:
+                subprocess.run(['docker', 'compose', '-f', self.compose_file, 'up', '-d'], cwd=self.compose_dir,
+                               check=True)
+                logging.info("Docker containers started successfully.")
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Failed to start the docker containers: {e}")
+                raise
+            self.refresh_containers()
+            return True
+        return self.for_each_service(lambda container: container.start(), services)
+
+    def stop_container(self, remove=True, services=None):
+        '''Removes the stack with `docker compose down` (or only stops it), or stops the containers of services'''
+        if services is None and remove:
+            try:
+                subprocess.run(['docker', 'compose', '-f', self.compose_file, 'down'], cwd=self.compose_dir, check=True)
+            except subprocess.CalledProcessError as e:
+                logging.error(f"Failed to stop the docker containers: {e}")
+                raise
+            self.service_containers = {}
+            return True
+        return self.for_each_service(lambda container: container.stop(), services)
+
+    def pause_container(self, services=None):
+        return self.for_each_service(lambda container: container.pause(), services)
+
+    def unpause_container(self, services=None):
+        return self.for_each_service(lambda container: container.unpause(), services)
+
+    def restart_order(self, services=None):
+        """
+        Groups services into waves to restart one after the other: a service comes after every selected service
+        it depends on, directly or through services that are not selected. Services of a wave are independent.
+        """
+        services = self.services if services is None else list(services)
+        selected = set(services)
+        waves = {}
+
+        def wave_of(service, path=()):
+            if service not in waves:
+                if service in path:
+                    raise ValueError(f"circular depends_on: {' -> '.join(path + (service,))}")
+                waves[service] = 1 + max((wave_of(dependency, path + (service,)) for dependency in
+                                          self._selected_dependencies(service, selected)), default=-1)
+            return waves[service]
+
+        order = [[] for _ in range(1 + max((wave_of(service) for service in services), default=-1))]
+        for service in services:
+            order[waves[service]].append(service)
+        return order
+
+    def _selected_dependencies(self, service, selected):
+        """The selected services service depends on, looking through the dependencies that are not selected."""
+        found, seen, pending = set(), {service}, list(self.dependencies.get(service, ()))
+        while pending:
+            dependency = pending.pop()
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            if dependency in selected:
+                found.add(dependency)
+            else:
+                pending.extend(self.dependencies.get(dependency, ()))
+        return found
+
+    def restart_services(self, services=None, timeout=10):
+        """Restarts services wave by wave in depends_on order, see restart_order(); returns {service: result}."""
+        results = {}
+        for wave in self.restart_order(services):
+            results.update(self.for_each_service(lambda container: container.restart(timeout=timeout), wave))
+        return results
+
+    def track_state(self, client=None):
+        '''Follows the Docker events of all containers of the project, see container_statuses()'''
+        self.state_tracker = ContainerStateTracker(client or self.client, labels=[f"{PROJECT_LABEL}={self.project}"]).start()
+        return self.state_tracker
+
+    def container_details(self):
+        """[{"Service", "Name", "State", "Health"}] of every container, like `docker compose ps --format json`."""
+        tracker = self.state_tracker if self.state_tracker is not None and self.state_tracker.running else None
+        details = []
+        for service, container in self.refresh_containers().items():
+            if tracker is not None and tracker.status(container.id):
+                state, health = tracker.status(container.id), tracker.health(container.id)
+            else:
+                state = container.status
+                health = container.attrs.get("State", {}).get("Health", {}).get("Status")
+            details.append({"Service": service, "Name": container.name, "State": state, "Health": health or ""})
+        return details
+
+    def container_statuses(self):
+        """{service: status} of every service, "removed" for services without a container."""
+        statuses = {service: "removed" for service in self.services}
+        tracker = self.state_tracker if self.state_tracker is not None and self.state_tracker.running else None
+        # without the tracker a single list call returns the fresh status of all containers
+        containers = self._containers() if tracker else self.refresh_containers()
+        for service, container in containers.items():
+            statuses[service] = (tracker.status(container.id) if tracker else None) or container.status
+        return statuses
+
+    def get_container_status(self, service=None):
+        '''Status of one service, or of the stack: the status shared by all services, otherwise "mixed"'''
+        statuses = self.container_statuses()
+        if service is not None:
+            return statuses.get(service, "removed")
+        distinct = set(statuses.values())
+        return distinct.pop() if len(distinct) == 1 else "mixed"
@@ -1,30 +1,217 @@
+import json
 import os
+import re
 import subprocess
 import pprint, time
-from UPISAS.exemplar import Exemplar
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+import requests
+
+from UPISAS.exemplars.compose import ComposeExemplar, depends_on, load_compose_services
+from UPISAS.exceptions import ExemplarNotReady
+from UPISAS.images import prepull_images
 import logging
 pp = pprint.PrettyPrinter(indent=4)
 logging.getLogger().setLevel(logging.INFO)
 
 
-class RAMSES(Exemplar):
+def eureka_application_name(service):
+    """Eureka application of a SEFA compose service, e.g. sefa-payment-proxy-1-service -> PAYMENT-PROXY-SERVICE."""
+    name = service[len("sefa-"):] if service.startswith("sefa-") else service
+    # the implementations of a service register under the name of the service
+    return re.sub(r"-\d+(?=-|$)", "", name).upper()
+
+
+def eureka_applications(service_definitions):
+    """The Eureka applications of the business services, i.e. the compose services depending on the config server."""
+    return sorted({eureka_application_name(service) for service, definition in service_definitions.items()
+                   if "sefa-configserver" in depends_on(definition)})
+
+
+class RamsesReadiness:
+    """
+    Decides when the RAMSES stack is usable, instead of sleeping for a guessed amount of time.
+    The checks run concurrently, each one polling until it passes:
+        containers  every compose container is running, and healthy if it has a healthcheck
+        eureka      every expected application (default: one per business service of the compose file) has an instance UP
+        interface   the Interface's /monitor returns a snapshot for every service
+    Each check returns (ready, detail); the last detail of every check is reported when the timeout expires.
+    """
+
+    def __init__(self, compose_dir, interface_url="http://127.0.0.1:50000", eureka_url="http://localhost:32830",
+                 expected_eureka_apps=None, interval=1, request_timeout=2, container_details=None):
+        self.compose_dir = compose_dir
+        # callable listing the containers like parse_compose_ps(), e.g. ComposeExemplar.container_details;
+        # None runs `docker compose ps`
+        self.container_details = container_details
+        self.interface_url = interface_url
+        self.eureka_url = eureka_url
+        if expected_eureka_apps is None:
+            compose_file = os.path.join(compose_dir, "docker-compose.yml")
+            expected_eureka_apps = eureka_applications(load_compose_services(compose_file)) if os.path.exists(compose_file) else []
+        # Eureka application names that must be UP, default: those of the compose services; empty: all registered
+        self.expected_eureka_apps = expected_eureka_apps
+        self.interval = interval
+        self.request_timeout = request_timeout
+        self.checks = {"containers": self.check_containers, "eureka": self.check_eureka,
+                       "interface": self.check_interface}
+
+    @staticmethod
+    def parse_compose_ps(output):
+        """Parses `docker compose ps --format json`, which is a JSON array or one JSON object per line."""
+        output = output.strip()
+        if not output:
+            return []
+        if output.startswith("["):
+            return json.loads(output)
+        return [json.loads(line) for line in output.splitlines() if line.strip()]
+
+    def compose_ps(self):
+        result = subprocess.run(['docker', 'compose', 'ps', '--all', '--format', 'json'], cwd=self.compose_dir,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise OSError(f"docker compose ps failed: {result.stderr.strip()}")
+        return self.parse_compose_ps(result.stdout)
+
+    def check_containers(self):
+        try:
+            containers = (self.container_details or self.compose_ps)()
+        except docker.errors.DockerException as e:
+            return False, f"cannot list the containers: {e}"
+        if not containers:
+            return False, "no containers"
+        waiting = [f"{c.get('Name')} ({c.get('Health') or c.get('State')})" for c in containers
+                   if c.get("State") != "running" or c.get("Health") not in ("", None, "healthy")]
+        if waiting:
+            return False, "waiting for " + ", ".join(waiting)
+        return True, f"{len(containers)} containers running"
+
+    def check_eureka(self):
+        response = requests.get(f"{self.eureka_url}/eureka/apps", headers={"Accept": "application/json"},
+                                timeout=self.request_timeout)
+        response.raise_for_status()
+        applications = response.json().get("applications", {}).get("application", [])
+        if isinstance(applications, dict):
+            applications = [applications]
+        up = {app["name"] for app in applications
+              if any(instance.get("status") == "UP" for instance in _as_list(app.get("instance")))}
+        expected = set(self.expected_eureka_apps) if self.expected_eureka_apps else {app["name"] for app in applications}
+        if not expected:
+            return False, "no applications registered"
+        missing = sorted(expected - up)
+        if missing:
+            return False, "not UP: " + ", ".join(missing)
+        return True, f"{len(up)} applications UP"
+
+    def check_interface(self):
+        response = requests.get(f"{self.interface_url}/monitor", timeout=self.request_timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return False, "empty /monitor payload"
+        missing = sorted(service_id for service_id, service_data in data.items() if not service_data.get("snapshot"))
+        if missing:
+            return False, "no snapshot yet for " + ", ".join(missing)
+        return True, f"{len(data)} services monitored"
+
+    def _poll(self, name, check, deadline):
+        started = time.monotonic()
+        detail = "not checked"
+        while True:
+            try:
+                ready, detail = check()
+            except (requests.RequestException, ValueError, OSError) as e:
+                ready, detail = False, f"{type(e).__name__}: {e}"
+            if ready:
+                logging.info(f"[readiness] {name} ready after {time.monotonic() - started:.1f}s: {detail}")
+                return {"ready": True, "elapsed": time.monotonic() - started, "detail": detail}
+            if time.monotonic() + self.interval > deadline:
+                return {"ready": False, "elapsed": time.monotonic() - started, "detail": detail}
+            time.sleep(self.interval)
+
+    def wait(self, timeout=300, checks=None):
+        """
+        Polls the given checks (default: all) concurrently until all of them pass and returns
+        {check: {"ready", "elapsed", "detail"}}. Raises ExemplarNotReady with that report after timeout seconds.
+        """
+        names = list(checks or self.checks)
+        deadline = time.monotonic() + timeout
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            futures = {name: pool.submit(self._poll, name, self.checks[name], deadline) for name in names}
+            report = {name: future.result() for name, future in futures.items()}
+        if not all(status["ready"] for status in report.values()):
+            diagnostics = "; ".join(f"{name}: {status['detail']}" for name, status in report.items() if not status["ready"])
+            raise ExemplarNotReady(f"RAMSES not ready after {timeout}s ({diagnostics})", report)
+        return report
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+# compose services holding the state of a run: the database, the business services with their request counters
+# and the knowledge of the managing system. The others (Eureka, config server, probe, managers) are kept warm on reset.
+RESET_SERVICES = ("mysql", "sefa-restaurant-service", "sefa-ordering-service", "sefa-payment-proxy-1-service",
+                  "sefa-delivery-proxy-1-service", "sefa-web-service", "sefa-api-gateway", "ramses-knowledge")
+
+
+def _address_of(instance_id):
+    """Splits an instance id "implementation@address:port" into (address, port)."""
+    address, _, port = instance_id.rpartition("@")[2].rpartition(":")
+    return address, int(port)
+
+
+class RAMSES(ComposeExemplar):
     """
-    A class which encapsulates a self-adaptive exemplar run in a docker container.
+    A class which encapsulates the RAMSES self-adaptive exemplar, run as a docker compose stack.
     """
     _container_name = ""
-    def __init__(self, auto_start=True):
-        self.base_endpoint = "http://127.0.0.1:50000"
+    def __init__(self, auto_start=True, interface_server="flask", interface_workers=1, prepull=True):
         self.ramses_dir_path = os.path.join(os.path.dirname(__file__), "..", "ramses")
+        super().__init__("http://127.0.0.1:50000", self.ramses_dir_path)
+        self.interface_server = interface_server  # "flask" (api.py) or "asgi" (asgi_api.py served by uvicorn)
+        self.interface_workers = interface_workers  # number of uvicorn worker processes for the asgi Interface
+        self.interface_process = None
+        self.reset_services = RESET_SERVICES
+        for service in RESET_SERVICES:
+            if service != "mysql":
+                # they connect to the database, which the compose file does not declare
+                self.dependencies[service] = self.dependencies.get(service, []) + ["mysql"]
+        self.baseline = None  # {service: {"implementation", "instances"}} of the fresh stack, see capture_baseline()
+        self.readiness = RamsesReadiness(self.ramses_dir_path, interface_url=self.base_endpoint,
+                                         container_details=self.container_details)
+        self.readiness.checks["interface"] = self._check_interface
         #self.ramses_dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ramses")) #absolute path used to avoid issues when running the script from different locations
 
         if auto_start:
+            if prepull:
+                self.prepull()
             self.start_container()
+
+    def prepull(self, max_workers=4, client=None, check_remote=False):
+        """Pulls the images of the compose file concurrently, instead of one by one in `docker compose up`."""
+        try:
+            return prepull_images(self.required_images(), max_workers=max_workers, client=client,
+                                  check_remote=check_remote)
+        except (ValueError, docker.errors.DockerException) as e:
+            logging.warning(f"Cannot pre-pull the RAMSES images, leaving it to docker compose: {e}")
+            return {}
     
     def start_run(self):
+        if self.interface_process is not None and self.interface_process.poll() is None:
+            logging.info("RAMSES API endpoints already running")
+            return
         try:
             ramses_interface_path = os.path.join(self.ramses_dir_path, "Interface")
-            subprocess.Popen(
-                ['python', 'api.py'],  
+            if self.interface_server == "asgi":
+                command = ['python', 'asgi_api.py', '--workers', str(self.interface_workers)]
+            else:
+                command = ['python', 'api.py']
+            self.interface_process = subprocess.Popen(
+                command,
                 cwd=ramses_interface_path 
             )
             logging.info("RAMSES API endpoints successfully started")
@@ -32,67 +219,120 @@ class RAMSES(Exemplar):
             logging.error(f"Failed to start RAMSES API endpoints: {e}")
             raise
 
-    
-    def start_container(self):
-        try:
-            subprocess.run( ['docker', 'compose', 'up', '-d'], cwd = self.ramses_dir_path, check = True )
-            logging.info ("Docker container started successfully. Please wait for the APIs and container to initialize properly...")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to start the docker containers: {e}")
-            raise
 
-    def stop_container(self, remove=True):
-        try:
-            subprocess.run(
-                ['docker', 'compose', 'down'],
-                cwd = self.ramses_dir_path,
-                check=True
-            )
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to stop the docker containers: {e}")
-            raise
-    
-    '''
-    def pause_container(self):
+    def stop_container(self, remove=True, services=None):
+        if services is None:
+            self.stop_interface()
+            self.baseline = None
+        return super().stop_container(remove=remove, services=services)
+
+    def wait_until_ready(self, timeout=300, checks=None):
         """
-        Pauses the container.
+        Blocks until the containers are up, the services are registered with Eureka and the Interface serves
+        monitoring data, see RamsesReadiness. Call it after start_container() and start_run().
         """
-        try:
-            subprocess.run(
-                ['docker', 'pause', self.container_name],
-                check=True
-            )
-            logging.info(f"Container '{self.container_name}' paused successfully.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to pause container '{self.container_name}': {e}")
-            raise
+        started = time.monotonic()
+        report = self.readiness.wait(timeout=timeout, checks=checks)
+        logging.info(f"RAMSES ready after {time.monotonic() - started:.1f}s")
+        if self.baseline is None and "interface" in report:
+            self.capture_baseline()
+        return report
+
+    def _monitor(self):
+        response = requests.get(f"{self.base_endpoint}/monitor", timeout=self.readiness.request_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _execute(self, body):
+        response = requests.post(f"{self.base_endpoint}/execute", json=body, timeout=30)
+        response.raise_for_status()
+        return response.json()
 
-    def unpause_container(self):
+    def capture_baseline(self):
+        """Records the instances of every service, reset() brings the stack back to them."""
+        self.baseline = {service_id: {"implementation": service_data["currentImplementationId"],
+                                      "instances": sorted(service_data["instances"])}
+                         for service_id, service_data in self._monitor().items()}
+        return self.baseline
+
+    def baseline_differences(self):
         """
-        Unpauses the container.
+        Services whose number of instances differs from the baseline, as {service: (current, expected)}.
+        Instances are compared by count, since a restarted container may come back with another address.
         """
-        try:
-            subprocess.run(
-                ['docker', 'unpause', self.container_name],
-                check=True
-            )
-            logging.info(f"Container '{self.container_name}' unpaused successfully.")
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to unpause container '{self.container_name}': {e}")
-            raise
+        differences = {}
+        current = self._monitor()
+        for service_id, expected in self.baseline.items():
+            count = len(current.get(service_id, {}).get("instances", []))
+            if count != len(expected["instances"]):
+                differences[service_id] = (count, len(expected["instances"]))
+        return differences
+
+    def restore_baseline_instances(self):
+        """
+        Brings every service back to its number of instances in the baseline, removing the instances added since
+        first and adding instances for the missing ones, then spreads the load balancer weights evenly over the
+        instances the services have afterwards.
+        """
+        current = self._monitor()
+        for service_id, expected in self.baseline.items():
+            implementation = expected["implementation"]
+            instances = sorted(current.get(service_id, {}).get("instances", []))
+            surplus = len(instances) - len(expected["instances"])
+            if surplus > 0:
+                baseline = set(expected["instances"])
+                for instance_id in sorted(instances, key=lambda instance_id: instance_id in baseline)[:surplus]:
+                    address, port = _address_of(instance_id)
+                    self._execute({"operation": "removeInstance", "address": address, "port": port,
+                                   "serviceImplementationName": implementation})
+                    instances.remove(instance_id)
+            elif surplus < 0:
+                result = self._execute({"operation": "addInstances", "serviceImplementationName": implementation,
+                                        "numberOfInstances": -surplus})
+                instances += [f"{implementation}@{added['address']}:{added['port']}"
+                              for added in result.get("dockerizedInstances") or []]
+            if instances:
+                self._execute({"operation": "changeLBWeights", "weightsId": service_id,
+                               "weights": {instance_id: 1.0 / len(instances) for instance_id in instances}})
 
-    def get_container_status(self):
+    def stop_interface(self):
+        if self.interface_process is not None and self.interface_process.poll() is None:
+            self.interface_process.terminate()
+            self.interface_process.wait(timeout=10)
+        self.interface_process = None
+
+    def reset(self, timeout=300):
+        """
+        Brings the running stack back to its baseline between runs instead of `docker compose down/up`:
+        every service gets its baseline number of instances back, load balancer weights are reset, the services in
+        self.reset_services are restarted, the database first (database and request counters start over), and the
+        Interface is restarted with empty caches. Returns False when the stack does not reach its baseline again, the caller
+        then has to recreate it.
+        """
+        if self.baseline is None:
+            logging.error("no baseline captured, cannot reset RAMSES")
+            return False
         try:
-            result = subprocess.run(
-                ['docker', 'inspect', '-f', '{{.State.Status}}', self.container_name],
-                check=True,
-                stdout=subprocess.PIPE,
-                text=True
-            )
-            status = result.stdout.strip()
-            logging.info(f"Container '{self.container_name}' is currently '{status}'.")
-            return status
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Failed to get status for container '{self.container_name}': {e}")
-            raise
- '''   
\ No newline at end of file
+            self.restore_baseline_instances()
+            self.stop_interface()
+            failed = [service for service, result in self.restart_services(self.reset_services).items()
+                      if isinstance(result, Exception)]
+            if failed:
+                logging.error(f"Failed to restart {', '.join(failed)}")
+                return False
+            self.start_run()
+            self.wait_until_ready(timeout=timeout)
+            differences = self.baseline_differences()
+        except (ExemplarNotReady, requests.RequestException, docker.errors.DockerException, ValueError) as e:
+            logging.error(f"Failed to reset RAMSES: {e}")
+            return False
+        if differences:
+            logging.error(f"RAMSES instances differ from the baseline after reset: {differences}")
+            return False
+        logging.info("RAMSES reset to its baseline")
+        return True
+
+    def _check_interface(self):
+        if self.interface_process is not None and self.interface_process.poll() is not None:
+            return False, f"Interface process exited with code {self.interface_process.returncode}"
+        return RamsesReadiness.check_interface(self.readiness)
@@ -0,0 +1,54 @@
+import logging
+
+from UPISAS import get_http_session
+from UPISAS.exemplar import Exemplar
+from UPISAS.trace import ReplayAdapter, read_trace, host_of
+
+
+class ReplayExemplar(Exemplar):
+    """
+    An exemplar that replays a trace recorded with UPISAS.trace.TraceRecorder instead of running containers.
+    While it runs, the shared sessions towards the hosts of the trace (and base_endpoint) are answered by a
+    ReplayAdapter, so strategies can be run, benchmarked and regression-tested offline.
+    """
+    _container_name = "replay"
+
+    def __init__(self, trace_path, base_endpoint="http://127.0.0.1:50000", auto_start=True, loop=False):
+        self.trace_path = trace_path
+        entries = read_trace(trace_path)
+        self.hosts = {host_of(entry["url"]) for entry in entries} | {host_of(base_endpoint)}
+        self.adapter = ReplayAdapter(entries, loop=loop)
+        self.replaced = []  # (session, host, adapter) the replay adapter was mounted over
+        self.status = "created"
+        super().__init__(base_endpoint, auto_start=auto_start)
+
+    def start_run(self):
+        self.adapter.rewind()
+
+    def start_container(self):
+        for host in self.hosts:
+            session = get_http_session(host)
+            self.replaced.append((session, host, session.get_adapter(host)))
+            session.mount(host, self.adapter)
+        self.status = "running"
+        logging.info(f"replaying {self.trace_path}")
+        return True
+
+    def stop_container(self, remove=True):
+        # mount the adapters of the sessions back, leaving the other shared sessions alone
+        for session, host, adapter in reversed(self.replaced):
+            session.mount(host, adapter)
+        self.replaced = []
+        self.status = "removed" if remove else "exited"
+        return True
+
+    def pause_container(self):
+        self.status = "paused"
+        return True
+
+    def unpause_container(self):
+        self.status = "running"
+        return True
+
+    def get_container_status(self):
+        return self.status
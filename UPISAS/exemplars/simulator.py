@@ -0,0 +1,44 @@
+import logging
+
+from UPISAS.exemplar import Exemplar
+from UPISAS.ramses_simulator import RamsesSimulator
+
+
+class SimulatedRAMSES(Exemplar):
+    """
+    An exemplar backed by the in-process RamsesSimulator instead of the RAMSES compose stack. The simulator
+    also stands in for the Interface, so base_endpoint/monitor and base_endpoint/execute work like with RAMSES.
+    Ports default to 0 (picked by the OS); the chosen ones are in simulator.ports once the container is started.
+    """
+    _container_name = "ramses-simulator"
+
+    def __init__(self, auto_start=True, **simulator_kwargs):
+        for port in ("probe_port", "instances_manager_port", "config_manager_port", "interface_port"):
+            simulator_kwargs.setdefault(port, 0)
+        self.simulator = RamsesSimulator(**simulator_kwargs)
+        self.status = "created"
+        # base_endpoint is known once the simulator has picked its ports, see start_container()
+        super().__init__(None, auto_start=auto_start)
+
+    @property
+    def lb_url(self):
+        return f"http://{self.simulator.host}:{self.simulator.ports['config_manager']}/rest/changeLBWeights"
+
+    def start_run(self):
+        pass
+
+    def start_container(self):
+        if self.status != "running":
+            self.simulator.start()
+            self.base_endpoint = f"http://{self.simulator.host}:{self.simulator.ports['interface']}"
+            self.status = "running"
+            logging.info(f"RAMSES simulator running at {self.base_endpoint}")
+        return True
+
+    def stop_container(self, remove=True):
+        self.simulator.stop()
+        self.status = "removed" if remove else "exited"
+        return True
+
+    def get_container_status(self):
+        return self.status
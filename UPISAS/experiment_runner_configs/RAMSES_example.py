@@ -14,6 +14,7 @@ import time
 
 from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
 from UPISAS.exemplars.ramses import RAMSES
+from UPISAS.exemplar_pool import WarmExemplarPool
 
 
 class RunnerConfig:
@@ -50,6 +51,8 @@ class RunnerConfig:
             (RunnerEvents.AFTER_EXPERIMENT, self.after_experiment)
         ])
         self.run_table_model = None  # Initialized in create_run_table_model
+        # The stack is kept running between runs and reset to its baseline, see RAMSES.reset()
+        self.exemplar_pool = WarmExemplarPool(self.create_exemplar)
         output.console_log("RAMSES Config loaded successfully")
 
     def create_run_table_model(self) -> RunTableModel:
@@ -66,18 +69,23 @@ class RunnerConfig:
         """Execute actions before starting the experiment."""
         output.console_log("Config.before_experiment() called!")
 
+    def create_exemplar(self) -> RAMSES:
+        exemplar = RAMSES(auto_start=True)
+        # Wait until the containers are up and registered with Eureka, the Interface is started in start_run()
+        exemplar.wait_until_ready(checks=["containers", "eureka"])
+        return exemplar
+
     def before_run(self) -> None:
         """Prepare the system before starting a run."""
-        self.exemplar = RAMSES(auto_start=True)
+        self.exemplar = self.exemplar_pool.acquire()
         self.strategy = ReactiveAdaptationManager(self.exemplar)
-        time.sleep(30)  # Allow the exemplar to initialize
         output.console_log("Config.before_run() called!")
 
     def start_run(self, context: RunnerContext) -> None:
         """Initialize parameters and start the target system for measurement."""
         #self.strategy.failure_rate_threshold = float(context.run_variation['failure_threshold'])
         self.exemplar.start_run() #-------------------
-        time.sleep(3)  # Allow time for stabilization
+        self.exemplar.wait_until_ready(checks=["interface"])
         output.console_log("Config.start_run() called!")
 
     def start_measurement(self, context: RunnerContext) -> None:
@@ -108,7 +116,7 @@ class RunnerConfig:
 
     def stop_run(self, context: RunnerContext) -> None:
         """Stop the system and clean up resources after a run."""
-        self.exemplar.stop_container()
+        self.exemplar_pool.release(self.exemplar)
         output.console_log("Config.stop_run() called!")
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, SupportsStr]]:
@@ -163,6 +171,7 @@ class RunnerConfig:
     '''
     def after_experiment(self) -> None:
         """Finalize the experiment and perform post-experiment activities."""
+        self.exemplar_pool.close()
         output.console_log("Config.after_experiment() called!")
 
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
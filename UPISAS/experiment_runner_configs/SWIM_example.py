@@ -15,6 +15,7 @@ import statistics
 
 from UPISAS.strategies.swim_reactive_strategy import ReactiveAdaptationManager
 from UPISAS.exemplars.swim import SWIM
+from UPISAS.exemplar_pool import WarmExemplarPool
 
 
 
@@ -56,6 +57,8 @@ class RunnerConfig:
             (RunnerEvents.AFTER_EXPERIMENT , self.after_experiment )
         ])
         self.run_table_model = None  # Initialized later
+        # The container is kept between runs and restarted instead of recreated, see Exemplar.reset()
+        self.exemplar_pool = WarmExemplarPool(lambda: SWIM(auto_start=True))
 
         output.console_log("Custom config loaded")
 
@@ -80,7 +83,7 @@ class RunnerConfig:
     def before_run(self) -> None:
         """Perform any activity required before starting a run.
         No context is available here as the run is not yet active (BEFORE RUN)"""
-        self.exemplar = SWIM(auto_start=True)
+        self.exemplar = self.exemplar_pool.acquire()
         self.strategy = ReactiveAdaptationManager(self.exemplar)
         time.sleep(3)
         output.console_log("Config.before_run() called!")
@@ -129,7 +132,7 @@ class RunnerConfig:
     def stop_run(self, context: RunnerContext) -> None:
         """Perform any activity here required for stopping the run.
         Activities after stopping the run should also be performed here."""
-        self.exemplar.stop_container()
+        self.exemplar_pool.release(self.exemplar)
         output.console_log("Config.stop_run() called!")
 
     def populate_run_data(self, context: RunnerContext) -> Optional[Dict[str, SupportsStr]]:
@@ -176,6 +179,7 @@ class RunnerConfig:
     def after_experiment(self) -> None:
         """Perform any activity required after stopping the experiment here
         Invoked only once during the lifetime of the program."""
+        self.exemplar_pool.close()
         output.console_log("Config.after_experiment() called!")
 
     # ================================ DO NOT ALTER BELOW THIS LINE ================================
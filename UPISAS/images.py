@@ -0,0 +1,185 @@
+"""
+Pre-pulling of the Docker images an exemplar needs, before its containers are created.
+
+compose_images() resolves the images of a compose file, including ${VAR} / ${VAR:-default} references taken from
+the environment and the .env file next to it. prepull_images() pulls the missing ones concurrently, with a bounded
+number of workers, and shows a single progress view: one bar per image plus one for the bytes of all images.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+import yaml
+from rich.progress import Progress
+
+VARIABLE = re.compile(r"\$\{(\w+)(?::?-([^}]*))?\}|\$(\w+)")
+
+
+def read_env_file(path):
+    variables = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    name, _, value = line.partition("=")
+                    variables[name.strip()] = value.strip().strip('"').strip("'")
+    return variables
+
+
+def interpolate(value, variables):
+    """Replaces ${VAR}, ${VAR:-default} and $VAR like docker compose; raises KeyError for unset variables."""
+    def replace(match):
+        name = match.group(1) or match.group(3)
+        if variables.get(name):
+            return variables[name]
+        if match.group(2) is not None:
+            return match.group(2)
+        raise KeyError(name)
+    return VARIABLE.sub(replace, value)
+
+
+def compose_images(compose_file, environ=None):
+    """The distinct images of the services of a compose file, in order of appearance."""
+    variables = read_env_file(os.path.join(os.path.dirname(os.path.abspath(compose_file)), ".env"))
+    variables.update(os.environ if environ is None else environ)
+    with open(compose_file) as file:
+        services = (yaml.safe_load(file) or {}).get("services") or {}
+    images = []
+    for service in services.values():
+        image = (service or {}).get("image")
+        if image:
+            try:
+                image = interpolate(image, variables)
+            except KeyError as e:
+                raise ValueError(f"variable {e.args[0]} used by image {image} is not set") from None
+            if image not in images:
+                images.append(image)
+    return images
+
+
+def with_tag(image):
+    """image with the implicit :latest tag made explicit (digest references are kept as they are)."""
+    if "@" in image or ":" in image.rsplit("/", 1)[-1]:
+        return image
+    return image + ":latest"
+
+
+def image_present(client, image, check_remote=False):
+    """
+    Whether image is available locally. Digest references must match a local RepoDigest; with check_remote
+    a tag only counts when its local digest is the one currently published in the registry.
+    """
+    try:
+        local = client.images.get(image)
+    except docker.errors.ImageNotFound:
+        return False
+    repo_digests = {digest.rsplit("@", 1)[-1] for digest in local.attrs.get("RepoDigests", [])}
+    if "@" in image:
+        return image.rsplit("@", 1)[-1] in repo_digests
+    if check_remote:
+        try:
+            return client.images.get_registry_data(image).id in repo_digests
+        except docker.errors.APIError as e:
+            logging.warning(f"cannot check the registry digest of {image}: {e}")
+    return True
+
+
+class PullProgress:
+    """Aggregates the layer progress lines of concurrent pulls into one rich Progress view."""
+
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.layers = {}  # (image, layer id) -> [current, total]
+        self.image_tasks = {}
+        self.total_task = progress.add_task("[bold]all images", total=None) if progress else None
+
+    def start(self, image):
+        if self.progress:
+            self.image_tasks[image] = self.progress.add_task(image, total=None)
+
+    def update(self, image, line):
+        status, detail, layer = line.get("status", ""), line.get("progressDetail") or {}, line.get("id")
+        if layer is None:
+            return
+        with self.lock:
+            key = (image, layer)
+            if status == "Downloading" and detail.get("total"):
+                self.layers[key] = [detail.get("current", 0), detail["total"]]
+            elif status in ("Download complete", "Pull complete", "Already exists") and key in self.layers:
+                self.layers[key][0] = self.layers[key][1]
+            else:
+                return
+            self._refresh(image)
+
+    def finish(self, image):
+        with self.lock:
+            for key, layer in self.layers.items():
+                if key[0] == image:
+                    layer[0] = layer[1]
+            if self.progress:
+                self._refresh(image)
+                _, total = self.totals(image)
+                self.progress.update(self.image_tasks[image], total=total or 1, completed=total or 1)
+
+    def totals(self, image=None):
+        """(downloaded bytes, total bytes) of image, or of all images."""
+        layers = [layer for key, layer in self.layers.items() if image is None or key[0] == image]
+        return sum(layer[0] for layer in layers), sum(layer[1] for layer in layers)
+
+    def _refresh(self, image):
+        if not self.progress:
+            return
+        current, total = self.totals(image)
+        self.progress.update(self.image_tasks[image], completed=current, total=total)
+        current, total = self.totals()
+        self.progress.update(self.total_task, completed=current, total=total)
+
+
+def pull_image(client, image, pull_progress):
+    pull_progress.start(image)
+    for line in client.api.pull(with_tag(image), stream=True, decode=True):
+        if "error" in line:
+            raise docker.errors.APIError(line["error"])
+        pull_progress.update(image, line)
+    pull_progress.finish(image)
+
+
+def prepull_images(images, max_workers=4, client=None, show_progress=True, check_remote=False):
+    """
+    Pulls the images that are not present yet, at most max_workers at a time.
+    Returns {image: "present" | "pulled" | "failed: <reason>"}.
+    """
+    client = client or docker.from_env()
+    results = {}
+    missing = []
+    for image in images:
+        if image_present(client, image, check_remote):
+            results[image] = "present"
+        else:
+            missing.append(image)
+    if not missing:
+        return results
+    logging.info(f"pulling {len(missing)} image(s), {len(results)} already present")
+
+    def pull_all(pull_progress):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {image: pool.submit(pull_image, client, image, pull_progress) for image in missing}
+            for image, future in futures.items():
+                try:
+                    future.result()
+                    results[image] = "pulled"
+                except docker.errors.DockerException as e:
+                    logging.error(f"failed to pull {image}: {e}")
+                    results[image] = f"failed: {e}"
+
+    if show_progress:
+        with Progress() as progress:
+            pull_all(PullProgress(progress))
+    else:
+        pull_all(PullProgress())
+    return results
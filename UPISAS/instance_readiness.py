@@ -0,0 +1,75 @@
+import time
+import logging
+
+
+class InstanceReadinessTracker:
+    """
+    Waits for instances added by an adaptation to finish booting, by polling the monitor data
+    until a new instance of every affected service implementation reports active and not booting.
+    Replaces fixed sleeps, so the wait lasts as long as the real boot time (bounded by timeout).
+    """
+
+    def __init__(self, fetch_monitor_data, timeout=20, interval=1):
+        self.fetch_monitor_data = fetch_monitor_data  # callable returning a fresh /monitor payload
+        self.timeout = timeout
+        self.interval = interval
+
+    @staticmethod
+    def known_instances(monitor_data):
+        """The ids of all instances present in a /monitor payload."""
+        return {snapshot.get("instanceId")
+                for service_data in monitor_data.values() if isinstance(service_data, dict)
+                for snapshot in service_data.get("snapshot") or []}
+
+    @staticmethod
+    def is_ready(snapshot):
+        if not snapshot.get("active", True) or snapshot.get("booting"):
+            return False
+        if snapshot.get("failed") or snapshot.get("unreachable"):
+            return False
+        return snapshot.get("status", "ACTIVE") == "ACTIVE"
+
+    @staticmethod
+    def _matches(service_id, service_data, implementation_name):
+        implementation_name = implementation_name.lower()
+        return (service_id.lower() == implementation_name or
+                str(service_data.get("currentImplementationId", "")).lower() == implementation_name)
+
+    def ready_instances(self, monitor_data, implementation_names, known_instances):
+        """Maps every implementation name to a new ready instance id, or None if it has none yet."""
+        ready = {}
+        for implementation_name in implementation_names:
+            ready[implementation_name] = None
+            for service_id, service_data in monitor_data.items():
+                if not isinstance(service_data, dict) or not self._matches(service_id, service_data, implementation_name):
+                    continue
+                for snapshot in service_data.get("snapshot") or []:
+                    instance_id = snapshot.get("instanceId")
+                    if instance_id not in known_instances and self.is_ready(snapshot):
+                        ready[implementation_name] = instance_id
+                        break
+        return ready
+
+    def wait_for_new_instances(self, implementation_names, known_instances):
+        """
+        Blocks until every implementation in implementation_names has a ready instance that is not in
+        known_instances, or until the timeout expires. Returns the last readiness map (see ready_instances).
+        """
+        implementation_names = set(implementation_names)
+        ready = {implementation_name: None for implementation_name in implementation_names}
+        if not implementation_names:
+            return ready
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                ready = self.ready_instances(self.fetch_monitor_data(), implementation_names, known_instances)
+            except Exception as e:
+                logging.warning(f"readiness check failed: {e}")
+            if all(ready.values()):
+                return ready
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.warning(f"instances not ready after {self.timeout}s: "
+                                f"{[name for name, instance in ready.items() if not instance]}")
+                return ready
+            time.sleep(min(self.interval, remaining))
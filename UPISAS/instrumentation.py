@@ -0,0 +1,276 @@
+"""
+Timing and counting instrumentation of the MAPE-K phases and of outbound HTTP calls.
+
+Everything is off by default, and then costs one check of a module-level flag per call. Switch it on with
+enable(), optionally passing sinks that flush() exports the collected metrics to:
+    MemorySink      keeps the last export in memory (snapshot dicts)
+    CsvSink         appends one row per metric to a CSV file
+    PrometheusSink  renders the Prometheus text exposition format, as served by the Interface on /metrics
+
+Metrics are histograms (count, sum and cumulative buckets) and counters, identified by a name and labels.
+This module only depends on the standard library and requests, so the Interface (api.py) can use it too.
+"""
+import bisect
+import csv
+import functools
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS_BYTES = (128, 1024, 8192, 65536, 524288, 4194304, 33554432)
+
+enabled = False
+sinks = []
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one counts values above the highest bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """[(upper bound, number of values <= upper bound)], ending with ("+Inf", count)."""
+        result, total = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, labels, buckets=LATENCY_BUCKETS_MS):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot(self):
+        """The metrics as plain dicts: {"histograms": [...], "counters": [...]}."""
+        with self.lock:
+            return {
+                "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                                "buckets": h.cumulative()} for (name, labels), h in self.histograms.items()],
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self.counters.items()],
+            }
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+registry = Registry()
+
+
+def enable(*new_sinks):
+    """Switches instrumentation on, exporting to the given sinks on flush()."""
+    global enabled
+    sinks.extend(new_sinks)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+    sinks.clear()
+
+
+def flush():
+    """Exports the collected metrics to every sink."""
+    snapshot = registry.snapshot()
+    for sink in sinks:
+        sink.export(snapshot)
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS_MS, **labels):
+    if enabled:
+        registry.observe(name, value, labels, buckets)
+
+
+def increment(name, amount=1, **labels):
+    if enabled:
+        registry.increment(name, labels, amount)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        registry.observe(self.name, (time.perf_counter() - self.started) * 1000, self.labels)
+        if exc_type is not None:
+            registry.increment(self.name + "_errors", self.labels)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_no_timer = _NoTimer()
+
+
+def timed(name, **labels):
+    """Context manager recording the duration (ms) of its block in histogram name, and exceptions in name_errors."""
+    return _Timer(name, labels) if enabled else _no_timer
+
+
+def instrument_phase(phase):
+    """Decorator timing a MAPE-K phase method in the mape_k_phase_ms histogram, labelled with phase and class."""
+    def decorator(function):
+        if getattr(function, "__instrumented__", False):
+            return function
+
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            if not enabled:
+                return function(self, *args, **kwargs)
+            with _Timer("mape_k_phase_ms", {"phase": phase, "strategy": type(self).__name__}):
+                return function(self, *args, **kwargs)
+        wrapper.__instrumented__ = True
+        return wrapper
+    return decorator
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter recording, per method and path, the latency of every request (http_client_request_ms),
+    the request and response body sizes (http_client_*_bytes) and failed requests (http_client_errors).
+    """
+
+    def send(self, request, **kwargs):
+        if not enabled:
+            return super().send(request, **kwargs)
+        labels = {"method": request.method, "path": urlsplit(request.url).path}
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            registry.increment("http_client_errors", dict(labels, status="exception"))
+            raise
+        finally:
+            registry.observe("http_client_request_ms", (time.perf_counter() - started) * 1000, labels)
+        body = request.body
+        registry.observe("http_client_request_bytes", len(body) if body else 0, labels, SIZE_BUCKETS_BYTES)
+        if not kwargs.get("stream"):
+            registry.observe("http_client_response_bytes", len(response.content), labels, SIZE_BUCKETS_BYTES)
+        if response.status_code >= 400:
+            registry.increment("http_client_errors", dict(labels, status=str(response.status_code)))
+        return response
+
+
+class MemorySink:
+    def __init__(self):
+        self.snapshots = []
+
+    def export(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    @property
+    def last(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+
+class CsvSink:
+    """Appends timestamp, kind, name, labels, count, sum/value rows to path on every export."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, snapshot):
+        new_file = not os.path.exists(self.path)
+        now = time.time()
+        with open(self.path, "a", newline="") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(["timestamp", "kind", "name", "labels", "count", "value"])
+            for histogram in snapshot["histograms"]:
+                writer.writerow([now, "histogram", histogram["name"], _format_labels(histogram["labels"]),
+                                 histogram["count"], histogram["sum"]])
+            for counter in snapshot["counters"]:
+                writer.writerow([now, "counter", counter["name"], _format_labels(counter["labels"]), "", counter["value"]])
+
+
+def _format_labels(labels, extra=None):
+    labels = dict(labels, **(extra or {}))
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{str(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+def _families(entries):
+    """Snapshot entries grouped by metric name, in the order the names first appear."""
+    families = {}
+    for entry in entries:
+        families.setdefault(entry["name"], []).append(entry)
+    return families.items()
+
+
+def prometheus_text(snapshot):
+    """
+    Renders a registry snapshot in the Prometheus text exposition format, where all series of a metric
+    must follow its # TYPE line, whatever the order they were registered in.
+    """
+    lines = []
+    for name, histograms in _families(snapshot["histograms"]):
+        lines.append(f"# TYPE {name} histogram")
+        for histogram in histograms:
+            for bound, count in histogram["buckets"]:
+                lines.append(f"{name}_bucket{_format_labels(histogram['labels'], {'le': bound})} {count}")
+            lines.append(f"{name}_sum{_format_labels(histogram['labels'])} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(histogram['labels'])} {histogram['count']}")
+    for name, counters in _families(snapshot["counters"]):
+        lines.append(f"# TYPE {name} counter")
+        for counter in counters:
+            lines.append(f"{name}{_format_labels(counter['labels'])} {counter['value']}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    """Keeps the Prometheus text of the last export in text."""
+
+    def __init__(self):
+        self.text = ""
+
+    def export(self, snapshot):
+        self.text = prometheus_text(snapshot)
@@ -0,0 +1,138 @@
+"""
+Append-only journal of the Knowledge of a strategy, so it survives a crash of the MAPE-K loop.
+
+Entries (monitor payloads, analysis results, plans and execution outcomes) are appended as JSON lines to a
+gzip-compressed segment. Every checkpoint_every entries the caller writes a checkpoint with the full state and
+a new segment is started; older segments and checkpoints are removed. A warm start loads the latest checkpoint
+and replays the entries of the segment written after it.
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+SEGMENT_PATTERN = re.compile(r"journal-(\d+)\.jsonl\.gz$")
+CHECKPOINT_PATTERN = re.compile(r"checkpoint-(\d+)\.json\.gz$")
+
+
+def _read_segment(path):
+    """Decompresses every gzip member of a segment, including a last member cut off by a crash."""
+    with open(path, 'rb') as file:
+        raw = file.read()
+    data = []
+    while raw:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            data.append(decompressor.decompress(raw))
+        except zlib.error:
+            break
+        if not decompressor.eof:
+            break
+        raw = decompressor.unused_data
+    return b"".join(data).decode('utf-8', errors='replace')
+
+
+class KnowledgeJournal:
+
+    def __init__(self, directory, checkpoint_every=50):
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self.lock = threading.Lock()
+        self.file = None
+        self.entries_since_checkpoint = 0
+        os.makedirs(directory, exist_ok=True)
+        self.sequence = max([self._sequence_of(path, CHECKPOINT_PATTERN) for path in self._files("checkpoint-*.json.gz")] +
+                            [self._sequence_of(path, SEGMENT_PATTERN) for path in self._files("journal-*.jsonl.gz")] + [0])
+
+    def _files(self, pattern):
+        return glob.glob(os.path.join(self.directory, pattern))
+
+    @staticmethod
+    def _sequence_of(path, pattern):
+        match = pattern.search(os.path.basename(path))
+        return int(match.group(1)) if match else 0
+
+    def _segment_path(self, sequence):
+        return os.path.join(self.directory, f"journal-{sequence}.jsonl.gz")
+
+    def _checkpoint_path(self, sequence):
+        return os.path.join(self.directory, f"checkpoint-{sequence}.json.gz")
+
+    def append(self, kind, data, timestamp=None):
+        """
+        Appends an entry and returns True when a checkpoint is due. Every entry is flushed,
+        so a crash loses at most the entry being written.
+        """
+        line = json.dumps({"t": time.time() if timestamp is None else timestamp, "kind": kind, "data": data},
+                          separators=(',', ':'), default=str)
+        with self.lock:
+            if self.file is None:
+                self.file = gzip.open(self._segment_path(self.sequence), 'at', encoding='utf-8')
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.entries_since_checkpoint += 1
+            return self.entries_since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(self, state):
+        """
+        Writes state as the latest checkpoint, starts a new segment and removes the older
+        segments and checkpoints. The checkpoint file is replaced atomically.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.sequence += 1
+            path = self._checkpoint_path(self.sequence)
+            with gzip.open(path + ".tmp", 'wt', encoding='utf-8') as file:
+                json.dump(state, file, separators=(',', ':'), default=str)
+            os.replace(path + ".tmp", path)
+            for old in self._files("checkpoint-*.json.gz") + self._files("journal-*.jsonl.gz"):
+                pattern = CHECKPOINT_PATTERN if old.endswith(".json.gz") else SEGMENT_PATTERN
+                if self._sequence_of(old, pattern) < self.sequence:
+                    os.remove(old)
+            self.entries_since_checkpoint = 0
+
+    def load(self):
+        """
+        Returns (state of the latest checkpoint or None, entries appended after it). A segment cut off by a crash
+        is read up to its last complete entry.
+        """
+        state = None
+        checkpoints = sorted(self._files("checkpoint-*.json.gz"), key=lambda path: self._sequence_of(path, CHECKPOINT_PATTERN))
+        if checkpoints:
+            with gzip.open(checkpoints[-1], 'rt', encoding='utf-8') as file:
+                state = json.load(file)
+        checkpoint_sequence = self._sequence_of(checkpoints[-1], CHECKPOINT_PATTERN) if checkpoints else 0
+        entries = []
+        segments = sorted(self._files("journal-*.jsonl.gz"), key=lambda path: self._sequence_of(path, SEGMENT_PATTERN))
+        for segment in segments:
+            if self._sequence_of(segment, SEGMENT_PATTERN) < checkpoint_sequence:
+                continue
+            for line in _read_segment(segment).splitlines():
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"journal segment {segment} ends with an incomplete entry, ignoring it")
+        return state, entries
+
+    def clear(self):
+        """Removes every segment and checkpoint, e.g. those left by a run whose system was torn down."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            for old in self._files("checkpoint-*.json.gz") + self._files("journal-*.jsonl.gz"):
+                os.remove(old)
+            self.entries_since_checkpoint = 0
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -1,9 +1,297 @@
+import threading
+import time
+from array import array
+from collections import deque
+
+
 class Knowledge:
-    def __init__(self, monitored_data, analysis_data, plan_data, adaptation_options):
+    def __init__(self, monitored_data, analysis_data, plan_data, adaptation_options, history_window=5):
         self.monitored_data = monitored_data  # Stores monitoring data
         self.analysis_data = analysis_data  # Stores results from the analyze phase
         self.plan_data = plan_data  # Stores planned actions
         self.adaptation_options = adaptation_options  # Stores executed actions/results
         self.standby_pool = {}  # Tracks standby instances for critical services
+        self.monitor_cursor = None  # Version cursor of the last payload received from /monitor/delta
+        self.monitor_payload = {}  # Full monitor payload rebuilt from the deltas
+        self.in_flight_actions = {}  # Actions queued or running on the ActionExecutor, keyed by ActionExecutor.action_key
+        self.execution_results = deque(maxlen=100)  # Outcome of the most recent actions finished by the ActionExecutor
+        self.history = TimeSeriesStore(history_window)  # Per-instance metric history used for trend analysis
+        self.index = KnowledgeIndex()  # Services, instances and implementations of monitored_data, indexed by id
+        self.down_containers = {}  # Container name -> state of the containers Docker reported down, see Strategy.watch_containers()
+        self.lock = threading.RLock()  # Guards in_flight_actions and execution_results, written by ActionExecutor workers
+
+    def to_checkpoint(self):
+        """The state to persist in a journal checkpoint, see UPISAS.journal."""
+        with self.lock:
+            execution_results = list(self.execution_results)
+        return {
+            "monitored_data": self.monitored_data,
+            "analysis_data": self.analysis_data,
+            "plan_data": self.plan_data,
+            "adaptation_options": self.adaptation_options,
+            "standby_pool": self.standby_pool,
+            "execution_results": execution_results,
+            "history": self.history.to_dict(),
+        }
+
+    def restore_checkpoint(self, state):
+        """Restores the state returned by to_checkpoint()."""
+        self.monitored_data = state.get("monitored_data", {})
+        self.analysis_data = state.get("analysis_data", {})
+        self.plan_data = state.get("plan_data", [])
+        self.adaptation_options = state.get("adaptation_options", [])
+        self.standby_pool = state.get("standby_pool", {})
+        with self.lock:
+            self.execution_results.clear()
+            self.execution_results.extend(state.get("execution_results", []))
+        self.history.load_dict(state.get("history", {}))
+        self.index = KnowledgeIndex()
+        self.index.update(self.monitored_data)
+
+    def apply_monitor_delta(self, delta):
+        """
+        Applies a /monitor/delta response to the rebuilt monitor payload and returns it.
+        A full response replaces the payload, otherwise only the services and instances listed in it are touched.
+        """
+        if delta.get("full"):
+            self.monitor_payload = delta.get("services", {})
+        else:
+            payload = self.monitor_payload
+            for service_name in delta.get("removed", []):
+                payload.pop(service_name, None)
+            payload.update(delta.get("added", {}))
+            for service_name, service_delta in delta.get("changed", {}).items():
+                service = payload.setdefault(service_name, {})
+                _apply_fields(service, service_delta)
+                if "snapshot" in service_delta:
+                    service["snapshot"] = _apply_snapshot_delta(service.get("snapshot") or [], service_delta["snapshot"])
+        self.monitor_cursor = delta.get("version")
+        return self.monitor_payload
+
+
+class ServiceRecord:
+    __slots__ = ("service_id", "implementation_id", "instances", "instance_ids")
+
+    def __init__(self, service_id):
+        self.service_id = service_id
+        self.implementation_id = None  # currentImplementationId
+        self.instances = []  # instance ids registered for the service, the "instances" field of the payload
+        self.instance_ids = {}  # ids of the instances with a snapshot, in snapshot order (used as an ordered set)
+
+
+class InstanceRecord:
+    __slots__ = ("instance_id", "service_id", "snapshot")
+
+    def __init__(self, instance_id, service_id, snapshot):
+        self.instance_id = instance_id
+        self.service_id = service_id
+        self.snapshot = snapshot  # latest snapshot
+
+
+class KnowledgeIndex:
+    """
+    The monitored services and instances indexed by id: service -> ServiceRecord (with its instances),
+    instance -> InstanceRecord (with its latest snapshot and service) and implementation -> service ids.
+    update() applies a monitor payload incrementally, touching only the services in it, like
+    monitored_data.update() does.
+    """
+
+    def __init__(self):
+        self.services = {}
+        self.instances = {}
+        self.implementations = {}
+
+    def update(self, monitor_data):
+        """Applies a monitor payload and returns the ids of the instances that are gone from it."""
+        removed = []
+        for service_id, service_data in monitor_data.items():
+            if isinstance(service_data, dict):
+                removed.extend(self.update_service(service_id, service_data))
+        return removed
+
+    def update_service(self, service_id, service_data):
+        service = self.services.get(service_id)
+        if service is None:
+            service = self.services[service_id] = ServiceRecord(service_id)
+
+        implementation_id = service_data.get("currentImplementationId")
+        if implementation_id != service.implementation_id:
+            if service.implementation_id is not None:
+                self.implementations.get(service.implementation_id, set()).discard(service_id)
+            if implementation_id is not None:
+                self.implementations.setdefault(implementation_id, set()).add(service_id)
+            service.implementation_id = implementation_id
+        service.instances = service_data.get("instances") or []
+
+        instance_ids = {}
+        for snapshot in service_data.get("snapshot") or []:
+            instance_id = snapshot.get("instanceId")
+            if not instance_id:
+                continue
+            instance_ids[instance_id] = None
+            instance = self.instances.get(instance_id)
+            if instance is None:
+                self.instances[instance_id] = InstanceRecord(instance_id, service_id, snapshot)
+            else:
+                instance.service_id = service_id
+                instance.snapshot = snapshot
+        removed = []
+        for instance_id in service.instance_ids:
+            if instance_id not in instance_ids and self.service_of(instance_id) == service_id:
+                del self.instances[instance_id]
+                removed.append(instance_id)
+        service.instance_ids = instance_ids
+        return removed
+
+    def implementation_of(self, service_id):
+        service = self.services.get(service_id)
+        return service.implementation_id if service is not None else None
+
+    def instances_of(self, service_id):
+        """The instance ids registered for a service."""
+        service = self.services.get(service_id)
+        return service.instances if service is not None else []
+
+    def snapshot_of(self, instance_id):
+        instance = self.instances.get(instance_id)
+        return instance.snapshot if instance is not None else None
+
+    def service_of(self, instance_id):
+        instance = self.instances.get(instance_id)
+        return instance.service_id if instance is not None else None
+
+    def services_of(self, implementation_id):
+        return self.implementations.get(implementation_id, set())
+
+
+class MetricRingBuffer:
+    """
+    Fixed-capacity ring buffer of timestamped samples of one metric. Values and timestamps are kept in
+    preallocated arrays of doubles, so appending never allocates and the oldest sample is overwritten in O(1).
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))
+        self.times = array('d', bytes(8 * capacity))
+        self.head = 0  # index the next sample is written to
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value, timestamp=None):
+        self.values[self.head] = value
+        self.times[self.head] = time.time() if timestamp is None else timestamp
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _window(self, data, n):
+        n = self.count if n is None else max(0, min(n, self.count))
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return data[start:start + n]
+        return data[start:] + data[:self.head]
+
+    def last(self, n=None):
+        """The last n values (all of them by default), oldest first."""
+        return self._window(self.values, n)
+
+    def timestamps(self, n=None):
+        """The timestamps of the last n values, oldest first."""
+        return self._window(self.times, n)
+
+    def mean(self, n=None):
+        """Mean of the last n values, or None when there are none."""
+        values = self.last(n)
+        return sum(values) / len(values) if values else None
+
+    def percentile(self, q, n=None):
+        """q-th percentile (0-100) of the last n values with linear interpolation, or None when there are none."""
+        values = sorted(self.last(n))
+        if not values:
+            return None
+        position = (len(values) - 1) * q / 100
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class TimeSeriesStore:
+    """
+    Metric history per instance, one MetricRingBuffer of `window` samples per instance and metric.
+    The accessors return empty results for instances or metrics that were never recorded.
+    """
+
+    def __init__(self, window=5):
+        self.window = window
+        self.series = {}
+
+    def record(self, instance_id, metrics, timestamp=None):
+        """Appends one sample of every metric in the metrics dict for instance_id."""
+        timestamp = time.time() if timestamp is None else timestamp
+        instance_series = self.series.setdefault(instance_id, {})
+        for metric, value in metrics.items():
+            buffer = instance_series.get(metric)
+            if buffer is None:
+                buffer = instance_series[metric] = MetricRingBuffer(self.window)
+            buffer.append(float(value or 0), timestamp)
+
+    def get(self, instance_id, metric):
+        return self.series.get(instance_id, {}).get(metric)
+
+    def last(self, instance_id, metric, n=None):
+        buffer = self.get(instance_id, metric)
+        return buffer.last(n) if buffer is not None else array('d')
+
+    def mean(self, instance_id, metric, n=None):
+        buffer = self.get(instance_id, metric)
+        return buffer.mean(n) if buffer is not None else None
+
+    def percentile(self, instance_id, metric, q, n=None):
+        buffer = self.get(instance_id, metric)
+        return buffer.percentile(q, n) if buffer is not None else None
+
+    def forget(self, instance_id):
+        self.series.pop(instance_id, None)
+
+    def __contains__(self, instance_id):
+        return instance_id in self.series
+
+    def to_dict(self):
+        """{instance id: {metric: [[timestamp, value], ...]}}, oldest samples first."""
+        return {instance_id: {metric: [list(sample) for sample in zip(buffer.timestamps(), buffer.last())]
+                              for metric, buffer in instance_series.items()}
+                for instance_id, instance_series in self.series.items()}
+
+    def load_dict(self, data):
+        """Replaces the history with the one returned by to_dict()."""
+        self.series = {}
+        for instance_id, instance_series in data.items():
+            for metric, samples in instance_series.items():
+                for timestamp, value in samples:
+                    self.record(instance_id, {metric: value}, timestamp)
+
+
+def _apply_fields(target, field_delta):
+    target.update(field_delta.get("set", {}))
+    for key in field_delta.get("unset", []):
+        target.pop(key, None)
 
 
+def _apply_snapshot_delta(snapshots, snapshot_delta):
+    removed = set(snapshot_delta.get("removed", []))
+    changed = snapshot_delta.get("changed", {})
+    result = []
+    for snapshot in snapshots:
+        instance_id = snapshot.get("instanceId")
+        if instance_id in removed:
+            continue
+        if instance_id in changed:
+            snapshot = dict(snapshot)
+            _apply_fields(snapshot, changed[instance_id])
+        result.append(snapshot)
+    result.extend(snapshot_delta.get("added", {}).values())
+    return result
@@ -0,0 +1,123 @@
+"""
+Non-blocking, level-gated logging for the MAPE-K loop.
+
+configure_logging() puts a QueueHandler on the root logger: the loop thread only renders the message of the
+record and enqueues it, while a QueueListener thread formats the line and writes it out. Messages use %-style
+arguments, so they are only rendered when the record passes the level of its logger, and LazyJSON defers
+json.dumps() of large payloads in the same way. Rendering happens before the record is handed over, so a
+payload mutated by the loop afterwards is logged as it was. Levels can be set per module, e.g. levels={"UPISAS.strategy_ramses": "DEBUG"} or
+UPISAS_LOG_LEVELS="UPISAS.strategy_ramses=DEBUG,UPISAS.qos=WARNING".
+
+Extra structured fields can be passed as logger.info("Instance added", extra={"fields": {"service": id}})
+and are appended as key=value pairs, or as JSON with json_lines=True.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+listener = None
+
+
+class LazyJSON:
+    """Serializes data with json.dumps only when the log record is actually formatted."""
+    __slots__ = ("data", "indent")
+
+    def __init__(self, data, indent=None):
+        self.data = data
+        self.indent = indent
+
+    def __str__(self):
+        return json.dumps(self.data, indent=self.indent, default=str)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Appends the fields of a record as key=value pairs, or renders the whole record as one JSON object."""
+
+    def __init__(self, fmt=DEFAULT_FORMAT, json_lines=False):
+        super().__init__(fmt)
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        if self.json_lines:
+            entry = {"time": record.created, "level": record.levelname, "logger": record.name,
+                     "message": record.getMessage(), **fields}
+            if record.exc_info or record.exc_text:
+                entry["exception"] = record.exc_text or self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        line = super().format(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler rendering the message of a record, but leaving the formatting of the line to the listener thread."""
+
+    def prepare(self, record):
+        # the arguments may be mutated by this thread once the record is handed over, render them now
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        if record.exc_info:
+            # tracebacks refer to frames of this thread, render them before handing the record over
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(text):
+    """Parses "logger=LEVEL,logger=LEVEL" into a dict."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=logging.INFO, levels=None, stream=None, json_lines=False, handler=None):
+    """
+    Routes all logging through a background QueueListener writing to stream (default: stderr), or to handler.
+    Calling it again replaces the previous configuration. Returns the listener.
+    """
+    global listener
+    shutdown_logging()
+    if handler is None:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(StructuredFormatter(json_lines=json_lines))
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    # drop the synchronous handler logging.basicConfig() may have added
+    for existing in [h for h in root.handlers if type(h) is logging.StreamHandler]:
+        root.removeHandler(existing)
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level)
+    all_levels = parse_levels(os.environ.get("UPISAS_LOG_LEVELS", ""))
+    all_levels.update(levels or {})
+    for name, module_level in all_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def shutdown_logging():
+    """Writes out the queued records, stops the listener thread and detaches the queue from the root logger."""
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, _DeferredQueueHandler)]:
+        root.removeHandler(handler)
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,191 @@
+"""
+Batched QoS computation over monitor payloads, shared by the strategies and UPISAS.rates.
+
+The httpMetrics -> endpoint -> outcomeMetrics counters of all instances are flattened once per window into one
+NumPy table, a row per instance endpoint holding the latest and the baseline value of every counter. Rows of the
+same instance are contiguous, and instances of the same service too. Deltas, counter resets (counters that went
+backwards count from zero) and the per-instance, per-service and overall sums are then computed column-wise over
+that table, instead of walking the nested dicts and summing in Python once per instance.
+"""
+import numpy as np
+
+
+def endpoint_counters(endpoint_metrics, outcomes=None):
+    """(SUCCESS totalDuration, SUCCESS count, count summed over outcomes) of one endpoint."""
+    outcome_metrics = (endpoint_metrics or {}).get("outcomeMetrics") or {}
+    success = outcome_metrics.get("SUCCESS") or {}
+    if outcomes is None:
+        outcomes = outcome_metrics
+    total = 0
+    for outcome in outcomes:
+        total += (outcome_metrics.get(outcome) or {}).get("count", 0)
+    return success.get("totalDuration", 0), success.get("count", 0), total
+
+
+def qos_metrics(duration, successful, total):
+    """QoS metrics of the requests counted in a window."""
+    return {
+        "avg_response_time": duration / successful if successful > 0 else 0,
+        "availability": (successful / total) * 100 if total > 0 else 0,
+        "successful_requests": successful,
+        "total_requests": total,
+    }
+
+
+class QoSColumns:
+    """
+    Endpoint counters of a set of instances, flattened by add_instance() into the rows of one table.
+    Instance i owns the rows_per_instance[i] rows following those of the instances added before it.
+    """
+
+    def __init__(self):
+        self.instance_ids = []
+        self.service_ids = []
+        self.rows_per_instance = []
+        # per row: latest (duration, successful, total), then baseline (duration, successful, total)
+        self.values = []
+
+    def add_instance(self, service_id, instance_id, latest_snapshot, baseline_snapshot):
+        baseline_http_metrics = (baseline_snapshot or {}).get("httpMetrics") or {}
+        http_metrics = latest_snapshot.get("httpMetrics") or {}
+        values = self.values
+        # endpoint_counters() inlined, this runs for every instance endpoint of the payload
+        for endpoint, metrics in http_metrics.items():
+            outcome_metrics = (metrics or {}).get("outcomeMetrics") or {}
+            success = outcome_metrics.get("SUCCESS") or {}
+            total = 0
+            for counters in outcome_metrics.values():
+                total += (counters or {}).get("count", 0)
+            baseline_outcome_metrics = (baseline_http_metrics.get(endpoint) or {}).get("outcomeMetrics") or {}
+            baseline_success = baseline_outcome_metrics.get("SUCCESS") or {}
+            # the baseline total only counts the outcomes present in the latest snapshot
+            baseline_total = 0
+            for outcome in outcome_metrics:
+                baseline_total += (baseline_outcome_metrics.get(outcome) or {}).get("count", 0)
+            values.extend((success.get("totalDuration", 0), success.get("count", 0), total,
+                           baseline_success.get("totalDuration", 0), baseline_success.get("count", 0), baseline_total))
+        self.instance_ids.append(instance_id)
+        self.service_ids.append(service_id)
+        self.rows_per_instance.append(len(http_metrics))
+
+    def table(self):
+        """The rows as an array of shape (rows, 2, 3): [row, latest/baseline, duration/successful/total]."""
+        return np.array(self.values, dtype=np.float64).reshape(-1, 2, 3)
+
+
+class QoSReport:
+    """
+    Result of one QoS computation. instances maps instance id to its metrics, services maps service id
+    to the metrics of all its instances pooled together and overall pools every instance. Metrics are dicts with
+    avg_response_time (ms), availability (%), successful_requests and total_requests over the window;
+    instance metrics also hold the service id and the number of endpoints whose counters were reset in the window.
+    """
+
+    def __init__(self, instances, services, overall):
+        self.instances = instances
+        self.services = services
+        self.overall = overall
+
+    def instance_metrics(self, instance_id):
+        """(average response time, availability) of an instance, (0, 0) when it was not part of the computation."""
+        metrics = self.instances.get(instance_id)
+        if metrics is None:
+            return 0, 0
+        return metrics["avg_response_time"], metrics["availability"]
+
+
+def _segment_sums(values, counts):
+    """Sums of consecutive segments of values (along the first axis), counts[i] rows for segment i."""
+    counts = np.asarray(counts, dtype=np.int64)
+    sums = np.zeros((len(counts),) + values.shape[1:], dtype=values.dtype)
+    nonempty = counts > 0
+    if nonempty.any():
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums[nonempty] = np.add.reduceat(values, starts[nonempty], axis=0)
+    return sums
+
+
+def _metric_columns(sums):
+    """(avg response time, availability) columns of (duration, successful, total) sums."""
+    duration, successful, total = sums[:, 0], sums[:, 1], sums[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_response_time = np.where(successful > 0, duration / successful, 0.0)
+        availability = np.where(total > 0, successful / total * 100, 0.0)
+    return avg_response_time, availability
+
+
+def _metrics_rows(sums):
+    avg_response_time, availability = _metric_columns(sums)
+    return [{"avg_response_time": avg, "availability": available, "successful_requests": int(successful),
+             "total_requests": int(total)}
+            for avg, available, (_, successful, total)
+            in zip(avg_response_time.tolist(), availability.tolist(), sums.tolist())]
+
+
+def compute_qos(columns):
+    """Computes the QoSReport of flattened counters in one column-wise pass over their table."""
+    table = columns.table()
+    latest, baseline = table[:, 0], table[:, 1]
+    reset = (latest < baseline).any(axis=1)
+    delta = latest - np.where(reset[:, None], 0.0, baseline)
+
+    instance_sums = _segment_sums(delta, columns.rows_per_instance)
+    instance_resets = _segment_sums(reset.astype(np.int64), columns.rows_per_instance)
+    instances = {}
+    for instance_id, service_id, metrics, resets in zip(columns.instance_ids, columns.service_ids,
+                                                         _metrics_rows(instance_sums), instance_resets.tolist()):
+        metrics["service"] = service_id
+        metrics["reset_endpoints"] = resets
+        instances[instance_id] = metrics
+
+    # instances of a service were added one after the other
+    service_ids, instances_per_service = [], []
+    for service_id in columns.service_ids:
+        if service_ids and service_ids[-1] == service_id:
+            instances_per_service[-1] += 1
+        else:
+            service_ids.append(service_id)
+            instances_per_service.append(1)
+    service_sums = _segment_sums(instance_sums, instances_per_service)
+    services = dict(zip(service_ids, _metrics_rows(service_sums)))
+    overall = _metrics_rows(delta.sum(axis=0, keepdims=True))[0]
+    return QoSReport(instances, services, overall)
+
+
+def compute_qos_for_snapshots(snapshots, baselines, service_id=None, columns=None, require_baseline=False):
+    """
+    Adds the instance snapshots of one service to columns (new QoSColumns by default) and returns them.
+    baselines maps instance id to an earlier snapshot of that instance. Instances without a baseline are
+    compared against zero counters, or left out when require_baseline is set.
+    """
+    columns = QoSColumns() if columns is None else columns
+    for snapshot in snapshots or []:
+        instance_id = snapshot.get("instanceId")
+        if not instance_id:
+            continue
+        baseline = baselines.get(instance_id)
+        if baseline is None and require_baseline:
+            continue
+        columns.add_instance(service_id, instance_id, snapshot, baseline)
+    return columns
+
+
+def compute_qos_for_payload(monitor_data, baselines, require_baseline=False):
+    """
+    Computes the QoSReport of every instance in a /monitor payload against baselines, a dict mapping
+    instance id to an earlier snapshot of that instance, see compute_qos_for_snapshots().
+    """
+    columns = QoSColumns()
+    for service_id, service_data in monitor_data.items():
+        if isinstance(service_data, dict):
+            compute_qos_for_snapshots(service_data.get("snapshot"), baselines, service_id, columns, require_baseline)
+    return compute_qos(columns)
+
+
+def compute_metrics_window(latest_snapshot, oldest_snapshot):
+    """
+    Average response time and availability of one instance between oldest_snapshot and latest_snapshot.
+    """
+    columns = QoSColumns()
+    columns.add_instance(None, latest_snapshot.get("instanceId"), latest_snapshot, oldest_snapshot)
+    return compute_qos(columns).instance_metrics(latest_snapshot.get("instanceId"))
@@ -1,11 +1,29 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from typing import Optional, Dict, List
 
 from flask import Flask, Response, request
+from urllib3.util.retry import Retry
 
 import requests
 import os
 import json
+import threading
+import time
+import importlib.util
+
+
+def load_instrumentation():
+    """Loads UPISAS/instrumentation.py on its own, it only needs requests and not the UPISAS package."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "instrumentation.py")
+    spec = importlib.util.spec_from_file_location("ramses_interface_instrumentation", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+instrumentation = load_instrumentation()
 
 app = Flask(__name__)
 
@@ -14,14 +32,70 @@ adaption_option_file = "specifications/adaptation_options.json"
 adaption_schema_file = "specifications/adaptation_schema.json"
 
 #port 55010 is the port of sefa-probe
-SEFA_PROBE = 32838
+SEFA_PROBE = int(os.environ.get("RAMSES_PROBE_PORT", 32838))
 
 #port 55011 is the port of sefa-instances-manager
-SEFA_INSTANCE_MANAGER = 32839
+SEFA_INSTANCE_MANAGER = int(os.environ.get("RAMSES_INSTANCES_MANAGER_PORT", 32839))
 
 #port 55012 is the port of sefa-config-manager
 #SEFA_CONFIG_MANAGER = 55038
-SEFA_CONFIG_MANAGER = 32840
+SEFA_CONFIG_MANAGER = int(os.environ.get("RAMSES_CONFIG_MANAGER_PORT", 32840))
+
+# "concurrent" fans the per-service probe calls out over a bounded worker pool, "serial" keeps the old behaviour
+MONITOR_FANOUT = os.environ.get("RAMSES_MONITOR_FANOUT", "concurrent")
+# upper bound on the number of probe calls in flight at once
+PROBE_WORKERS = int(os.environ.get("RAMSES_PROBE_WORKERS", 16))
+# timeout (in seconds) of every single probe call
+PROBE_TIMEOUT = float(os.environ.get("RAMSES_PROBE_TIMEOUT", 5))
+
+probe_executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="sefa-probe")
+
+# upper bound on the number of independent actions of one /execute/batch request running at once
+EXECUTE_WORKERS = int(os.environ.get("RAMSES_EXECUTE_WORKERS", 8))
+
+execute_executor = ThreadPoolExecutor(max_workers=EXECUTE_WORKERS, thread_name_prefix="sefa-execute")
+
+# keep-alive connection pool per upstream host (probe, instances-manager, config-manager)
+HTTP_POOL_SIZE = int(os.environ.get("RAMSES_HTTP_POOL_SIZE", PROBE_WORKERS))
+# retries are only applied to idempotent (GET) requests, never to the execute POSTs
+HTTP_RETRIES = int(os.environ.get("RAMSES_HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(os.environ.get("RAMSES_HTTP_BACKOFF", 0.2))
+
+http_sessions = {}
+http_sessions_lock = threading.Lock()
+
+# how long (in seconds) a combined monitor payload is served from the cache, 0 only coalesces concurrent requests
+MONITOR_CACHE_TTL = float(os.environ.get("RAMSES_MONITOR_CACHE_TTL", 1))
+# number of past monitor payloads kept to answer /monitor/delta, older cursors get a full payload
+MONITOR_DELTA_RETENTION = int(os.environ.get("RAMSES_MONITOR_DELTA_RETENTION", 32))
+# how often (in seconds) the probe is refreshed while clients are subscribed to /monitor/stream
+MONITOR_STREAM_INTERVAL = float(os.environ.get("RAMSES_MONITOR_STREAM_INTERVAL", 2))
+# a comment line is sent on idle streams every this many seconds so proxies and clients keep the connection
+MONITOR_STREAM_HEARTBEAT = float(os.environ.get("RAMSES_MONITOR_STREAM_HEARTBEAT", 15))
+# schema files are parsed once and only re-read when their modification time changed,
+# which is checked at most once per this many seconds
+SCHEMA_CHECK_INTERVAL = float(os.environ.get("RAMSES_SCHEMA_CHECK_INTERVAL", 2))
+# with RAMSES_METRICS=1 every upstream call is timed and counted, and the metrics are served on /metrics
+if os.environ.get("RAMSES_METRICS", "0") == "1":
+    instrumentation.enable()
+
+schema_cache = {}
+schema_cache_lock = threading.Lock()
+
+
+def get_session(port):
+    """Returns the shared keep-alive session towards localhost:port, creating it on first use."""
+    with http_sessions_lock:
+        session = http_sessions.get(port)
+        if session is None:
+            retry = Retry(total=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF, status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset({"GET"}), raise_on_status=False)
+            adapter = instrumentation.InstrumentedAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE,
+                                                          max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            http_sessions[port] = session
+        return session
 
 
 @dataclass
@@ -40,37 +114,339 @@ class UnifiedRequest:
     port: Optional[int] = None
 
 
+class MonitorCache:
+    """
+    Holds the combined monitor payload for a TTL. Requests arriving while a refresh is in flight
+    wait for that single upstream fetch instead of starting their own probe crawl.
+    A fetch that was in flight when invalidate() was called is returned to its caller but never cached.
+    A fetch that fails or comes back empty (the architecture could not be fetched) is never cached either:
+    the last good payload is served instead, flagged as stale.
+    """
+
+    def __init__(self, fetch, ttl):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.data = None
+        self.body = None
+        self.fetched_at = None
+        self.last_good = None  # (data, body, fetched_at) of the last non-empty payload, kept across invalidate()
+        self.failed = False  # whether the last refresh failed or came back empty
+        self.generation = 0
+        self.invalidations = 0
+        self.refreshing = False
+        self.condition = threading.Condition()
+
+    def get(self):
+        """Returns (data, serialized body, age in seconds, hit, stale)."""
+        with self.condition:
+            while True:
+                if self.data is not None and time.monotonic() - self.fetched_at < self.ttl:
+                    return self.data, self.body, time.monotonic() - self.fetched_at, True, False
+                if not self.refreshing:
+                    self.refreshing = True
+                    invalidations = self.invalidations
+                    break
+                generation = self.generation
+                self.condition.wait()
+                if self.generation != generation:
+                    # piggyback on the refresh that just completed, unless it was invalidated meanwhile
+                    if self.data is not None:
+                        return self.data, self.body, time.monotonic() - self.fetched_at, True, False
+                    if self.failed and self.last_good is not None:
+                        return self._stale()
+        error = None
+        try:
+            data = self.fetch()
+            body = json.dumps(data)
+        except Exception as e:
+            data, body, error = None, None, e
+        with self.condition:
+            self.generation += 1
+            self.refreshing = False
+            self.failed = not data
+            self.condition.notify_all()
+            if not data:
+                if self.last_good is not None:
+                    return self._stale()
+                if error is not None:
+                    raise error
+                return data, body, 0.0, False, False
+            self.last_good = (data, body, time.monotonic())
+            if self.invalidations == invalidations:
+                self.data, self.body, self.fetched_at = self.last_good
+            return data, body, 0.0, False, False
+
+    def _stale(self):
+        data, body, fetched_at = self.last_good
+        return data, body, time.monotonic() - fetched_at, False, True
+
+    def invalidate(self):
+        with self.condition:
+            self.data = None
+            self.invalidations += 1
+
+
+class MonitorVersionLog:
+    """
+    Numbers every distinct monitor payload and keeps the last few of them, so that a client holding
+    the cursor of an older payload can be sent only what changed since then.
+    Cursors look like "<epoch>:<version>" so that they are never reused across Interface restarts.
+    """
+
+    def __init__(self, retention):
+        self.retention = retention
+        self.epoch = str(int(time.time() * 1000))
+        self.version = 0
+        self.payloads = OrderedDict()
+        self.changed = threading.Condition()
+
+    def cursor(self, version):
+        return f"{self.epoch}:{version}"
+
+    def record(self, data):
+        with self.changed:
+            if self.payloads and self.payloads[self.version] == data:
+                return self.version
+            self.version += 1
+            self.payloads[self.version] = data
+            while len(self.payloads) > self.retention:
+                self.payloads.popitem(last=False)
+            self.changed.notify_all()
+            return self.version
+
+    def wait_for_change(self, since, timeout):
+        """Blocks until a payload newer than the cursor since is recorded, returns False on timeout."""
+        with self.changed:
+            return self.changed.wait_for(lambda: self.cursor(self.version) != since and self.version > 0, timeout)
+
+    def delta_since(self, since):
+        with self.changed:
+            latest = self.payloads.get(self.version, {})
+            cursor = self.cursor(self.version)
+            base = None
+            if since:
+                epoch, _, version = since.partition(":")
+                if epoch == self.epoch and version.isdigit():
+                    base = self.payloads.get(int(version))
+        if base is None:
+            return {"version": cursor, "full": True, "services": latest}
+        delta = diff_monitor_payload(base, latest)
+        delta.update({"version": cursor, "full": False})
+        return delta
+
+
+def diff_fields(old, new):
+    """Top-level keys of new whose value differs from old, and keys of old that are gone in new."""
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    unset = [key for key in old if key not in new]
+    return changed, unset
+
+
+def diff_snapshots(old_snapshots, new_snapshots):
+    """Per-instance diff of two snapshot lists, or None if they cannot be matched by instanceId."""
+    if not isinstance(old_snapshots, list) or not isinstance(new_snapshots, list):
+        return None
+    old_by_id = {snapshot.get("instanceId"): snapshot for snapshot in old_snapshots}
+    new_by_id = {snapshot.get("instanceId"): snapshot for snapshot in new_snapshots}
+    if None in old_by_id or None in new_by_id:
+        return None
+    delta = {"added": {}, "changed": {}, "removed": [i for i in old_by_id if i not in new_by_id]}
+    for instance_id, snapshot in new_by_id.items():
+        if instance_id not in old_by_id:
+            delta["added"][instance_id] = snapshot
+        elif old_by_id[instance_id] != snapshot:
+            changed, unset = diff_fields(old_by_id[instance_id], snapshot)
+            delta["changed"][instance_id] = {"set": changed, "unset": unset}
+    return delta
+
+
+def diff_monitor_payload(old, new):
+    """
+    Computes the services, fields and instance snapshots of new that differ from old.
+    Unchanged services and unchanged instances are left out entirely.
+    """
+    delta = {"added": {}, "changed": {}, "removed": [name for name in old if name not in new]}
+    for service_name, service in new.items():
+        old_service = old.get(service_name)
+        if old_service is None:
+            delta["added"][service_name] = service
+            continue
+        if old_service == service:
+            continue
+        changed, unset = diff_fields(old_service, service)
+        service_delta = {"set": changed, "unset": unset}
+        if "snapshot" in changed:
+            snapshot_delta = diff_snapshots(old_service.get("snapshot"), service.get("snapshot"))
+            if snapshot_delta is not None:
+                del changed["snapshot"]
+                service_delta["snapshot"] = snapshot_delta
+        delta["changed"][service_name] = service_delta
+    return delta
+
+
+monitor_versions = MonitorVersionLog(MONITOR_DELTA_RETENTION)
+
+
+def refresh_monitor_data():
+    data = collect_monitor_data()
+    if data:
+        # an empty payload is a failed fetch, recording it would make the next delta remove and re-add every service
+        monitor_versions.record(data)
+    return data
+
+
+monitor_cache = MonitorCache(refresh_monitor_data, MONITOR_CACHE_TTL)
+
+
+class MonitorStreamPoller:
+    """
+    Refreshes the monitor payload every MONITOR_STREAM_INTERVAL seconds, but only while at least
+    one client is subscribed to /monitor/stream. New payloads reach the subscribers through monitor_versions.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.subscribers = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self):
+        with self.lock:
+            self.subscribers += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._poll, name="monitor-stream-poller", daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self):
+        with self.lock:
+            self.subscribers -= 1
+
+    def _poll(self):
+        while True:
+            with self.lock:
+                if self.subscribers <= 0:
+                    self.thread = None
+                    return
+            try:
+                monitor_cache.get()
+            except Exception as e:
+                print(f"monitor stream refresh failed: {e}")
+            time.sleep(self.interval)
+
+
+monitor_stream_poller = MonitorStreamPoller(MONITOR_STREAM_INTERVAL)
+
+
+def format_event(cursor, data):
+    return f"id: {cursor}\nevent: monitor\ndata: {json.dumps(data)}\n\n"
+
+
+def cache_headers(age, hit, stale=False):
+    return {'X-Cache': 'STALE' if stale else 'HIT' if hit else 'MISS', 'X-Cache-Age': f"{age:.3f}"}
+
+
 @app.route('/monitor', methods=['GET'])
 def monitor():
-    services = fetch_system_architecture()
-    combined_data = {}
-    if services:
-        for service_name, details in services.items():
-            service_id = details['serviceId']
-            implementation_id = details['currentImplementationId']
-            instances = details['instances']
-            snapshot_config = fetch_service_snapshot(service_name)
-            instance_config = fetch_instance_configuration(service_name, implementation_id)
-            combined_data[service_name] = {
-                'serviceId': service_id,
-                'currentImplementationId': implementation_id,
-                'instances': instances,
-                'snapshot': snapshot_config,
-                'instanceConfig': instance_config
-            }
+    _, body, age, hit, stale = monitor_cache.get()
     return Response(
-        response=json.dumps(combined_data),
+        response=body,
         status=200,
-        mimetype='application/json'
+        mimetype='application/json',
+        headers=cache_headers(age, hit, stale)
+    )
+
+
+@app.route('/monitor/delta', methods=['GET'])
+def monitor_delta():
+    _, _, age, hit, stale = monitor_cache.get()
+    delta = monitor_versions.delta_since(request.args.get('since'))
+    return Response(
+        response=json.dumps(delta),
+        status=200,
+        mimetype='application/json',
+        headers=cache_headers(age, hit, stale)
     )
 
 
+@app.route('/monitor/stream', methods=['GET'])
+def monitor_stream():
+    """
+    Server-Sent Events feed of the monitor payload. The first event carries the changes since the
+    client's Last-Event-ID (a full payload if it has none), every following event the changes since the previous one.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+
+    def events(cursor):
+        monitor_stream_poller.subscribe()
+        try:
+            while True:
+                if monitor_versions.wait_for_change(cursor, MONITOR_STREAM_HEARTBEAT):
+                    delta = monitor_versions.delta_since(cursor)
+                    cursor = delta["version"]
+                    yield format_event(cursor, delta)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            monitor_stream_poller.unsubscribe()
+
+    return Response(events(since), status=200, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def collect_monitor_data():
+    services = fetch_system_architecture()
+    if not services:
+        return {}
+    if MONITOR_FANOUT == "serial":
+        probe_results = {service_name: (fetch_service_snapshot(service_name),
+                                        fetch_instance_configuration(service_name, details['currentImplementationId']))
+                         for service_name, details in services.items()}
+    else:
+        probe_results = fetch_service_details_concurrently(services)
+    combined_data = {}
+    for service_name, details in services.items():
+        snapshot_config, instance_config = probe_results[service_name]
+        combined_data[service_name] = {
+            'serviceId': details['serviceId'],
+            'currentImplementationId': details['currentImplementationId'],
+            'instances': details['instances'],
+            'snapshot': snapshot_config,
+            'instanceConfig': instance_config
+        }
+    return combined_data
+
+
+def fetch_service_details_concurrently(services):
+    """
+    Fetches the snapshot and the instance configuration of every service in parallel, at most PROBE_WORKERS at once.
+    Calls that fail or time out (every request has its own PROBE_TIMEOUT) yield None, so the services that answered
+    are still returned.
+    """
+    futures = {}
+    for service_name, details in services.items():
+        futures[(service_name, 'snapshot')] = probe_executor.submit(fetch_service_snapshot, service_name)
+        futures[(service_name, 'instanceConfig')] = probe_executor.submit(
+            fetch_instance_configuration, service_name, details['currentImplementationId'])
+    # no global deadline: with more calls than workers the queued calls only start once earlier ones finished
+    wait(futures.values())
+
+    def result_of(key):
+        try:
+            return futures[key].result()
+        except Exception as e:
+            print(f"probe call {key} failed: {e}")
+            return None
+
+    return {service_name: (result_of((service_name, 'snapshot')), result_of((service_name, 'instanceConfig')))
+            for service_name in services}
+
+
 @app.route('/monitor_schema', methods=['GET'])
 def monitor_schema():
     try:
-        data = get_schema(monitor_schema_file)
+        body = get_schema_body(monitor_schema_file)
         return Response(
-            response=json.dumps(data),
+            response=body,
             status=200,
             mimetype='application/json'
         )
@@ -86,9 +462,9 @@ def monitor_schema():
 @app.route('/adaptation_options', methods=['GET'])
 def adaptation_options():
     try:
-        data = get_schema(adaption_option_file)
+        body = get_schema_body(adaption_option_file)
         return Response(
-            response=json.dumps(data),
+            response=body,
             status=200,
             mimetype='application/json'
         )
@@ -105,9 +481,9 @@ def adaptation_options():
 def adaptation_options_schema():
 
     try:
-        data = get_schema(adaption_schema_file)
+        body = get_schema_body(adaption_schema_file)
         return Response(
-            response=json.dumps(data),
+            response=body,
             status=200,
             mimetype='application/json'
         )
@@ -120,115 +496,197 @@ def adaptation_options_schema():
         )
 
 
-@app.route('/execute', methods=['POST'])
-def execute():
+class InvalidExecuteRequest(ValueError):
+    pass
+
+
+def upstream_call_for(req):
+    """
+    Translates a UnifiedRequest into the upstream call that performs it.
+    Returns (port, path, request_body), or (None, None, response) for operations answered by the Interface itself.
+    Raises InvalidExecuteRequest when required fields are missing or the operation is unknown.
+    """
+    if req.operation == "addInstances":
+        if not req.serviceImplementationName or not req.numberOfInstances:
+            raise InvalidExecuteRequest("Missing required fields for addInstances")
+        request_body = {
+            "serviceImplementationName": req.serviceImplementationName,
+            "numberOfInstances": req.numberOfInstances
+        }
+        return SEFA_INSTANCE_MANAGER, "/rest/addInstances", request_body
+
+    elif req.operation == "changeLBWeights":
+        if not req.weights:
+            raise InvalidExecuteRequest("Missing weights for changeLBWeights")
+        request_body = {
+            "serviceID": req.weightsId,
+            "newWeights": req.weights,
+            "instancesToRemoveWeightOf": req.instancesToRemoveWeightOf
+        }
+        return SEFA_CONFIG_MANAGER, "/rest/changeLBWeights", request_body
+
+    elif req.operation == "changeProperty":
+        if not req.propertiesToChange:
+            raise InvalidExecuteRequest("Missing properties for changeProperty")
+        response = {
+            "message": "Properties updated successfully",
+            "updatedProperties": req.propertiesToChange
+        }
+        return None, None, response
+
+    elif req.operation == "removeInstance":
+        if not req.serviceImplementationName or not req.address or req.port is None:
+            raise InvalidExecuteRequest("Missing required fields for removeInstance")
+        request_body = {
+            "serviceImplementationName": req.serviceImplementationName,
+            "address": req.address,
+            "port": req.port
+        }
+        return SEFA_INSTANCE_MANAGER, "/rest/removeInstance", request_body
+
+    raise InvalidExecuteRequest("Invalid operation")
+
+
+def perform_execute(data):
+    """Performs a single UnifiedRequest given as a dict, returning (HTTP status, response body)."""
     try:
-        data = request.get_json()
         req = UnifiedRequest(**data)
 
-        if req.operation == "addInstances":
-            if not req.serviceImplementationName or not req.numberOfInstances:
-                return Response(
-                    response=json.dumps({"error": "Missing required fields for addInstances"}),
-                    status=400,
-                    mimetype='application/json'
-                )
-            url = f"http://localhost:{SEFA_INSTANCE_MANAGER}/rest/addInstances"
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            request_body = {
-                "serviceImplementationName": req.serviceImplementationName,
-                "numberOfInstances": req.numberOfInstances
-            }
-            response = requests.post(url, headers=headers, data=json.dumps(request_body)).json()
-
-        elif req.operation == "changeLBWeights":
-            if not req.weights:
-                return Response(
-                    response=json.dumps({"error": "Missing weights for changeLBWeights"}),
-                    status=400,
-                    mimetype='application/json'
-                )
-            url = f"http://localhost:{SEFA_CONFIG_MANAGER}/rest/changeLBWeights"
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            request_body = {
-                "serviceID": req.weightsId,
-                "newWeights": req.weights,
-                "instancesToRemoveWeightOf": req.instancesToRemoveWeightOf
-            }
-            response = requests.post(url, headers=headers, data=json.dumps(request_body)).json()
-
-        elif req.operation == "changeProperty":
-            if not req.propertiesToChange:
-                return Response(
-                    response=json.dumps({"error": "Missing properties for changeProperty"}),
-                    status=400,
-                    mimetype='application/json'
-                )
-            URL = f"http://localhost:{SEFA_CONFIG_MANAGER}/rest/changeProperty"
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            request_body = {
-                "serviceName": req.serviceName,
-                "propertyName" : req.propertiesName,
-                "value": req.propertiesToChange
-            }
-            response = {
-                "message": "Properties updated successfully",
-                "updatedProperties": req.propertiesToChange
-            }
-
-        elif req.operation == "removeInstance":
-
-            if not req.serviceImplementationName or not req.address or req.port is None:
-                return Response(
-                    response=json.dumps({"error": "Missing required fields for removeInstance"}),
-                    status=400,
-                    mimetype='application/json'
-                )
-            url = f"http://localhost:{SEFA_INSTANCE_MANAGER}/rest/removeInstance"
+        try:
+            port, path, request_body = upstream_call_for(req)
+        except InvalidExecuteRequest as e:
+            return 400, {"error": str(e)}
+        if port is None:
+            response = request_body
+        else:
+            url = f"http://localhost:{port}{path}"
             headers = {
                 'Content-Type': 'application/json'
             }
-            request_body = {
-                "serviceImplementationName": req.serviceImplementationName,
-                "address": req.address,
-                "port": req.port
-            }
+            response = get_session(port).post(url, headers=headers, data=json.dumps(request_body)).json()
+        return 200, response
 
-            response = requests.post(url, headers=headers, data=json.dumps(request_body)).json()
+    except Exception as e:
+        return 500, {"error": str(e)}
+
+
+# operations that change the set of instances of a service
+TOPOLOGY_OPERATIONS = ("addInstances", "removeInstance")
+
+
+def conflicts(earlier, later):
+    """
+    Whether two actions write the same target and must keep their order: instance changes of the same service
+    implementation (removals of different instances excepted), load balancer changes of the same weightsId, and
+    any instance change with any load balancer change, as weightsId names the service and not its implementation.
+    """
+    if not isinstance(earlier, dict) or not isinstance(later, dict):
+        return False
+    operations = {earlier.get("operation"), later.get("operation")}
+    if operations == {"changeLBWeights"}:
+        return earlier.get("weightsId") == later.get("weightsId")
+    if "changeLBWeights" in operations:
+        return bool(operations.intersection(TOPOLOGY_OPERATIONS))
+    if not operations.issubset(TOPOLOGY_OPERATIONS):
+        return False
+    if str(earlier.get("serviceImplementationName")).lower() != str(later.get("serviceImplementationName")).lower():
+        return False
+    if operations == {"removeInstance"}:
+        return (earlier.get("address"), str(earlier.get("port"))) == (later.get("address"), str(later.get("port")))
+    return True
+
+
+def batch_stages(actions):
+    """
+    Splits an ordered list of actions into stages of indices. Actions within a stage are independent and may run
+    concurrently, stages run one after the other. Every action is put in the stage right after the last earlier
+    action it conflicts with (see conflicts), so conflicting writes run in request order.
+    """
+    stages = []
+    stage_of = []
+    for index, action in enumerate(actions):
+        stage = 1 + max((stage_of[earlier] for earlier in range(index) if conflicts(actions[earlier], action)),
+                        default=-1)
+        if stage == len(stages):
+            stages.append([])
+        stages[stage].append(index)
+        stage_of.append(stage)
+    return stages
+
+
+def batch_result(index, action, status, body):
+    result = {"index": index, "operation": action.get("operation") if isinstance(action, dict) else None,
+              "status": status}
+    if status == 200:
+        result["response"] = body
+    else:
+        result["error"] = body.get("error")
+    return result
+
+
+def batch_actions_of(data):
+    """Accepts either a JSON list of actions or an object with an "actions" list."""
+    actions = data.get("actions") if isinstance(data, dict) else data
+    if not isinstance(actions, list):
+        raise InvalidExecuteRequest("Expected a list of actions")
+    return actions
 
-        else:
-            return Response(
-                response=json.dumps({"error": "Invalid operation"}),
-                status=400,
-                mimetype='application/json'
-            )
 
+@app.route('/execute', methods=['POST'])
+def execute():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
         return Response(
-            response=json.dumps(response),
-            status=200,
+            response=json.dumps({"error": "Expected a JSON object"}),
+            status=400,
             mimetype='application/json'
         )
+    status, body = perform_execute(data)
+    if status == 200:
+        # the adaptation changes the topology, the next monitor call must not see the old payload
+        monitor_cache.invalidate()
+    return Response(
+        response=json.dumps(body),
+        status=status,
+        mimetype='application/json'
+    )
 
-    except Exception as e:
+
+@app.route('/execute/batch', methods=['POST'])
+def execute_batch():
+    """
+    Performs an ordered list of UnifiedRequests in one round trip. Independent actions run concurrently,
+    dependent ones in order (see batch_stages). The response lists the result of every action in request order.
+    """
+    try:
+        actions = batch_actions_of(request.get_json(silent=True))
+    except InvalidExecuteRequest as e:
         return Response(
             response=json.dumps({"error": str(e)}),
-            status=500,
+            status=400,
             mimetype='application/json'
         )
+    results = [None] * len(actions)
+    for stage in batch_stages(actions):
+        futures = {index: execute_executor.submit(perform_execute, actions[index]) for index in stage}
+        for index, future in futures.items():
+            status, body = future.result()
+            results[index] = batch_result(index, actions[index], status, body)
+    if any(result["status"] == 200 for result in results):
+        monitor_cache.invalidate()
+    return Response(
+        response=json.dumps({"results": results}),
+        status=200,
+        mimetype='application/json'
+    )
 
 
 @app.route('/execute_schema', methods=['GET'])
 def execute_schema():
     try:
-        data = get_schema(adaption_schema_file)
+        body = get_schema_body(adaption_schema_file)
         return Response(
-            response=json.dumps(data),
+            response=body,
             status=200,
             mimetype='application/json'
         )
@@ -241,11 +699,24 @@ def execute_schema():
         )
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    status, body, content_type = metrics_response()
+    return Response(response=body, status=status, mimetype=content_type)
+
+
+def metrics_response():
+    """Returns (HTTP status, body, content type) of /metrics."""
+    if not instrumentation.enabled:
+        return 404, json.dumps({"error": "Metrics are disabled, set RAMSES_METRICS=1"}), 'application/json'
+    return 200, instrumentation.prometheus_text(instrumentation.registry.snapshot()), 'text/plain; version=0.0.4'
+
+
 def fetch_system_architecture():
     url = f"http://localhost:{SEFA_PROBE}/rest/systemArchitecture"
 
     try:
-        response = requests.get(url)
+        response = get_session(SEFA_PROBE).get(url, timeout=PROBE_TIMEOUT)
         response.raise_for_status()
         print("data fetched")
         architecture_data = response.json()
@@ -259,7 +730,7 @@ def fetch_instance_configuration(serviceName, implementationId):
     url = "http://localhost:{}/rest/service/{}/configuration?implementationId={}".format(SEFA_PROBE,serviceName,
                                                                                             implementationId)
     try:
-        response = requests.get(url)
+        response = get_session(SEFA_PROBE).get(url, timeout=PROBE_TIMEOUT)
         response.raise_for_status()
         print("instance configuration data fetched")
         instance_configuration = response.json()
@@ -272,7 +743,7 @@ def fetch_instance_configuration(serviceName, implementationId):
 def fetch_service_snapshot(serviceName):
     url = "http://localhost:{}/rest/service/{}/snapshot".format(SEFA_PROBE, serviceName)
     try:
-        response = requests.get(url)
+        response = get_session(SEFA_PROBE).get(url, timeout=PROBE_TIMEOUT)
         response.raise_for_status()
         print("snapshot data fetched")
         snapshot_data = response.json()
@@ -282,14 +753,42 @@ def fetch_service_snapshot(serviceName):
         return None
 
 
-def get_schema(file):
+def load_schema(file):
+    """
+    Returns (schema, serialized schema) of file from the cache, re-reading the file only when
+    its modification time changed. A missing file yields (None, "null").
+    """
+    now = time.monotonic()
+    with schema_cache_lock:
+        entry = schema_cache.get(file)
+        if entry is not None and now - entry["checked_at"] < SCHEMA_CHECK_INTERVAL:
+            return entry["schema"], entry["body"]
     try:
-        with open(file, "r") as schema_file:
-            schema = json.load(schema_file)
-            return schema
+        mtime = os.stat(file).st_mtime_ns
     except FileNotFoundError as e:
         print(e)
-        return None
+        mtime = None
+    if entry is None or entry["mtime"] != mtime:
+        schema = None
+        if mtime is not None:
+            try:
+                with open(file, "r") as schema_file:
+                    schema = json.load(schema_file)
+            except FileNotFoundError as e:
+                print(e)
+        entry = {"mtime": mtime, "schema": schema, "body": json.dumps(schema)}
+    entry["checked_at"] = now
+    with schema_cache_lock:
+        schema_cache[file] = entry
+    return entry["schema"], entry["body"]
+
+
+def get_schema(file):
+    return load_schema(file)[0]
+
+
+def get_schema_body(file):
+    return load_schema(file)[1]
 
 
 if __name__ == '__main__':
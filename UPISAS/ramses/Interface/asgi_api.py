@@ -0,0 +1,315 @@
+"""
+ASGI variant of the RAMSES Interface (api.py) with the same routes, served by uvicorn.
+Upstream calls go through pooled httpx.AsyncClient instances, so a slow probe never blocks other requests.
+
+Run it with `python asgi_api.py --workers 4` from this directory. Every worker process keeps its own
+monitor cache and version log, so /monitor/delta cursors are only valid against the worker that issued them
+unless a single worker is used.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from api import (instrumentation, UnifiedRequest, InvalidExecuteRequest, MonitorVersionLog, upstream_call_for, get_schema,
+                 format_event, cache_headers, batch_stages, batch_result, batch_actions_of, metrics_response,
+                 monitor_schema_file, adaption_option_file, adaption_schema_file,
+                 SEFA_PROBE, PROBE_WORKERS, PROBE_TIMEOUT, HTTP_POOL_SIZE, HTTP_RETRIES, MONITOR_CACHE_TTL,
+                 MONITOR_DELTA_RETENTION, MONITOR_STREAM_INTERVAL, MONITOR_STREAM_HEARTBEAT, EXECUTE_WORKERS)
+
+# number of uvicorn worker processes
+INTERFACE_WORKERS = int(os.environ.get("RAMSES_INTERFACE_WORKERS", 1))
+
+http_clients = {}
+
+
+def get_client(port):
+    """Returns the shared keep-alive async client towards localhost:port, creating it on first use."""
+    client = http_clients.get(port)
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=f"http://localhost:{port}",
+            timeout=PROBE_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES))
+        http_clients[port] = client
+    return client
+
+
+async def fetch_json(path):
+    """GETs path from the sefa-probe, returning None when the call fails like the fetch_* functions of api.py."""
+    try:
+        with instrumentation.timed("http_client_request_ms", method="GET", path=path.split("?")[0]):
+            response = await get_client(SEFA_PROBE).get(path)
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        print(e)
+        return None
+
+
+async def collect_monitor_data():
+    services = await fetch_json("/rest/systemArchitecture")
+    if not services:
+        return {}
+    semaphore = asyncio.Semaphore(PROBE_WORKERS)
+
+    async def bounded(path):
+        async with semaphore:
+            return await fetch_json(path)
+
+    names = list(services)
+    results = await asyncio.gather(
+        *(bounded(f"/rest/service/{name}/snapshot") for name in names),
+        *(bounded(f"/rest/service/{name}/configuration?implementationId={services[name]['currentImplementationId']}")
+          for name in names))
+    combined_data = {}
+    for index, service_name in enumerate(names):
+        details = services[service_name]
+        combined_data[service_name] = {
+            'serviceId': details['serviceId'],
+            'currentImplementationId': details['currentImplementationId'],
+            'instances': details['instances'],
+            'snapshot': results[index],
+            'instanceConfig': results[len(names) + index]
+        }
+    return combined_data
+
+
+class AsyncMonitorCache:
+    """
+    asyncio counterpart of api.MonitorCache: the payload is kept for a TTL, concurrent
+    requests during a refresh await the same upstream fetch, and failed or empty fetches serve the last good payload.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.data = None
+        self.body = None
+        self.fetched_at = None
+        self.last_good = None  # (data, body, fetched_at) of the last non-empty payload, kept across invalidate()
+        self.refresh = None
+        self.invalidations = 0
+        self.changed = asyncio.Condition()
+
+    async def get(self):
+        """Returns (data, serialized body, age in seconds, hit, stale)."""
+        if self.data is not None and time.monotonic() - self.fetched_at < self.ttl:
+            return self.data, self.body, time.monotonic() - self.fetched_at, True, False
+        if self.refresh is not None:
+            _, _, stale = await asyncio.shield(self.refresh)
+            if stale:
+                return self._stale()
+            if self.data is not None:
+                return self.data, self.body, time.monotonic() - self.fetched_at, True, False
+            # invalidated while the refresh was in flight
+            return await self.get()
+        self.refresh = asyncio.ensure_future(self._fetch())
+        data, body, stale = await asyncio.shield(self.refresh)
+        if stale:
+            return self._stale()
+        return data, body, 0.0, False, False
+
+    def _stale(self):
+        data, body, fetched_at = self.last_good
+        return data, body, time.monotonic() - fetched_at, False, True
+
+    async def _fetch(self):
+        """Returns (data, body, stale); stale when the fetch failed or came back empty and the last good payload stands in."""
+        invalidations = self.invalidations
+        try:
+            data = await collect_monitor_data()
+        except Exception:
+            if self.last_good is None:
+                raise
+            data = None
+        finally:
+            self.refresh = None
+        if not data:
+            # neither cached nor recorded, the next delta would remove and re-add every service
+            if self.last_good is not None:
+                return None, None, True
+            return data, json.dumps(data), False
+        body = json.dumps(data)
+        self.last_good = (data, body, time.monotonic())
+        if self.invalidations == invalidations:
+            # a fetch that was in flight during invalidate() is returned but not cached
+            self.data, self.body, self.fetched_at = self.last_good
+        version = monitor_versions.version
+        if monitor_versions.record(data) != version:
+            async with self.changed:
+                self.changed.notify_all()
+        return data, body, False
+
+    def invalidate(self):
+        self.data = None
+        self.invalidations += 1
+
+
+monitor_versions = MonitorVersionLog(MONITOR_DELTA_RETENTION)
+monitor_cache = AsyncMonitorCache(MONITOR_CACHE_TTL)
+stream_subscribers = 0
+stream_poller = None
+
+
+def json_response(data, status=200, headers=None):
+    return Response(json.dumps(data), status_code=status, media_type='application/json', headers=headers)
+
+
+async def monitor(request: Request):
+    _, body, age, hit, stale = await monitor_cache.get()
+    return Response(body, media_type='application/json', headers=cache_headers(age, hit, stale))
+
+
+async def monitor_delta(request: Request):
+    _, _, age, hit, stale = await monitor_cache.get()
+    return json_response(monitor_versions.delta_since(request.query_params.get('since')),
+                         headers=cache_headers(age, hit, stale))
+
+
+async def poll_while_subscribed():
+    global stream_poller
+    while stream_subscribers > 0:
+        try:
+            await monitor_cache.get()
+        except Exception as e:
+            print(f"monitor stream refresh failed: {e}")
+        await asyncio.sleep(MONITOR_STREAM_INTERVAL)
+    stream_poller = None
+
+
+async def monitor_stream(request: Request):
+    since = request.headers.get('Last-Event-ID') or request.query_params.get('since')
+
+    async def events(cursor):
+        global stream_subscribers, stream_poller
+        stream_subscribers += 1
+        if stream_poller is None:
+            stream_poller = asyncio.ensure_future(poll_while_subscribed())
+        try:
+            while True:
+                async with monitor_cache.changed:
+                    try:
+                        await asyncio.wait_for(monitor_cache.changed.wait_for(
+                            lambda: monitor_versions.version > 0 and monitor_versions.cursor(monitor_versions.version) != cursor),
+                            MONITOR_STREAM_HEARTBEAT)
+                        changed = True
+                    except asyncio.TimeoutError:
+                        changed = False
+                if not changed:
+                    yield ": keep-alive\n\n"
+                    continue
+                delta = monitor_versions.delta_since(cursor)
+                cursor = delta["version"]
+                yield format_event(cursor, delta)
+        finally:
+            stream_subscribers -= 1
+
+    return StreamingResponse(events(since), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def schema_route(file):
+    async def endpoint(request: Request):
+        data = get_schema(file)
+        if data is None:
+            return json_response({"error": "Schema file not found"}, status=404)
+        return json_response(data)
+    return endpoint
+
+
+async def perform_execute(data):
+    """asyncio counterpart of api.perform_execute, returning (HTTP status, response body)."""
+    try:
+        req = UnifiedRequest(**data)
+        try:
+            port, path, request_body = upstream_call_for(req)
+        except InvalidExecuteRequest as e:
+            return 400, {"error": str(e)}
+        if port is None:
+            return 200, request_body
+        with instrumentation.timed("http_client_request_ms", method="POST", path=path):
+            response = await get_client(port).post(path, json=request_body, timeout=None)
+        return 200, response.json()
+    except Exception as e:
+        return 500, {"error": str(e)}
+
+
+async def execute(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return json_response({"error": "Expected a JSON object"}, status=400)
+    status, body = await perform_execute(data)
+    if status == 200:
+        monitor_cache.invalidate()
+    return json_response(body, status=status)
+
+
+async def execute_batch(request: Request):
+    try:
+        actions = batch_actions_of(await request.json())
+    except (InvalidExecuteRequest, ValueError) as e:
+        return json_response({"error": str(e)}, status=400)
+    semaphore = asyncio.Semaphore(EXECUTE_WORKERS)
+
+    async def bounded(data):
+        async with semaphore:
+            return await perform_execute(data)
+
+    results = [None] * len(actions)
+    for stage in batch_stages(actions):
+        outcomes = await asyncio.gather(*(bounded(actions[index]) for index in stage))
+        for index, (status, body) in zip(stage, outcomes):
+            results[index] = batch_result(index, actions[index], status, body)
+    if any(result["status"] == 200 for result in results):
+        monitor_cache.invalidate()
+    return json_response({"results": results})
+
+
+async def metrics(request: Request):
+    status, body, content_type = metrics_response()
+    return Response(body, status_code=status, media_type=content_type)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    for client in http_clients.values():
+        await client.aclose()
+    http_clients.clear()
+
+
+app = Starlette(routes=[
+    Route('/monitor', monitor, methods=['GET']),
+    Route('/monitor/delta', monitor_delta, methods=['GET']),
+    Route('/monitor/stream', monitor_stream, methods=['GET']),
+    Route('/monitor_schema', schema_route(monitor_schema_file), methods=['GET']),
+    Route('/adaptation_options', schema_route(adaption_option_file), methods=['GET']),
+    Route('/adaptation_options_schema', schema_route(adaption_schema_file), methods=['GET']),
+    Route('/execute', execute, methods=['POST']),
+    Route('/execute/batch', execute_batch, methods=['POST']),
+    Route('/execute_schema', schema_route(adaption_schema_file), methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+], lifespan=lifespan)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RAMSES Interface (ASGI)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=INTERFACE_WORKERS)
+    args = parser.parse_args()
+    print(f"RAMES APIs available at http://{args.host}:{args.port}/ ({args.workers} worker(s))")
+    uvicorn.run("asgi_api:app", host=args.host, port=args.port, workers=args.workers)
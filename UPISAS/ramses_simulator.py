@@ -0,0 +1,410 @@
+"""
+In-process stand-in for the RAMSES managed system, for testing the Interface and the strategies at scale.
+
+RamsesSimulator serves the REST surfaces the Interface (ramses/Interface/api.py) talks to:
+    sefa-probe              GET  /rest/systemArchitecture, /rest/service/<id>/snapshot,
+                                 /rest/service/<id>/configuration
+    sefa-instances-manager  POST /rest/addInstances, /rest/removeInstance
+    sefa-config-manager     POST /rest/changeLBWeights
+for N services x M instances. With interface_port set it also serves a minimal stand-in of the Interface itself
+(GET /monitor, POST /execute and /execute/batch), so strategies can be driven without running api.py. Every snapshot carries cumulative httpMetrics counters, which grow with the
+simulated traffic split over the instances by their load balancer weights. Added instances boot for
+boot_delay seconds, and failures are scripted with fail_instance(), make_unreachable() or at().
+
+Run it on the default ports with `python -m UPISAS.ramses_simulator --services 200 --instances 3`, then start
+the Interface as usual (the RAMSES_*_PORT variables point it elsewhere).
+"""
+import argparse
+import heapq
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+SNAPSHOT_PATH = re.compile(r"^/rest/service/([^/]+)/snapshot$")
+CONFIGURATION_PATH = re.compile(r"^/rest/service/([^/]+)/configuration$")
+
+
+class SimulatedInstance:
+    __slots__ = ("instance_id", "address", "port", "ready_at", "failed", "unreachable", "counters", "cpu_usage")
+
+    def __init__(self, instance_id, address, port, ready_at, endpoints):
+        self.instance_id = instance_id
+        self.address = address
+        self.port = port
+        self.ready_at = ready_at
+        self.failed = False
+        self.unreachable = False
+        self.counters = {endpoint: [0, 0.0, 0.0, 0] for endpoint in endpoints}  # success, duration, max, errors
+        self.cpu_usage = 0.0
+
+    def status(self, now):
+        if self.failed:
+            return "FAILED"
+        if self.unreachable:
+            return "UNREACHABLE"
+        return "BOOTING" if now < self.ready_at else "ACTIVE"
+
+
+class SimulatedService:
+    __slots__ = ("service_id", "implementation_id", "endpoints", "instances", "weights", "latency",
+                 "next_port", "advanced_at", "carry")
+
+    def __init__(self, service_id, implementation_id, endpoints, latency, now):
+        self.service_id = service_id
+        self.implementation_id = implementation_id
+        self.endpoints = endpoints
+        self.instances = {}
+        self.weights = {}
+        self.latency = latency  # mean response time in ms
+        self.next_port = 58000
+        self.advanced_at = now
+        self.carry = 0.0  # fraction of a request left over from the previous advance
+
+
+class RamsesSimulator:
+
+    def __init__(self, services=10, instances_per_service=2, endpoints_per_service=3, request_rate=20.0,
+                 error_rate=0.01, boot_delay=5.0, seed=0, host="127.0.0.1",
+                 probe_port=32838, instances_manager_port=32839, config_manager_port=32840, interface_port=None,
+                 clock=time.monotonic):
+        self.request_rate = request_rate  # requests per second to every service
+        self.error_rate = error_rate
+        self.boot_delay = boot_delay
+        self.host = host
+        self.ports = {"probe": probe_port, "instances_manager": instances_manager_port,
+                      "config_manager": config_manager_port}
+        if interface_port is not None:
+            self.ports["interface"] = interface_port
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.events = []  # heap of (time, sequence, function, args) scheduled with at()
+        self.event_sequence = 0
+        self.servers = []
+        self.services = {}
+        now = clock()
+        for index in range(services):
+            implementation_id = f"service-{index}"
+            service = SimulatedService(implementation_id.upper(), implementation_id,
+                                       [f"/rest/{implementation_id}/endpoint-{e}" for e in range(endpoints_per_service)],
+                                       self.random.uniform(50, 200), now)
+            self.services[service.service_id] = service
+            for _ in range(instances_per_service):
+                self._add_instance(service, ready_at=now)
+            self._reset_weights(service)
+
+    # --- simulation --------------------------------------------------------------------------------------------
+
+    def _add_instance(self, service, ready_at):
+        port = service.next_port
+        service.next_port += 1
+        address = f"sefa-{service.implementation_id}"
+        instance = SimulatedInstance(f"{service.implementation_id}@{address}:{port}", address, port, ready_at,
+                                     service.endpoints)
+        service.instances[instance.instance_id] = instance
+        return instance
+
+    @staticmethod
+    def _reset_weights(service):
+        weight = 1.0 / len(service.instances) if service.instances else 0
+        service.weights = {instance_id: weight for instance_id in service.instances}
+
+    def _serving(self, service, now):
+        return [instance for instance in service.instances.values()
+                if instance.status(now) == "ACTIVE" and service.weights.get(instance.instance_id, 0) > 0]
+
+    def _advance(self, service, now):
+        """Adds the traffic since the last advance of service to the counters of its instances."""
+        self._run_events(now)
+        elapsed = max(0.0, now - service.advanced_at)
+        service.advanced_at = now
+        requests = elapsed * self.request_rate + service.carry
+        count = int(requests)
+        service.carry = requests - count
+        serving = self._serving(service, now)
+        total_weight = sum(service.weights[instance.instance_id] for instance in serving)
+        for instance in service.instances.values():
+            share = service.weights.get(instance.instance_id, 0) / total_weight if instance in serving else 0
+            instance.cpu_usage = min(1.0, 0.05 + share * self.request_rate / 100) if instance in serving else 0.0
+        if not serving or count == 0:
+            return
+        weights = [service.weights[instance.instance_id] for instance in serving]
+        for instance in self.random.choices(serving, weights=weights, k=count):
+            counters = instance.counters[service.endpoints[self.random.randrange(len(service.endpoints))]]
+            if self.random.random() < self.error_rate:
+                counters[3] += 1
+                continue
+            duration = self.random.expovariate(1.0 / service.latency)
+            counters[0] += 1
+            counters[1] += duration
+            counters[2] = max(counters[2], duration)
+
+    def _run_events(self, now):
+        while self.events and self.events[0][0] <= now:
+            _, _, function, args = heapq.heappop(self.events)
+            function(*args)
+
+    def at(self, delay, function, *args):
+        """Runs function(*args) once delay seconds of the simulation clock have passed."""
+        with self.lock:
+            self.event_sequence += 1
+            heapq.heappush(self.events, (self.clock() + delay, self.event_sequence, function, args))
+
+    def _find_instance(self, instance_id):
+        for service in self.services.values():
+            if instance_id in service.instances:
+                return service.instances[instance_id]
+        raise KeyError(instance_id)
+
+    def fail_instance(self, instance_id):
+        with self.lock:
+            self._find_instance(instance_id).failed = True
+
+    def make_unreachable(self, instance_id):
+        with self.lock:
+            self._find_instance(instance_id).unreachable = True
+
+    def recover_instance(self, instance_id):
+        with self.lock:
+            instance = self._find_instance(instance_id)
+            instance.failed = instance.unreachable = False
+
+    def service_for_implementation(self, implementation_name):
+        name = str(implementation_name).lower()
+        for service in self.services.values():
+            if service.implementation_id == name or service.service_id.lower() == name:
+                return service
+        return None
+
+    # --- REST surfaces -----------------------------------------------------------------------------------------
+
+    def system_architecture(self):
+        with self.lock:
+            return {service.service_id: {"serviceId": service.service_id,
+                                         "currentImplementationId": service.implementation_id,
+                                         "instances": list(service.instances)}
+                    for service in self.services.values()}
+
+    def snapshot(self, service_id):
+        with self.lock:
+            service = self.services.get(service_id)
+            if service is None:
+                return None
+            now = self.clock()
+            self._advance(service, now)
+            return [self._instance_snapshot(service, instance, now) for instance in service.instances.values()]
+
+    def _instance_snapshot(self, service, instance, now):
+        status = instance.status(now)
+        http_metrics = {}
+        for endpoint, (success, duration, max_duration, errors) in instance.counters.items():
+            outcomes = {"SUCCESS": {"outcome": "SUCCESS", "status": 200, "count": success,
+                                    "totalDuration": duration, "maxDuration": max_duration}}
+            if errors:
+                outcomes["SERVER_ERROR"] = {"outcome": "SERVER_ERROR", "status": 500, "count": errors,
+                                            "totalDuration": 0.0, "maxDuration": 0.0}
+            http_metrics[endpoint] = {"endpoint": endpoint, "httpMethod": "GET", "outcomeMetrics": outcomes}
+        success = sum(counters[0] for counters in instance.counters.values())
+        return {
+            "serviceId": service.service_id,
+            "instanceId": instance.instance_id,
+            "status": status,
+            "active": status in ("ACTIVE", "BOOTING"),
+            "booting": status == "BOOTING",
+            "failed": status == "FAILED",
+            "unreachable": status == "UNREACHABLE",
+            "cpuUsage": instance.cpu_usage,
+            "httpMetrics": http_metrics,
+            "avgResponseTime": (sum(counters[1] for counters in instance.counters.values()) / success
+                                if success else 0.0),
+        }
+
+    def configuration(self, service_id):
+        with self.lock:
+            service = self.services.get(service_id)
+            if service is None:
+                return None
+            return {"serviceId": service.service_id, "loadBalancerType": "WEIGHTED_RANDOM",
+                    "loadBalancerWeights": dict(service.weights)}
+
+    def add_instances(self, body):
+        with self.lock:
+            service = self.service_for_implementation(body.get("serviceImplementationName"))
+            if service is None:
+                return 404, {"error": f"unknown implementation {body.get('serviceImplementationName')}"}
+            now = self.clock()
+            self._advance(service, now)
+            added = [self._add_instance(service, ready_at=now + self.boot_delay)
+                     for _ in range(int(body.get("numberOfInstances") or 1))]
+            return 200, {"serviceImplementationName": service.implementation_id,
+                         "dockerizedInstances": [{"address": i.address, "port": i.port} for i in added],
+                         "newInstance": {"instanceId": added[-1].instance_id}}
+
+    def remove_instance(self, body):
+        with self.lock:
+            service = self.service_for_implementation(body.get("serviceImplementationName"))
+            if service is None:
+                return 404, {"error": f"unknown implementation {body.get('serviceImplementationName')}"}
+            for instance_id, instance in list(service.instances.items()):
+                if instance.address == body.get("address") and instance.port == int(body.get("port", -1)):
+                    del service.instances[instance_id]
+                    service.weights.pop(instance_id, None)
+                    return 200, {"serviceImplementationName": service.implementation_id,
+                                 "address": instance.address, "port": instance.port}
+            return 404, {"error": "no such instance"}
+
+    def change_lb_weights(self, body):
+        """Accepts the body sent by the Interface (serviceID, newWeights) and by the strategies (weightsId, weights)."""
+        with self.lock:
+            service_id = body.get("serviceID") or body.get("weightsId")
+            service = self.services.get(service_id) or self.service_for_implementation(service_id)
+            if service is None:
+                return 404, {"error": f"unknown service {service_id}"}
+            weights = body.get("newWeights") if isinstance(body.get("newWeights"), dict) else body.get("weights")
+            self._advance(service, self.clock())
+            if isinstance(weights, dict):
+                service.weights = {instance_id: float(weight) for instance_id, weight in weights.items()
+                                   if instance_id in service.instances}
+            for instance_id in body.get("instancesToRemoveWeightOf") or []:
+                service.weights.pop(instance_id, None)
+            return 200, {"serviceID": service.service_id, "weights": dict(service.weights)}
+
+    def monitor(self):
+        """The payload the Interface's /monitor would build from the probe."""
+        with self.lock:
+            return {service_id: {"serviceId": service_id,
+                                 "currentImplementationId": service.implementation_id,
+                                 "instances": list(service.instances),
+                                 "snapshot": self.snapshot(service_id),
+                                 "instanceConfig": self.configuration(service_id)}
+                    for service_id, service in self.services.items()}
+
+    def execute(self, body):
+        """Performs an Interface /execute request directly on the simulation."""
+        operation = body.get("operation")
+        if operation == "addInstances":
+            return self.add_instances(body)
+        if operation == "removeInstance":
+            return self.remove_instance(body)
+        if operation == "changeLBWeights":
+            return self.change_lb_weights({"serviceID": body.get("weightsId"), "newWeights": body.get("weights"),
+                                           "instancesToRemoveWeightOf": body.get("instancesToRemoveWeightOf")})
+        if operation == "changeProperty":
+            return 200, {"message": "Properties updated successfully",
+                         "updatedProperties": body.get("propertiesToChange")}
+        return 400, {"error": "Invalid operation"}
+
+    def execute_batch(self, body):
+        """Performs an Interface /execute/batch request, one action after the other."""
+        actions = body.get("actions") if isinstance(body, dict) else body
+        if not isinstance(actions, list):
+            return 400, {"error": "Expected a list of actions"}
+        results = []
+        for index, action in enumerate(actions):
+            status, response = self.execute(action)
+            result = {"index": index, "operation": action.get("operation"), "status": status}
+            result.update({"response": response} if status == 200 else {"error": response.get("error")})
+            results.append(result)
+        return 200, {"results": results}
+
+    def _get_routes(self, path):
+        if path == "/monitor" and "interface" in self.ports:
+            return self.monitor()
+        if path == "/rest/systemArchitecture":
+            return self.system_architecture()
+        match = SNAPSHOT_PATH.match(path)
+        if match:
+            return self.snapshot(match.group(1))
+        match = CONFIGURATION_PATH.match(path)
+        if match:
+            return self.configuration(match.group(1))
+        return None
+
+    def _handler(self, post_routes):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body are written separately, don't let the body wait for an ACK
+
+            def do_GET(self):
+                data = simulator._get_routes(urlsplit(self.path).path)
+                if data is None:
+                    self._reply(404, {"error": "not found"})
+                else:
+                    self._reply(200, data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                route = post_routes.get(urlsplit(self.path).path)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": "invalid JSON"})
+                if route is None:
+                    return self._reply(404, {"error": "not found"})
+                self._reply(*route(body))
+
+            def _reply(self, status, data):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Starts serving the three REST surfaces in background threads. Ports given as 0 are picked by the OS."""
+        surfaces = {"probe": {},
+                    "instances_manager": {"/rest/addInstances": self.add_instances,
+                                          "/rest/removeInstance": self.remove_instance},
+                    "config_manager": {"/rest/changeLBWeights": self.change_lb_weights}}
+        if "interface" in self.ports:
+            surfaces["interface"] = {"/execute": self.execute, "/execute/batch": self.execute_batch}
+        for name, post_routes in surfaces.items():
+            server = ThreadingHTTPServer((self.host, self.ports[name]), self._handler(post_routes))
+            server.daemon_threads = True
+            self.ports[name] = server.server_address[1]
+            threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True,
+                             name=f"ramses-simulator-{name}").start()
+            self.servers.append(server)
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="RAMSES stand-in simulator")
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--instances", type=int, default=2)
+    parser.add_argument("--endpoints", type=int, default=3)
+    parser.add_argument("--request-rate", type=float, default=20.0)
+    parser.add_argument("--boot-delay", type=float, default=5.0)
+    parser.add_argument("--probe-port", type=int, default=32838)
+    parser.add_argument("--instances-manager-port", type=int, default=32839)
+    parser.add_argument("--config-manager-port", type=int, default=32840)
+    args = parser.parse_args()
+    simulator = RamsesSimulator(services=args.services, instances_per_service=args.instances,
+                                endpoints_per_service=args.endpoints, request_rate=args.request_rate,
+                                boot_delay=args.boot_delay, probe_port=args.probe_port,
+                                instances_manager_port=args.instances_manager_port,
+                                config_manager_port=args.config_manager_port).start()
+    print(f"RAMSES simulator serving {args.services} services x {args.instances} instances on ports {simulator.ports}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        simulator.stop()
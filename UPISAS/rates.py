@@ -0,0 +1,190 @@
+"""
+Rates of the cumulative httpMetrics counters over a fixed-duration sliding window.
+
+The probe reports, per instance endpoint, counters that only ever grow until the instance restarts.
+CounterRateTracker keeps the last value of every counter and turns each new observation into an increase,
+treating a counter that went backwards as reset to zero by a restart. The first observation of an instance that
+was already running is only a baseline; instances that appear later count from zero. Increases are kept with their
+timestamp in one small queue per instance, next to running sums, and in one timeline of all instances, so expire()
+only touches the increases and instances that actually leave the window.
+"""
+import time
+from collections import OrderedDict, deque
+
+from UPISAS.qos import QoSReport, qos_metrics, endpoint_counters
+
+
+class _InstanceRates:
+    __slots__ = ("service_id", "counters", "increases", "endpoint_sums", "sums", "last_seen", "baselined")
+
+    def __init__(self, service_id, baselined=True):
+        self.service_id = service_id
+        self.baselined = baselined  # False until the counters of an instance found running have been recorded once
+        self.counters = {}  # endpoint -> last cumulative (duration, success, total)
+        self.increases = deque()  # (timestamp, endpoint, duration, success, total) inside the window
+        self.endpoint_sums = {}  # endpoint -> [duration, success, total] summed over the window
+        self.sums = [0, 0, 0]  # the endpoint sums added up
+        self.last_seen = None
+
+
+class CounterRateTracker:
+    """
+    Sliding-window QoS of every instance, fed with monitor payloads through observe().
+    window is the length of the window in seconds. Observations are expected in timestamp order.
+    """
+
+    def __init__(self, window=60.0, max_expired=4096):
+        self.window = window
+        self.instances = {}
+        self.resets = 0  # number of counter resets seen, i.e. restarted instance endpoints
+        self.services = set()  # services observed so far, their new instances started after the tracker
+        self.timeline = deque()  # (timestamp, instance id) of every increase in the window, oldest first
+        self.seen = OrderedDict()  # instance id -> last observation, least recently observed first
+        # ids of the instances dropped by expire(), most recently dropped last, at most max_expired of them
+        self.expired = OrderedDict()
+        self.max_expired = max_expired
+
+    def observe(self, monitor_data, timestamp=None):
+        """Records the counters of every instance in a /monitor payload observed at timestamp."""
+        timestamp = time.time() if timestamp is None else timestamp
+        for service_id, service_data in monitor_data.items():
+            if not isinstance(service_data, dict):
+                continue
+            for snapshot in service_data.get("snapshot") or []:
+                instance_id = snapshot.get("instanceId")
+                if instance_id:
+                    self.observe_instance(service_id, instance_id, snapshot, timestamp)
+        self.services.update(service_id for service_id, service_data in monitor_data.items()
+                             if isinstance(service_data, dict))
+        self.expire(timestamp)
+
+    def observe_instance(self, service_id, instance_id, snapshot, timestamp):
+        state = self.instances.get(instance_id)
+        if state is None:
+            # an instance of an already observed service was started since, the others may have run for long. So
+            # may an instance seen again after it expired, e.g. when its probe timed out for longer than the window
+            reappeared = self.expired.pop(instance_id, False)
+            state = self.instances[instance_id] = _InstanceRates(
+                service_id, baselined=service_id in self.services and not reappeared)
+        state.last_seen = timestamp
+        self.seen[instance_id] = timestamp
+        self.seen.move_to_end(instance_id)
+        if not state.baselined:
+            for endpoint, metrics in (snapshot.get("httpMetrics") or {}).items():
+                state.counters[endpoint] = endpoint_counters(metrics)
+            state.baselined = True
+            return
+        for endpoint, metrics in (snapshot.get("httpMetrics") or {}).items():
+            counters = endpoint_counters(metrics)
+            previous = state.counters.get(endpoint)
+            if counters == previous:
+                continue
+            state.counters[endpoint] = counters
+            if previous is None or any(value < before for value, before in zip(counters, previous)):
+                # new endpoint or instance, or the counters were reset by a restart: they counted up from zero
+                if previous is not None:
+                    self.resets += 1
+                increase = counters
+            else:
+                increase = tuple(value - before for value, before in zip(counters, previous))
+            state.increases.append((timestamp, endpoint) + increase)
+            self.timeline.append((timestamp, instance_id))
+            endpoint_sums = state.endpoint_sums.setdefault(endpoint, [0, 0, 0])
+            for position, value in enumerate(increase):
+                endpoint_sums[position] += value
+                state.sums[position] += value
+
+    def expire(self, now=None):
+        """Drops the increases older than the window, and the instances not observed within it."""
+        cutoff = (time.time() if now is None else now) - self.window
+        seen = self.seen
+        while seen:
+            instance_id, last_seen = next(iter(seen.items()))
+            if last_seen >= cutoff:
+                break
+            del seen[instance_id]
+            self.instances.pop(instance_id, None)
+            self.expired[instance_id] = True
+            if len(self.expired) > self.max_expired:
+                self.expired.popitem(last=False)
+        timeline = self.timeline
+        while timeline and timeline[0][0] < cutoff:
+            _, instance_id = timeline.popleft()
+            state = self.instances.get(instance_id)
+            # the entry may belong to a dropped instance whose id was observed again since
+            if state is None or not state.increases or state.increases[0][0] >= cutoff:
+                continue
+            _, endpoint, *increase = state.increases.popleft()
+            endpoint_sums = state.endpoint_sums[endpoint]
+            for position, value in enumerate(increase):
+                endpoint_sums[position] -= value
+                state.sums[position] -= value
+
+    def to_dict(self):
+        """The state of the tracker as plain lists and dicts, for journal checkpoints."""
+        return {"window": self.window, "resets": self.resets, "instances": {
+            instance_id: {"service": state.service_id, "last_seen": state.last_seen,
+                          "counters": {endpoint: list(counters) for endpoint, counters in state.counters.items()},
+                          "increases": [list(increase) for increase in state.increases]}
+            for instance_id, state in self.instances.items()}}
+
+    def load_dict(self, data):
+        """Replaces the state of the tracker with the one returned by to_dict()."""
+        self.window = data.get("window", self.window)
+        self.resets = data.get("resets", 0)
+        self.instances = {}
+        self.services = set()
+        timeline = []
+        for instance_id, saved in data.get("instances", {}).items():
+            state = self.instances[instance_id] = _InstanceRates(saved["service"])
+            self.services.add(state.service_id)
+            state.last_seen = saved["last_seen"]
+            state.counters = {endpoint: tuple(counters) for endpoint, counters in saved["counters"].items()}
+            for timestamp, endpoint, *increase in saved["increases"]:
+                state.increases.append((timestamp, endpoint, *increase))
+                timeline.append((timestamp, instance_id))
+                endpoint_sums = state.endpoint_sums.setdefault(endpoint, [0, 0, 0])
+                for position, value in enumerate(increase):
+                    endpoint_sums[position] += value
+                    state.sums[position] += value
+        self.timeline = deque(sorted(timeline, key=lambda entry: entry[0]))
+        self.seen = OrderedDict(sorted(((instance_id, state.last_seen) for instance_id, state in self.instances.items()),
+                                       key=lambda entry: entry[1]))
+
+    def rebaseline(self):
+        """
+        Makes the next observation of every instance a baseline again, like when the tracker starts.
+        Called after a warm start: the counters kept running while nothing observed them.
+        """
+        self.services = set()
+        for state in self.instances.values():
+            state.baselined = False
+
+    def report(self):
+        """QoSReport of the current window, see UPISAS.qos.QoSReport."""
+        instances, service_sums, overall = {}, {}, [0, 0, 0]
+        for instance_id, state in self.instances.items():
+            metrics = qos_metrics(*state.sums)
+            metrics["service"] = state.service_id
+            instances[instance_id] = metrics
+            service_total = service_sums.setdefault(state.service_id, [0, 0, 0])
+            for position, value in enumerate(state.sums):
+                service_total[position] += value
+                overall[position] += value
+        services = {service_id: qos_metrics(*sums) for service_id, sums in service_sums.items()}
+        return QoSReport(instances, services, qos_metrics(*overall))
+
+    def endpoint_rates(self, instance_id):
+        """
+        Per-endpoint QoS of an instance over the window: the qos_metrics of the endpoint plus
+        requests_per_second, the number of requests divided by the window length.
+        """
+        state = self.instances.get(instance_id)
+        if state is None:
+            return {}
+        rates = {}
+        for endpoint, sums in state.endpoint_sums.items():
+            metrics = qos_metrics(*sums)
+            metrics["requests_per_second"] = sums[2] / self.window
+            rates[endpoint] = metrics
+        return rates
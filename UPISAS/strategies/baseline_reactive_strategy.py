@@ -1,15 +1,18 @@
 #from UPISAS.ramses_baseline_strategy import Strategy
 from UPISAS.strategy_ramses import Strategy
+from UPISAS.log import LazyJSON
 import requests
 import time
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class ReactiveAdaptationManager(Strategy):
     def __init__(self, exemplar, monitor_url, execute_url, lb_url):
         super().__init__(exemplar, monitor_url, execute_url, lb_url)
         self.processed_failed_instances = set()  # Track already processed failed instances
-        self.oldest_snapshot = {}  # Store the oldest active metrics snapshot for incremental comparison
 
     def analyze(self):
         """
@@ -23,26 +26,29 @@ class ReactiveAdaptationManager(Strategy):
         active_service_count_response_time = 0
         active_service_count_availability = 0
 
+        # QoS of all instances over the sliding window
+        qos = self.compute_qos()
+
         for service_id, service_data in monitored_data.items():
-            snapshots = service_data.get("snapshot", [])
+            snapshots = service_data.get("snapshot") or []
 
             if not snapshots:
-                print(f"{service_id} has no snapshots available.")
+                logger.debug("%s has no snapshots available.", service_id)
                 continue
 
             for snapshot in snapshots:
                 instance_id = snapshot.get("instanceId")
 
                 # Check for failed, unreachable, or inactive instances
-                if not snapshot.get("active", True) or snapshot.get("failed") or snapshot.get("unreachable"):
-                    print(f"Instance {instance_id} of service {service_id} is failed or unreachable.")
+                if (not snapshot.get("active", True) or snapshot.get("failed") or snapshot.get("unreachable")
+                        or self.instance_container_down(instance_id)):
+                    logger.info("Instance %s of service %s is failed or unreachable.", instance_id, service_id)
                     failed_instances[service_id] = failed_instances.get(service_id, [])
                     failed_instances[service_id].append(instance_id)
                     continue
 
-                # Compare current snapshot with the oldest snapshot for incremental metrics
-                oldest_snapshot = self.oldest_snapshot.get(instance_id, {})
-                avg_response_time, availability = self.compute_metrics_window(snapshot, oldest_snapshot)
+                # Response time and availability of the instance within the window
+                avg_response_time, availability = qos.instance_metrics(instance_id)
 
                 # Aggregate metrics
                 if avg_response_time > 0:
@@ -52,8 +58,6 @@ class ReactiveAdaptationManager(Strategy):
                 if availability > 0:
                     total_availability += availability
                     active_service_count_availability += 1
-                    # Update oldest snapshot only if availability > 0
-                    self.oldest_snapshot[instance_id] = snapshot
 
         # Calculate final average metrics
         avg_response_time = total_avg_response_time / active_service_count_response_time if active_service_count_response_time > 0 else 0
@@ -66,9 +70,8 @@ class ReactiveAdaptationManager(Strategy):
             "availability": availability
         }
 
-        print("Analysis complete.")
-        print(f"Average Response Time: {avg_response_time}")
-        print(f"Availability: {availability}")
+        logger.info("Analysis complete.", extra={"fields": {"avg_response_time": avg_response_time,
+                                                           "availability": availability}})
 
 
     def plan(self):
@@ -82,10 +85,10 @@ class ReactiveAdaptationManager(Strategy):
 
         if failed_instances:
             for service_id, instances in failed_instances.items():
-                service_implementation_name = self.knowledge.monitored_data.get(service_id, {}).get("currentImplementationId", None)
+                service_implementation_name = self.knowledge.index.implementation_of(service_id)
 
                 if service_implementation_name:
-                    print(f"Adding a new instance for service {service_id}.")
+                    logger.info("Adding a new instance for service %s.", service_id)
                     actions.append({
                         "operation": "addInstances",
                         "serviceImplementationName": service_implementation_name,
@@ -100,13 +103,14 @@ class ReactiveAdaptationManager(Strategy):
                         "instancesToRemoveWeightOf": instances
                     })
 
-        # Update planned actions and load balancer adjustments in Knowledge
-        self.knowledge.plan_data = actions
-        self.knowledge.adaptation_options = load_balancer_adjustments
+        # Update planned actions and load balancer adjustments in Knowledge, leaving out the ones still in flight
+        self.knowledge.plan_data = self.without_in_flight(actions)
+        self.knowledge.adaptation_options = self.without_in_flight(load_balancer_adjustments)
 
-        print("Planning complete.")
-        print(f"Planned Actions: {json.dumps(actions, indent=2)}")
-        print(f"Load Balancer Adjustments: {json.dumps(load_balancer_adjustments, indent=2)}")
+        logger.info("Planning complete.", extra={"fields": {"actions": len(actions),
+                                                           "lb_adjustments": len(load_balancer_adjustments)}})
+        logger.debug("Planned Actions: %s", LazyJSON(actions, indent=2))
+        logger.debug("Load Balancer Adjustments: %s", LazyJSON(load_balancer_adjustments, indent=2))
 
 
     def run(self):
@@ -117,14 +121,15 @@ class ReactiveAdaptationManager(Strategy):
 
         while True:
 
-            print("Running MAPE-K loop...")
+            logger.info("Running MAPE-K loop...")
             input("try to adapt?")
             
             # Monitor phase
             self.monitor(verbose=True)
             self.analyze()
             self.plan()
-            self.execute()
+            # Execute phase runs in the background, the next iteration does not wait for it
+            self.execute_async()
             
             # Analyze phase
             #if self.analyze():
@@ -135,5 +140,5 @@ class ReactiveAdaptationManager(Strategy):
                     # Execute phase
                     #self.execute()
             
-            # Sleep before next loop iteration
-            time.sleep(10)
\ No newline at end of file
+            # Sleep before next loop iteration, woken up early when a watched container goes down
+            self.wait_for_next_tick(10)
\ No newline at end of file
@@ -1,7 +1,11 @@
 from UPISAS.strategy_ramses import Strategy
+from UPISAS.log import LazyJSON
 import requests
 import time
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 #This is a port of the ReactiveAdaptationManager originally published alongside SWIM.
@@ -10,7 +14,6 @@ class ReactiveAdaptationManager(Strategy):
     def __init__(self, exemplar, monitor_url, execute_url, lb_url):
         super().__init__(exemplar, monitor_url, execute_url, lb_url)
         self.processed_failed_instances = set()  # Track already processed failed instances
-        self.oldest_snapshot = {}  # Store the oldest active metrics snapshot for incremental comparison
 
 
     def analyze(self):
@@ -41,12 +44,15 @@ class ReactiveAdaptationManager(Strategy):
             "bootingDuration": 5  # Booting persists across 5 iterations
         }
 
+        # QoS of all instances over the sliding window
+        qos = self.compute_qos()
+
         for service_id, service_data in monitored_data.items():
-            snapshots = service_data.get("snapshot", [])
+            snapshots = service_data.get("snapshot") or []
             #print(f"Service: {service_id}, Snapshots: {snapshots}")
 
             if not snapshots:
-                print(f"{service_id} Service {service_id} has no snapshots available yet. Will retry in the next iteration.")
+                logger.debug("Service %s has no snapshots available yet. Will retry in the next iteration.", service_id)
                 continue
 
             for snapshot in snapshots:
@@ -63,15 +69,14 @@ class ReactiveAdaptationManager(Strategy):
                 # Mark instance as processed
                 self.processed_predicted_instances.add(instance_id)
 
-                history = monitored_data.get(instance_id, {}).get("history", {})
-
                 # Skip instances that have already been acted upon
                 if instance_id in self.processed_failed_instances:
                     continue
 
                 # Check for failed, unreachable, or inactive instances
-                if not snapshot.get("active", True) or snapshot.get("failed") or snapshot.get("unreachable"):
-                    print(f"  Instance {instance_id} is failed or unreachable.")
+                if (not snapshot.get("active", True) or snapshot.get("failed") or snapshot.get("unreachable")
+                        or self.instance_container_down(instance_id)):
+                    logger.info("Instance %s is failed or unreachable.", instance_id)
                     failed_instances[service_id] = failed_instances.get(service_id, [])
                     failed_instances[service_id].append(instance_id)
                     continue
@@ -82,18 +87,19 @@ class ReactiveAdaptationManager(Strategy):
                     self.processed_failed_instances.discard(instance_id)
 
                 # Prolonged booting detection
-                booting_trend = history.get("bootingStatus", [])[-5:]
+                history = self.knowledge.history
+                booting_trend = history.last(instance_id, "bootingStatus", 5)
                 if len(booting_trend) == 5 and all(booting_trend):
-                    print(f"Instance {instance_id} stuck in booting state.")
+                    logger.info("Instance %s stuck in booting state.", instance_id)
                     failed_instances[service_id] = failed_instances.get(service_id, [])
                     failed_instances[service_id].append(instance_id)
                     continue
 
                 # Predictive failure detection for critical services
                 if service_id in ["ordering-service", "payment-proxy-1-service"]:
-                    cpu_trend = history.get("cpuUsage", [])[-5:]
-                    response_trend = history.get("responseTime", [])[-5:]
-                    latency_trend = history.get("requestLatency", [])[-5:]
+                    cpu_trend = history.last(instance_id, "cpuUsage", 5)
+                    response_trend = history.last(instance_id, "responseTime", 5)
+                    latency_trend = history.last(instance_id, "requestLatency", 5)
 
                     if (
                         all(cpu > trend_thresholds["cpuUsage"] for cpu in cpu_trend) or
@@ -103,9 +109,8 @@ class ReactiveAdaptationManager(Strategy):
                         predicted_failures[service_id] = predicted_failures.get(service_id, [])
                         predicted_failures[service_id].append(instance_id)
 
-                # Compare current snapshot with the oldest snapshot for incremental metrics
-                oldest_snapshot = self.oldest_snapshot.get(instance_id, {})
-                avg_response_time, availability = self.compute_metrics_window(snapshot, oldest_snapshot)
+                # Response time and availability of the instance within the window
+                avg_response_time, availability = qos.instance_metrics(instance_id)
 
 
 
@@ -118,12 +123,6 @@ class ReactiveAdaptationManager(Strategy):
                     total_availability += availability
                     active_service_count_availability += 1
 
-                    # Update oldest_snapshot if availability is non-zero
-                    if availability > 0:
-                        self.oldest_snapshot[instance_id] = snapshot
-                    else:
-                        print(f"Availability is zero for instance {instance_id}, not updating oldest snapshot.")
-
 
         # Calculate final average metrics
         avg_response_time = total_avg_response_time / active_service_count_response_time if active_service_count_response_time > 0 else 0
@@ -144,23 +143,22 @@ class ReactiveAdaptationManager(Strategy):
         #     failed_instances[service_id].append(instance_id)
 
         # Debugging results
-        print("Analysis complete.")
-        #print(f"  Failed Instances: {json.dumps(failed_instances, indent=2)}")
-        print(f"  Average Response Time: {avg_response_time}")
-        print(f"  Availability: {availability}")
+        logger.info("Analysis complete.", extra={"fields": {"avg_response_time": avg_response_time,
+                                                           "availability": availability}})
+        logger.debug("Failed instances: %s", LazyJSON(failed_instances, indent=2))
 
 
         # Print thresholds and warnings
         if avg_response_time > response_time_threshold:
-            print(f"Warning: Average Response Time exceeds threshold ({response_time_threshold} ms).")
+            logger.warning("Average Response Time exceeds threshold (%s ms).", response_time_threshold)
         if availability is not None and availability < availability_threshold:
-            print(f"Warning: Availability below threshold ({availability_threshold}%).")
+            logger.warning("Availability below threshold (%s%%).", availability_threshold)
 
 
     def plan(self):
         
         analysis_data = self.knowledge.analysis_data
-        print(f"Analysis data: {analysis_data}")
+        logger.debug("Analysis data: %s", LazyJSON(analysis_data, indent=2))
         failed_instances = analysis_data.get("failed_instances", {})
         predicted_failures = analysis_data.get("predicted_failures", {})
         actions = []
@@ -188,12 +186,12 @@ class ReactiveAdaptationManager(Strategy):
         # Handle failed instances
         if failed_instances:
             for service_id, instances in failed_instances.items():
-                service_implementation_name = self.knowledge.monitored_data.get(service_id, {}).get("currentImplementationId", None)
-                sibling_instances = self.knowledge.monitored_data.get(service_id, {}).get("instances", [])
+                service_implementation_name = self.knowledge.index.implementation_of(service_id)
+                sibling_instances = self.knowledge.index.instances_of(service_id)
 
                 if service_implementation_name:
                     for instance_id in instances:
-                        print(f"Removing failed instance {instance_id} for {service_id}.")
+                        logger.info("Removing failed instance %s for %s.", instance_id, service_id)
                         actions.append({
                             "operation": "removeInstance",
                             "serviceImplementationName": service_id,
@@ -202,7 +200,7 @@ class ReactiveAdaptationManager(Strategy):
                         })
 
                     if len(sibling_instances) == len(instances):
-                        print(f"All instances of {service_id} failed. Adding a new instance.")
+                        logger.info("All instances of %s failed. Adding a new instance.", service_id)
                         actions.append({
                             "operation": "addInstances",
                             "serviceImplementationName": service_implementation_name,
@@ -216,8 +214,9 @@ class ReactiveAdaptationManager(Strategy):
                             "serviceImplementationName": service_implementation_name,
                             "numberOfInstances": 1
                         })
-                        print(f"Some instances of {service_id} are still alive. Reconfiguring load balancer.")
-                        alive_instances = [inst for inst in sibling_instances if inst not in instances]
+                        logger.info("Some instances of %s are still alive. Reconfiguring load balancer.", service_id)
+                        failed = set(instances)
+                        alive_instances = [inst for inst in sibling_instances if inst not in failed]
                         new_weights = 1.0 / len(alive_instances)
                         load_balancer_adjustments.append({
                             "operation": "changeLBWeights",
@@ -230,11 +229,11 @@ class ReactiveAdaptationManager(Strategy):
         # Handle predicted failures
         if predicted_failures:
             for service_id, instances in predicted_failures.items():
-                service_implementation_name = self.knowledge.monitored_data.get(service_id, {}).get("currentImplementationId", None)
+                service_implementation_name = self.knowledge.index.implementation_of(service_id)
                 standby_instance = self.knowledge.standby_pool.get(service_id)
 
                 if service_implementation_name and standby_instance:
-                    print(f"Activating standby instance {standby_instance} for predicted failure in {service_id}.")
+                    logger.info("Activating standby instance %s for predicted failure in %s.", standby_instance, service_id)
                     load_balancer_adjustments.append({
                         "operation": "changeLBWeights",
                         # "serviceID": service_id,
@@ -247,7 +246,7 @@ class ReactiveAdaptationManager(Strategy):
 
                     # If recovery attempts fail, remove the failed instance and replace it
                     for instance_id in instances:
-                        print(f"Removing predicted failed instance {instance_id} for {service_id}.")
+                        logger.info("Removing predicted failed instance %s for %s.", instance_id, service_id)
                         actions.append({
                             "operation": "removeInstance",
                             "serviceImplementationName": service_id,
@@ -257,7 +256,7 @@ class ReactiveAdaptationManager(Strategy):
 
                     # Add a new standby instance to replace the failed one
                     new_standby = f"{service_id}-standby-new"
-                    print(f"Adding new standby instance {new_standby} for {service_id}.")
+                    logger.info("Adding new standby instance %s for %s.", new_standby, service_id)
                     actions.append({
                         "operation": "addInstances",
                         "serviceImplementationName": service_id,
@@ -272,9 +271,9 @@ class ReactiveAdaptationManager(Strategy):
                         "instancesToRemoveWeightOf": []
                     })
 
-        # Update planned actions and load balancer adjustments in Knowledge
-        self.knowledge.plan_data = actions
-        self.knowledge.adaptation_options = load_balancer_adjustments
+        # Update planned actions and load balancer adjustments in Knowledge, leaving out the ones still in flight
+        self.knowledge.plan_data = self.without_in_flight(actions)
+        self.knowledge.adaptation_options = self.without_in_flight(load_balancer_adjustments)
 
     
     def run(self):
@@ -285,14 +284,15 @@ class ReactiveAdaptationManager(Strategy):
 
         while True:
 
-            print("Running MAPE-K loop...")
+            logger.info("Running MAPE-K loop...")
             input("try to adapt?")
             
             # Monitor phase
             self.monitor(verbose=True)
             self.analyze()
             self.plan()
-            self.execute()
+            # Execute phase runs in the background, the next iteration does not wait for it
+            self.execute_async()
             
             # Analyze phase
             #if self.analyze():
@@ -303,8 +303,8 @@ class ReactiveAdaptationManager(Strategy):
                     # Execute phase
                     #self.execute()
             
-            # Sleep before next loop iteration
-            time.sleep(10)
+            # Sleep before next loop iteration, woken up early when a watched container goes down
+            self.wait_for_next_tick(10)
 
     
     '''
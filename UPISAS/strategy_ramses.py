@@ -1,19 +1,37 @@
 from abc import ABC, abstractmethod
+import queue
 import requests
-import pprint
+import threading
 import time
 import json
 
 
 from UPISAS.exceptions import EndpointNotReachable, ServerNotReachable
 from UPISAS.knowledge_ramses import Knowledge
-from UPISAS import validate_schema, get_response_for_get_request
+from UPISAS.instance_readiness import InstanceReadinessTracker
+from UPISAS.action_executor import ActionExecutor
+from UPISAS.qos import compute_metrics_window
+from UPISAS.rates import CounterRateTracker
+from UPISAS.journal import KnowledgeJournal
+from UPISAS.instrumentation import instrument_phase
+from UPISAS.log import LazyJSON
+from UPISAS.container_state import DOWN
+from UPISAS import validate_schema, get_response_for_get_request, get_http_session
 import logging
 
-pp = pprint.PrettyPrinter(indent=4)
+logger = logging.getLogger(__name__)
+
+# MAPE-K phases timed by UPISAS.instrumentation, also when a subclass overrides them
+INSTRUMENTED_PHASES = ("monitor", "analyze", "plan", "execute", "execute_async")
 
 
 class Strategy(ABC):
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for phase in INSTRUMENTED_PHASES:
+            if phase in cls.__dict__:
+                setattr(cls, phase, instrument_phase(phase)(cls.__dict__[phase]))
     
     def __init__(self, exemplar, monitor_url, execute_url, lb_url):
         self.monitor_url = monitor_url
@@ -21,155 +39,445 @@ class Strategy(ABC):
         self.exemplar = exemplar
         self.lb_url = lb_url
         self.knowledge = Knowledge(dict(), dict(), dict(), dict())  #Initializing the knowledge class to hold information from monitor(), analyze(), plan() and execute() functions
-
-    def monitor(self, verbose=False):
+        self.use_monitor_delta = False  # Fetch only the changes since the last monitor() call from /monitor/delta
+        self.use_batch_execute = False  # Send the instance changes, then the LB changes of a plan in one /execute/batch request each
+        self.readiness = InstanceReadinessTracker(self._fetch_monitor_data)  # Waits for added instances before LB changes
+        self.executor = ActionExecutor(self.knowledge)  # Runs planned actions in the background, see execute_async()
+        self.rates = CounterRateTracker(window=60)  # Sliding-window QoS of every instance, fed by monitor()
+        self.journal = None  # KnowledgeJournal persisting the Knowledge, see enable_journal()
+        self.container_tracker = None  # ContainerStateTracker of the exemplar, see watch_containers()
+        self.container_changes = queue.SimpleQueue()  # (name, state, action, timestamp) pushed by the tracker thread
+        self.container_down_event = threading.Event()  # Set when a watched container goes down, wakes wait_for_next_tick()
+
+    @instrument_phase("monitor")
+    def monitor(self, verbose=False, delta=None):
         """
         Fetches monitoring data from the API, ensures consistency for httpMetrics and CircuitBreakerMetrics,
         and tracks historical metrics for trend analysis.
+        With delta (default: self.use_monitor_delta) only the changes since the last call are fetched
+        from /monitor/delta and applied to the payload held in Knowledge.
         """
         try:
-            response = requests.get(self.monitor_url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Populate missing metrics with defaults and track historical data
-            for service_id, service_data in data.items():
-                for snapshot in service_data.get("snapshot", []):
-                    instance_id = snapshot.get("instanceId", "unknown")
-
-                    # Initialize historical data for the instance
-                    if instance_id not in self.knowledge.monitored_data:
-                        self.knowledge.monitored_data[instance_id] = {
-                            "history": {
-                                "cpuUsage": [],
-                                "responseTime": [],
-                                "bootingStatus": [],
-                                "requestLatency": []
-                            }
-                        }
-
-                    # Track CPU usage
-                    cpu_usage = snapshot.get("cpuUsage", 0)
-                    self.knowledge.monitored_data[instance_id]["history"]["cpuUsage"].append(cpu_usage)
-                    if len(self.knowledge.monitored_data[instance_id]["history"]["cpuUsage"]) > 5:
-                        self.knowledge.monitored_data[instance_id]["history"]["cpuUsage"].pop(0)
-
-                    # Track average response time
-                    avg_response_time = snapshot.get("httpMetrics", {}).get("avgResponseTime", 0)
-                    self.knowledge.monitored_data[instance_id]["history"]["responseTime"].append(avg_response_time)
-                    if len(self.knowledge.monitored_data[instance_id]["history"]["responseTime"]) > 5:
-                        self.knowledge.monitored_data[instance_id]["history"]["responseTime"].pop(0)
-
-                    # Track booting status
-                    booting_status = snapshot.get("booting", False)
-                    self.knowledge.monitored_data[instance_id]["history"]["bootingStatus"].append(booting_status)
-                    if len(self.knowledge.monitored_data[instance_id]["history"]["bootingStatus"]) > 5:
-                        self.knowledge.monitored_data[instance_id]["history"]["bootingStatus"].pop(0)
-
-                    # Track request latency
-                    request_latency = snapshot.get("httpMetrics", {}).get("avgLatency", 0)
-                    self.knowledge.monitored_data[instance_id]["history"]["requestLatency"].append(request_latency)
-                    if len(self.knowledge.monitored_data[instance_id]["history"]["requestLatency"]) > 5:
-                        self.knowledge.monitored_data[instance_id]["history"]["requestLatency"].pop(0)
-
-            # Store the monitoring data in Knowledge
-            self.knowledge.monitored_data.update(data)
-            # self.knowledge.monitored_data = data
+            if self.use_monitor_delta if delta is None else delta:
+                data = self._fetch_monitor_delta()
+            else:
+                data = self._fetch_monitor_data()
+
+            self._update_knowledge(data)
+            self.apply_finished_actions()
+            self.apply_container_changes()
 
             if verbose:
-                print("Monitoring data updated.")
+                logger.info("Monitoring data updated.")
 
         except requests.RequestException as e:
-            print(f"Monitoring failed: {e}")
+            logger.warning("Monitoring failed: %s", e)
 
+    def _update_knowledge(self, data, timestamp=None):
+        """
+        Tracks the metric history of every instance in data and stores data in Knowledge.
+        """
+        # Track historical data, one sample per metric and monitor call
+        timestamp = time.time() if timestamp is None else timestamp
+        for service_id, service_data in data.items():
+            for snapshot in service_data.get("snapshot") or []:
+                instance_id = snapshot.get("instanceId", "unknown")
+                http_metrics = snapshot.get("httpMetrics") or {}
+                self.knowledge.history.record(instance_id, {
+                    "cpuUsage": snapshot.get("cpuUsage", 0),
+                    "responseTime": http_metrics.get("avgResponseTime", 0),
+                    "bootingStatus": snapshot.get("booting", False),
+                    "requestLatency": http_metrics.get("avgLatency", 0),
+                }, timestamp)
+        self.rates.observe(data, timestamp)
+
+        # Store the monitoring data in Knowledge
+        self.knowledge.monitored_data.update(data)
+        # the metric history of removed or replaced instances is dropped with them
+        for instance_id in self.knowledge.index.update(data):
+            self.knowledge.history.forget(instance_id)
+        # self.knowledge.monitored_data = data
+        self._journal("monitor", data, timestamp)
+
+    def enable_journal(self, directory, checkpoint_every=50, warm_start=False):
+        """
+        Persists the Knowledge in an append-only journal in directory, see UPISAS.journal.
+        With warm_start the Knowledge is first restored from the journal left by a previous run, which is only
+        right when that run's system is still up. Otherwise the old journal is cleared.
+        """
+        self.journal = KnowledgeJournal(directory, checkpoint_every)
+        self.executor.on_finished = lambda outcome: self._journal("execution", outcome, checkpoint=False)
+        if warm_start:
+            self.warm_start()
+        else:
+            self.journal.clear()
+
+    def warm_start(self):
+        """Restores the Knowledge from the latest journal checkpoint and replays the entries written after it."""
+        state, entries = self.journal.load()
+        if state is not None:
+            self.knowledge.restore_checkpoint(state["knowledge"])
+            self.rates.load_dict(state["rates"])
+        journal, self.journal = self.journal, None  # replayed entries are already in the journal
+        try:
+            for entry in entries:
+                kind, data = entry["kind"], entry["data"]
+                if kind == "monitor":
+                    self._update_knowledge(data, entry["t"])
+                elif kind == "analysis":
+                    self.knowledge.analysis_data = data
+                elif kind == "plan":
+                    self.knowledge.plan_data = data["plan_data"]
+                    self.knowledge.adaptation_options = data["adaptation_options"]
+                elif kind == "execution":
+                    self.knowledge.execution_results.append(data)
+        finally:
+            self.journal = journal
+        self.rates.rebaseline()
+        logger.info("Knowledge restored from %s (%s%d journal entries).", self.journal.directory,
+                    'checkpoint and ' if state is not None else '', len(entries))
+
+    def checkpoint_state(self):
+        return {"knowledge": self.knowledge.to_checkpoint(), "rates": self.rates.to_dict()}
+
+    def _journal(self, kind, data, timestamp=None, checkpoint=True):
+        """
+        Appends an entry to the journal, if enabled, and writes a checkpoint when one is due.
+        Checkpoints are only written from the MAPE-K loop (checkpoint=True), never from executor threads.
+        """
+        if self.journal is None:
+            return
+        if self.journal.append(kind, data, timestamp) and checkpoint:
+            self.journal.checkpoint(self.checkpoint_state())
+
+    def _journal_plan(self):
+        self._journal("analysis", self.knowledge.analysis_data)
+        self._journal("plan", {"plan_data": self.knowledge.plan_data,
+                               "adaptation_options": self.knowledge.adaptation_options})
+
+    def close_journal(self):
+        """Writes a final checkpoint and closes the journal."""
+        if self.journal is not None:
+            self.journal.checkpoint(self.checkpoint_state())
+            self.journal.close()
+
+    def monitor_stream(self, verbose=False, reconnect_delay=1):
+        """
+        Subscribes to the /monitor/stream Server-Sent Events feed and yields the monitor payload
+        every time the Interface publishes a change, after storing it in Knowledge like monitor() does.
+        The connection is re-established (resuming from the last cursor) whenever it drops.
+        Usage: for data in strategy.monitor_stream(): strategy.analyze(); strategy.plan(); strategy.execute()
+        """
+        stream_url = self.monitor_url.rstrip('/') + "/stream"
+        while True:
+            headers = {'Accept': 'text/event-stream'}
+            if self.knowledge.monitor_cursor:
+                headers['Last-Event-ID'] = self.knowledge.monitor_cursor
+            try:
+                with get_http_session(stream_url).get(stream_url, headers=headers, stream=True) as response:
+                    response.raise_for_status()
+                    for event_data in self._read_events(response):
+                        data = self.knowledge.apply_monitor_delta(json.loads(event_data))
+                        self._update_knowledge(data)
+                        self.apply_finished_actions()
+                        self.apply_container_changes()
+                        if verbose:
+                            logger.info("Monitoring data updated from stream.")
+                        yield data
+            except requests.RequestException as e:
+                logger.warning("Monitor stream interrupted: %s", e)
+            time.sleep(reconnect_delay)
+
+    @staticmethod
+    def _read_events(response):
+        """Yields the data field of every Server-Sent Event read from a streaming response."""
+        data_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                if line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+                continue
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
 
+    def _fetch_monitor_data(self):
+        response = get_http_session(self.monitor_url).get(self.monitor_url)
+        response.raise_for_status()
+        return response.json()
 
+    def _fetch_monitor_delta(self):
+        delta_url = self.monitor_url.rstrip('/') + "/delta"
+        params = {"since": self.knowledge.monitor_cursor} if self.knowledge.monitor_cursor else None
+        response = get_http_session(delta_url).get(delta_url, params=params)
+        response.raise_for_status()
+        return self.knowledge.apply_monitor_delta(response.json())
+
+
+    @instrument_phase("execute")
     def execute(self):
         """
-        Executes planned actions via the execute API. Handles both 'addInstances' and 'changeLBWeights' operations.
+        Executes planned actions via the execute API. Handles both 'addInstances' and 'changeLBWeights' operations,
+        other planned operations are not sent. With self.use_batch_execute the instance additions and the load
+        balancer changes are sent in one /execute/batch request each; the load balancer changes need the new
+        instances to be ready first.
         """
+        self._journal_plan()
         plan_data = self.knowledge.plan_data
         load_balancer_adjustments = self.knowledge.adaptation_options
         results = []
 
         # Check if there are planned actions
         if not plan_data and not load_balancer_adjustments:
-            print("No planned actions. No adaptation required at this time.")
+            logger.info("No planned actions. No adaptation required at this time.")
             return
 
-        print("Checking planned actions for execution...")
+        logger.info("Checking planned actions for execution...")
 
         # Execute addInstances actions
-        for action in plan_data:
-            if action.get("operation") == "addInstances":
-                print(f"Executing addInstances action: {action}")
-                try:
-                    response = requests.post(self.execute_url, json=action)
-                    response.raise_for_status()
-                    result = response.json()
-                    results.append(result)
-                    print(f"Instance added successfully: {result}")
-
-                    # Update standby pool if a new instance is added
-                    #if action.get("operation") == "addInstances":
-                    service_id = action.get("serviceImplementationName")
-                    new_instance_id = result.get("newInstance", {}).get("instanceId")
-                    if service_id and new_instance_id:
-                        self.knowledge.standby_pool[service_id] = new_instance_id
-                        print(f"Updated standby pool for {service_id} with new instance ID: {new_instance_id}")
-                except requests.RequestException as e:
-                    error_message = f"Failed to execute addInstances action {action}: {e}"
-                    results.append({"action": action, "error": error_message})
-                    print(error_message)
-                        # Execute removeInstance actions
+        add_actions = [action for action in plan_data if action.get("operation") == "addInstances"]
+        known_instances = set(self.knowledge.index.instances)
+        added_implementations = set()
+        if self.use_batch_execute and add_actions:
+            add_results = self._execute_batch(add_actions)
+        else:
+            add_results = [self._execute_add_instance(action) for action in add_actions]
+        for action, result in zip(add_actions, add_results):
+            results.append(result)
+            if "error" not in result:
+                self._record_added_instance(action, result)
+                added_implementations.add(action.get("serviceImplementationName"))
+
+        # Wait for the new instances to power up fully, instead of a fixed sleep
+        if added_implementations:
+            self.readiness.wait_for_new_instances(added_implementations, known_instances)
 
         # Execute changeLBWeights actions
-        time.sleep(20) #wait for instance to power up fully
-        for adjustment in load_balancer_adjustments:
-    
-            if adjustment.get("operation") == "changeLBWeights":
-                print(f"Executing changeLBWeights action: {adjustment}")
-                try:
-                    # Construct the request body
-                    service_id = adjustment.get("serviceID")
-                    updated_instances = self.get_instances_for_service(service_id)
-
-                    if not updated_instances:
-                        raise ValueError(f"No instances available for service {service_id}. Cannot update load balancer weights.")
-
-                    # Calculate weights
-                    new_weights = 1.0 / len(updated_instances)
-                    updated_weights = {instance: new_weights for instance in updated_instances}
-
-                    # Build request body
-                    request_body = {
-                        "weightsId": service_id,
-                        "weights": updated_weights,
-                        "instancesToRemoveWeightOf": adjustment.get("instancesToRemoveWeightOf", [])
-                    }
-
-                    # Debugging
-                    print(f"DEBUG: Request body sent to load balancer: {json.dumps(request_body, indent=2)}")
-
-                    # Send the API request
-                    response = requests.post(self.lb_url, headers={'Content-Type': 'application/json'}, json=request_body)
-                    response.raise_for_status()
-
-                    result = response.json()
+        adjustments = [adjustment for adjustment in load_balancer_adjustments
+                       if adjustment.get("operation") == "changeLBWeights"]
+        if self.use_batch_execute and adjustments:
+            results.extend(self._execute_lb_batch(adjustments))
+        else:
+            for adjustment in adjustments:
+                result = self._execute_lb_adjustment(adjustment)
+                if result is not None:
                     results.append(result)
-                    print(f"Load balancer weights updated successfully: {result}")
-
-                except requests.RequestException as e:
-                    error_message = f"Failed to execute changeLBWeights action {adjustment}: {e}"
-                    if e.response:
-                        error_message += f" | Response: {e.response.text}"
-                    results.append({"adjustment": adjustment, "error": error_message})
-                    print(error_message)
-                except ValueError as ve:
-                    print(f"ValueError: {ve}")
 
         # Store execution results in the Knowledge base
         self.knowledge.adaptation_options = results
+        for result in results:
+            self._journal("execution", result)
+
+    @instrument_phase("execute_async")
+    def execute_async(self):
+        """
+        Queues the planned actions on the background ActionExecutor and returns right away, so that monitor
+        and analyze keep running while the adaptation is in flight. Load balancer changes wait for the instance
+        additions of the same plan and for the new instances to be ready. Actions already in flight are not queued again.
+        Returns the futures of the queued actions; their outcomes end up in Knowledge.execution_results and are
+        applied to the rest of the Knowledge by apply_finished_actions(), on the thread running the loop.
+        """
+        self.apply_finished_actions()
+        self._journal_plan()
+        plan_data = self.without_in_flight(self.knowledge.plan_data)
+        load_balancer_adjustments = self.without_in_flight(self.knowledge.adaptation_options)
+        if not plan_data and not load_balancer_adjustments:
+            logger.info("No new planned actions. No adaptation required at this time.")
+            return []
+
+        known_instances = set(self.knowledge.index.instances)
+        add_futures = {self.executor.submit(action, self._execute_add_instance): action
+                       for action in plan_data if action.get("operation") == "addInstances"}
+
+        adjustments = [adjustment for adjustment in load_balancer_adjustments
+                       if adjustment.get("operation") == "changeLBWeights"]
+        if not adjustments:
+            return list(add_futures)
+
+        def wait_for_new_instances():
+            added_implementations = {action.get("serviceImplementationName")
+                                     for future, action in add_futures.items()
+                                     if not future.exception() and "error" not in future.result()}
+            if added_implementations:
+                self.readiness.wait_for_new_instances(added_implementations, known_instances)
+
+        # a single readiness wait per plan, the load balancer changes are queued once it is over
+        ready = self.executor.after(list(add_futures), wait_for_new_instances)
+        lb_futures = [self.executor.submit(adjustment, self._execute_lb_adjustment, depends_on=[ready])
+                      for adjustment in adjustments]
+        return list(add_futures) + lb_futures
+
+    def apply_finished_actions(self):
+        """
+        Applies the outcomes of the actions finished on the ActionExecutor since the last call to the Knowledge,
+        e.g. the standby pool of added instances. Called from the MAPE-K loop, so workers never write it.
+        """
+        for outcome in self.executor.collect_finished():
+            action = outcome["action"]
+            if outcome["status"] == "done" and action.get("operation") == "addInstances":
+                self._record_added_instance(action, outcome["result"])
+
+    def watch_containers(self, tracker):
+        """
+        Follows the container state of the exemplar: containers that die or turn unhealthy are handed to the loop
+        as soon as Docker reports it, which wakes wait_for_next_tick() and records them in Knowledge.down_containers
+        on the next apply_container_changes(), so analyze() marks their instances as failed without waiting for the probe.
+        """
+        self.container_tracker = tracker
+        tracker.subscribe(self._on_container_change)
+        # containers that were already down before any event
+        for name in tracker.statuses():
+            if tracker.is_down(name):
+                self._on_container_change(name, {"status": tracker.status(name), "health": tracker.health(name)}, "snapshot")
+
+    def _on_container_change(self, name, state, action):
+        # called on the tracker's thread, so the change is queued for the MAPE-K loop, which owns the Knowledge
+        down = state["status"] in DOWN or state["health"] in DOWN or action == "oom"
+        if down:
+            logger.warning("Container %s is down (%s).", name, action)
+        self.container_changes.put((name, dict(state, down=down), action, time.time()))
+        if down:
+            self.container_down_event.set()
+
+    def apply_container_changes(self):
+        """
+        Applies the container changes queued by the tracker since the last call to Knowledge.down_containers and
+        returns the names of the containers that went down. Called from the MAPE-K loop.
+        """
+        went_down = []
+        while True:
+            try:
+                name, state, action, timestamp = self.container_changes.get_nowait()
+            except queue.Empty:
+                return went_down
+            if state["down"]:
+                self.knowledge.down_containers[name] = {"status": state["status"], "health": state["health"],
+                                                        "action": action, "timestamp": timestamp}
+                went_down.append(name)
+            else:
+                self.knowledge.down_containers.pop(name, None)
+
+    def wait_for_next_tick(self, timeout):
+        """Sleeps up to timeout seconds between two iterations of the loop, less when a watched container goes down."""
+        woken = self.container_down_event.wait(timeout)
+        self.container_down_event.clear()
+        return woken
+
+    def instance_container_down(self, instance_id):
+        """Whether the container hosting an instance "implementation@container:port" is recorded as down."""
+        if not instance_id:
+            return False
+        return instance_id.rpartition("@")[2].rpartition(":")[0] in self.knowledge.down_containers
+
+    def without_in_flight(self, actions):
+        """The actions of a plan that are not already queued or running on the ActionExecutor."""
+        return [action for action in actions or [] if not self.executor.is_in_flight(action)]
+
+    def _execute_add_instance(self, action):
+        logger.info("Executing addInstances action: %s", action)
+        try:
+            response = get_http_session(self.execute_url).post(self.execute_url, json=action)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            error_message = f"Failed to execute addInstances action {action}: {e}"
+            logger.error(error_message)
+            return {"action": action, "error": error_message}
+
+    def _lb_request_body(self, adjustment, monitor_data=None):
+        """
+        The load balancer request of a changeLBWeights adjustment: equal weights over the instances the service has
+        in monitor_data (fetched from /monitor when not given). Raises ValueError when the service has no instances.
+        """
+        service_id = adjustment.get("serviceID")
+        updated_instances = self.get_instances_for_service(service_id, monitor_data)
+
+        if not updated_instances:
+            raise ValueError(f"No instances available for service {service_id}. Cannot update load balancer weights.")
+
+        # Calculate weights
+        new_weights = 1.0 / len(updated_instances)
+        updated_weights = {instance: new_weights for instance in updated_instances}
+
+        return {
+            "weightsId": service_id,
+            "weights": updated_weights,
+            "instancesToRemoveWeightOf": adjustment.get("instancesToRemoveWeightOf", [])
+        }
+
+    def _execute_lb_adjustment(self, adjustment):
+        logger.info("Executing changeLBWeights action: %s", adjustment)
+        try:
+            request_body = self._lb_request_body(adjustment)
+
+            logger.debug("Request body sent to load balancer: %s", LazyJSON(request_body, indent=2))
+
+            # Send the API request
+            response = get_http_session(self.lb_url).post(self.lb_url, headers={'Content-Type': 'application/json'}, json=request_body)
+            response.raise_for_status()
+
+            result = response.json()
+            logger.info("Load balancer weights updated successfully: %s", result)
+            return result
+
+        except requests.RequestException as e:
+            error_message = f"Failed to execute changeLBWeights action {adjustment}: {e}"
+            if e.response:
+                error_message += f" | Response: {e.response.text}"
+            logger.error(error_message)
+            return {"adjustment": adjustment, "error": error_message}
+        except ValueError as ve:
+            logger.warning("ValueError: %s", ve)
+            return None
+
+    def _execute_lb_batch(self, adjustments):
+        """
+        Sends the changeLBWeights adjustments to /execute/batch in one request, with the weights computed from a
+        single /monitor payload. Adjustments of services without instances are skipped like in _execute_lb_adjustment.
+        """
+        monitor_data = self._perform_get_request("monitor")
+        actions = []
+        for adjustment in adjustments:
+            try:
+                actions.append(dict(self._lb_request_body(adjustment, monitor_data), operation="changeLBWeights"))
+            except ValueError as ve:
+                logger.warning("ValueError: %s", ve)
+        return self._execute_batch(actions) if actions else []
+
+    def _record_added_instance(self, action, result):
+        logger.info("Instance added successfully: %s", result)
+
+        # Update standby pool if a new instance is added
+        service_id = action.get("serviceImplementationName")
+        new_instance_id = result.get("newInstance", {}).get("instanceId")
+        if service_id and new_instance_id:
+            self.knowledge.standby_pool[service_id] = new_instance_id
+            logger.info("Updated standby pool for %s with new instance ID: %s", service_id, new_instance_id)
+
+    def _execute_batch(self, actions):
+        """
+        Sends all actions to /execute/batch in a single request and returns one result per action,
+        in the same form as the one-by-one execution.
+        """
+        batch_url = self.execute_url.rstrip('/') + "/batch"
+        logger.info("Executing %d actions in one batch: %s", len(actions), actions)
+        try:
+            response = get_http_session(batch_url).post(batch_url, json={"actions": actions})
+            response.raise_for_status()
+            batch_results = response.json()["results"]
+        except requests.RequestException as e:
+            error_message = f"Failed to execute batch {actions}: {e}"
+            logger.error(error_message)
+            return [{"action": action, "error": error_message} for action in actions]
+        results = []
+        for action, batch_result in zip(actions, batch_results):
+            if batch_result["status"] == 200:
+                results.append(batch_result["response"])
+            else:
+                error_message = f"Failed to execute {action.get('operation')} action {action}: {batch_result['error']}"
+                results.append({"action": action, "error": error_message})
+                logger.error(error_message)
+        return results
 
     
     def manage_standby_pool(self, critical_services=None):
@@ -188,7 +496,7 @@ class Strategy(ABC):
 
             # Add instances to fill the pool
             if pool_deficit > 0:
-                print(f"Adding {pool_deficit} standby instances for {service_id}.")
+                logger.info("Adding %d standby instances for %s.", pool_deficit, service_id)
                 for _ in range(pool_deficit):
                     new_instance = f"{service_id}-standby-{len(current_pool) + _}"
                     actions.append({
@@ -201,7 +509,7 @@ class Strategy(ABC):
             # Remove unused instances
             while len(current_pool) > size:
                 removed_instance = current_pool.pop()
-                print(f"Removing excess standby instance {removed_instance} for {service_id}.")
+                logger.info("Removing excess standby instance %s for %s.", removed_instance, service_id)
 
         return actions
     
@@ -210,48 +518,15 @@ class Strategy(ABC):
         Computes the average response time and availability within a time window
         by comparing the latest snapshot and the oldest snapshot using httpMetrics only.
         """
-        successful_requests_duration = 0
-        successful_requests_count = 0
-        total_requests_count = 0
-
-        # Compare httpMetrics between latest and oldest snapshots
-        latest_http_metrics = latest_snapshot.get("httpMetrics", {})
-        oldest_http_metrics = oldest_snapshot.get("httpMetrics", {})
-
-        # print(f"DEBUG: Latest snapshot httpMetrics: {latest_http_metrics}")
-        # print(f"DEBUG: Oldest snapshot httpMetrics: {oldest_http_metrics}")
-
-        for endpoint, metrics in latest_http_metrics.items():
-            # Extract metrics for SUCCESS outcome
-            latest_success = metrics.get("outcomeMetrics", {}).get("SUCCESS", {})
-            oldest_success = oldest_http_metrics.get(endpoint, {}).get("outcomeMetrics", {}).get("SUCCESS", {})
-
-            # Increment successful duration and count
-            duration_diff = latest_success.get("totalDuration", 0) - oldest_success.get("totalDuration", 0)
-            count_diff = latest_success.get("count", 0) - oldest_success.get("count", 0)
+        return compute_metrics_window(latest_snapshot, oldest_snapshot)
 
-            if duration_diff < 0 or count_diff < 0:
-                print(f"WARNING: Negative difference detected for endpoint {endpoint}. Skipping this endpoint.")
-                continue
-
-            successful_requests_duration += duration_diff
-            successful_requests_count += count_diff
-
-            # Calculate total requests by summing all outcomes
-            for outcome, outcome_metrics in metrics.get("outcomeMetrics", {}).items():
-                latest_total = outcome_metrics.get("count", 0)
-                oldest_total = oldest_http_metrics.get(endpoint, {}).get("outcomeMetrics", {}).get(outcome, {}).get("count", 0)
-                total_requests_count += latest_total - oldest_total
-
-        # Calculate average response time
-        avg_response_time = successful_requests_duration / successful_requests_count if successful_requests_count > 0 else 0
-        print(f"Instances Average Response Time: {avg_response_time}")
-
-        # Calculate availability
-        availability = (successful_requests_count / total_requests_count) * 100 if total_requests_count > 0 else 0
-        print(f"Instances Availability: {availability}")
-
-        return avg_response_time, availability
+    def compute_qos(self):
+        """
+        Returns the QoS of every monitored instance over the sliding window of self.rates,
+        see UPISAS.qos.QoSReport.
+        """
+        self.rates.expire()
+        return self.rates.report()
 
     
     # def compute_metrics_window(self):
@@ -305,21 +580,25 @@ class Strategy(ABC):
         url = '/'.join([self.exemplar.base_endpoint, endpoint_suffix])
         response = get_response_for_get_request(url)
         if response.status_code == 404:
-            logging.error("Please check that the endpoint you are trying to reach actually exists.")
+            logger.error("Please check that the endpoint you are trying to reach actually exists.")
             raise EndpointNotReachable
         return response.json()
     
     
-    def get_instances_for_service(self, service_id):
-        fresh_data = self._perform_get_request("monitor")
-        self.knowledge.monitored_data.update(fresh_data)
-        service_data = self.knowledge.monitored_data.get(service_id)
-        if not service_data:
-            print(f"[get_instances_for_service]\tService '{service_id}' not found in monitored data.")
+    def get_instances_for_service(self, service_id, fresh_data=None):
+        """
+        The instances of a service in a fresh /monitor payload. Runs on ActionExecutor workers too,
+        so the payload is only read here and never stored in the Knowledge.
+        """
+        if fresh_data is None:
+            fresh_data = self._perform_get_request("monitor")
+        service_data = fresh_data.get(service_id)
+        if not isinstance(service_data, dict):
+            logger.warning("Service '%s' not found in monitored data.", service_id)
             return []
-        instances = service_data.get('instances', [])
+        instances = service_data.get("instances") or []
         if not instances:
-            print(f"[get_instances_for_service]\tNo instances found for service '{service_id}'.")
+            logger.warning("No instances found for service '%s'.", service_id)
         return instances
 
     @abstractmethod
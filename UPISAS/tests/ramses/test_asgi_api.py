@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ramses", "Interface"))
+import asgi_api  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+
+class TestAsgiInterface(unittest.TestCase):
+    """
+    Test cases for the ASGI variant of the RAMSES Interface, with the sefa-probe calls patched out.
+    """
+
+    def setUp(self):
+        asgi_api.monitor_cache.invalidate()
+        self.client = TestClient(asgi_api.app)
+
+    def test_monitor_is_cached(self):
+        collect = mock.AsyncMock(return_value={"ORDERING-SERVICE": {"snapshot": []}})
+        with mock.patch.object(asgi_api, "collect_monitor_data", collect):
+            first = self.client.get("/monitor")
+            second = self.client.get("/monitor")
+        self.assertEqual(first.json(), {"ORDERING-SERVICE": {"snapshot": []}})
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertEqual(collect.await_count, 1)
+
+    def test_invalidate_during_refresh_is_not_lost(self):
+        payloads = iter([{"a": 1}, {"a": 2}])
+
+        async def slow_collect():
+            await asyncio.sleep(0.05)
+            return next(payloads)
+
+        async def scenario():
+            cache = asgi_api.AsyncMonitorCache(ttl=10)
+            first = asyncio.ensure_future(cache.get())
+            waiter = asyncio.ensure_future(cache.get())
+            await asyncio.sleep(0.01)
+            cache.invalidate()
+            return (await first)[0], (await waiter)[0], (await cache.get())[0]
+
+        with mock.patch.object(asgi_api, "collect_monitor_data", slow_collect):
+            first, waiter, latest = asyncio.run(scenario())
+        self.assertEqual(first, {"a": 1})
+        self.assertEqual(waiter, {"a": 2})
+        self.assertEqual(latest, {"a": 2})
+
+    def test_empty_fetch_serves_last_good_payload(self):
+        async def scenario():
+            cache = asgi_api.AsyncMonitorCache(ttl=0)
+            return [await cache.get() for _ in range(3)]
+
+        versions = asgi_api.MonitorVersionLog(retention=4)
+        collect = mock.AsyncMock(side_effect=[{"a": 1}, {}, RuntimeError("probe down")])
+        with mock.patch.object(asgi_api, "collect_monitor_data", collect), \
+                mock.patch.object(asgi_api, "monitor_versions", versions):
+            results = asyncio.run(scenario())
+        self.assertEqual([(data, stale) for data, _, _, _, stale in results],
+                         [({"a": 1}, False), ({"a": 1}, True), ({"a": 1}, True)])
+        self.assertEqual(versions.version, 1)
+
+    def test_monitor_delta_starts_with_full_payload(self):
+        collect = mock.AsyncMock(return_value={"ORDERING-SERVICE": {"snapshot": []}})
+        with mock.patch.object(asgi_api, "collect_monitor_data", collect):
+            delta = self.client.get("/monitor/delta").json()
+        self.assertTrue(delta["full"])
+        self.assertEqual(delta["services"], {"ORDERING-SERVICE": {"snapshot": []}})
+
+    def test_execute_rejects_invalid_operation(self):
+        response = self.client.post("/execute", json={"operation": "unknown"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid operation"})
+
+    def test_execute_rejects_missing_fields(self):
+        response = self.client.post("/execute", json={"operation": "addInstances"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Missing required fields for addInstances"})
+
+
+if __name__ == '__main__':
+    unittest.main()
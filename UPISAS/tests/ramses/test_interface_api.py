@@ -0,0 +1,468 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ramses", "Interface"))
+import api  # noqa: E402
+from UPISAS.knowledge_ramses import Knowledge  # noqa: E402
+from UPISAS.ramses_simulator import RamsesSimulator  # noqa: E402
+
+
+ARCHITECTURE = {
+    "ORDERING-SERVICE": {"serviceId": "ORDERING-SERVICE", "currentImplementationId": "ordering-service",
+                         "instances": ["ordering-service@sefa-ordering-service:58086"]},
+    "PAYMENT-PROXY-SERVICE": {"serviceId": "PAYMENT-PROXY-SERVICE", "currentImplementationId": "payment-proxy-1-service",
+                              "instances": ["payment-proxy-1-service@sefa-payment-proxy-1-service:58090"]},
+}
+
+
+class TestInterfaceMonitor(unittest.TestCase):
+    """
+    Test cases for the /monitor endpoint of the RAMSES Interface, with the sefa-probe calls patched out.
+    """
+
+    def setUp(self):
+        self.client = api.app.test_client()
+        # a fresh cache, so that no last good payload of another test stands in for a failed fetch
+        api.monitor_cache = api.MonitorCache(api.refresh_monitor_data, api.MONITOR_CACHE_TTL)
+
+    def test_monitor_fans_out_probe_calls_concurrently(self):
+        def slow_snapshot(service_name):
+            time.sleep(0.2)
+            return [{"instanceId": service_name}]
+
+        def slow_configuration(service_name, implementation_id):
+            time.sleep(0.2)
+            return {"implementationId": implementation_id}
+
+        with mock.patch.object(api, "fetch_system_architecture", return_value=ARCHITECTURE), \
+                mock.patch.object(api, "fetch_service_snapshot", side_effect=slow_snapshot), \
+                mock.patch.object(api, "fetch_instance_configuration", side_effect=slow_configuration):
+            start = time.perf_counter()
+            data = self.client.get("/monitor").get_json()
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(data["ORDERING-SERVICE"]["snapshot"], [{"instanceId": "ORDERING-SERVICE"}])
+        self.assertEqual(data["PAYMENT-PROXY-SERVICE"]["instanceConfig"],
+                         {"implementationId": "payment-proxy-1-service"})
+
+    def test_monitor_waits_for_calls_queued_behind_the_pool(self):
+        architecture = {f"SERVICE-{index}": {"serviceId": f"SERVICE-{index}", "currentImplementationId": f"service-{index}",
+                                             "instances": []} for index in range(20)}
+
+        def slow_snapshot(service_name):
+            time.sleep(0.4)
+            return [{"instanceId": service_name}]
+
+        # 40 calls on 16 workers take three rounds, longer than PROBE_TIMEOUT + 1
+        with mock.patch.object(api, "PROBE_TIMEOUT", 0.05), \
+                mock.patch.object(api, "fetch_system_architecture", return_value=architecture), \
+                mock.patch.object(api, "fetch_service_snapshot", side_effect=slow_snapshot), \
+                mock.patch.object(api, "fetch_instance_configuration", side_effect=slow_snapshot):
+            data = self.client.get("/monitor").get_json()
+        self.assertTrue(all(service["snapshot"] is not None for service in data.values()))
+
+    def test_monitor_keeps_services_that_answered(self):
+        def failing_snapshot(service_name):
+            if service_name == "PAYMENT-PROXY-SERVICE":
+                raise RuntimeError("probe down")
+            return [{"instanceId": service_name}]
+
+        with mock.patch.object(api, "fetch_system_architecture", return_value=ARCHITECTURE), \
+                mock.patch.object(api, "fetch_service_snapshot", side_effect=failing_snapshot), \
+                mock.patch.object(api, "fetch_instance_configuration", return_value={}):
+            data = self.client.get("/monitor").get_json()
+        self.assertEqual(data["ORDERING-SERVICE"]["snapshot"], [{"instanceId": "ORDERING-SERVICE"}])
+        self.assertIsNone(data["PAYMENT-PROXY-SERVICE"]["snapshot"])
+
+    def test_monitor_without_architecture(self):
+        with mock.patch.object(api, "fetch_system_architecture", return_value=None):
+            data = self.client.get("/monitor").get_json()
+        self.assertEqual(data, {})
+
+    def test_failed_fetch_serves_last_good_payload(self):
+        api.monitor_versions = api.MonitorVersionLog(retention=4)
+        with mock.patch.object(api.monitor_cache, "ttl", 0):
+            with mock.patch.object(api, "collect_monitor_data", return_value={"ORDERING-SERVICE": _service([])}):
+                first = self.client.get("/monitor/delta").get_json()
+            with mock.patch.object(api, "collect_monitor_data", return_value={}):
+                response = self.client.get("/monitor")
+                delta = self.client.get("/monitor/delta", query_string={"since": first["version"]}).get_json()
+        self.assertEqual(response.get_json(), {"ORDERING-SERVICE": _service([])})
+        self.assertEqual(response.headers["X-Cache"], "STALE")
+        self.assertEqual(api.monitor_versions.version, 1)
+        self.assertEqual(delta["version"], first["version"])
+        self.assertEqual(delta["removed"], [])
+
+
+class TestMonitorCache(unittest.TestCase):
+    """
+    Test cases for the TTL cache in front of the probe crawl.
+    """
+
+    def test_second_request_within_ttl_is_a_hit(self):
+        fetch = mock.Mock(return_value={"a": 1})
+        cache = api.MonitorCache(fetch, ttl=10)
+        self.assertFalse(cache.get()[3])
+        data, body, age, hit, stale = cache.get()
+        self.assertTrue(hit)
+        self.assertEqual(body, '{"a": 1}')
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_expired_entry_is_refetched(self):
+        fetch = mock.Mock(return_value={"a": 1})
+        cache = api.MonitorCache(fetch, ttl=0)
+        cache.get()
+        self.assertFalse(cache.get()[3])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_concurrent_requests_share_one_fetch(self):
+        def slow_fetch():
+            time.sleep(0.2)
+            return {"a": 1}
+        fetch = mock.Mock(side_effect=slow_fetch)
+        cache = api.MonitorCache(fetch, ttl=0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sum(1 for result in results if not result[3]), 1)
+
+    def test_failed_fetch_is_not_cached(self):
+        fetch = mock.Mock(side_effect=[RuntimeError("probe down"), {"a": 1}])
+        cache = api.MonitorCache(fetch, ttl=10)
+        with self.assertRaises(RuntimeError):
+            cache.get()
+        self.assertEqual(cache.get()[0], {"a": 1})
+
+    def test_failed_or_empty_fetch_serves_last_good_payload_as_stale(self):
+        fetch = mock.Mock(side_effect=[{"a": 1}, {}, RuntimeError("probe down"), {"a": 2}])
+        cache = api.MonitorCache(fetch, ttl=0)
+        self.assertEqual(cache.get()[4], False)
+        for _ in range(2):
+            data, _, _, hit, stale = cache.get()
+            self.assertEqual(data, {"a": 1})
+            self.assertFalse(hit)
+            self.assertTrue(stale)
+        self.assertEqual(cache.get()[0::4], ({"a": 2}, False))
+        self.assertEqual(fetch.call_count, 4)
+
+    def test_invalidate_during_refresh_discards_the_fetch(self):
+        started, release = threading.Event(), threading.Event()
+        payloads = iter([{"a": 1}, {"a": 2}])
+
+        def slow_fetch():
+            started.set()
+            release.wait()
+            return next(payloads)
+        cache = api.MonitorCache(slow_fetch, ttl=10)
+        first = []
+        thread = threading.Thread(target=lambda: first.append(cache.get()))
+        thread.start()
+        started.wait()
+        cache.invalidate()
+        release.set()
+        thread.join()
+        self.assertEqual(first[0][0], {"a": 1})
+        data, _, _, hit, _ = cache.get()
+        self.assertEqual(data, {"a": 2})
+        self.assertFalse(hit)
+
+    def test_waiter_does_not_return_invalidated_payload(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait()
+            return {"a": 1}
+        cache = api.MonitorCache(slow_fetch, ttl=10)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        cache.invalidate()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([result[0] for result in results], [{"a": 1}] * 3)
+
+    def test_monitor_endpoint_reports_cache_headers(self):
+        client = api.app.test_client()
+        api.monitor_cache.invalidate()
+        with mock.patch.object(api, "collect_monitor_data", return_value={"ORDERING-SERVICE": {}}):
+            first = client.get("/monitor")
+            second = client.get("/monitor")
+        self.assertEqual(first.headers["X-Cache"], "MISS")
+        self.assertEqual(second.headers["X-Cache"], "HIT")
+        self.assertIn("X-Cache-Age", second.headers)
+
+
+class TestSchemaCache(unittest.TestCase):
+    """
+    Test cases for the cached schema files served by the Interface.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "schema.json")
+        with open(self.file, "w") as schema_file:
+            json.dump({"type": "object"}, schema_file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_schema_is_parsed_once(self):
+        with mock.patch.object(api, "SCHEMA_CHECK_INTERVAL", 60):
+            self.assertEqual(api.get_schema(self.file), {"type": "object"})
+            with mock.patch("builtins.open", side_effect=AssertionError("file re-read")):
+                self.assertEqual(api.get_schema_body(self.file), '{"type": "object"}')
+
+    def test_changed_schema_is_reloaded(self):
+        with mock.patch.object(api, "SCHEMA_CHECK_INTERVAL", 0):
+            api.get_schema(self.file)
+            with open(self.file, "w") as schema_file:
+                json.dump({"type": "array"}, schema_file)
+            os.utime(self.file, ns=(0, os.stat(self.file).st_mtime_ns + 10 ** 9))
+            self.assertEqual(api.get_schema(self.file), {"type": "array"})
+
+    def test_missing_schema(self):
+        self.assertIsNone(api.get_schema(os.path.join(self.directory.name, "missing.json")))
+
+
+class TestExecuteBatch(unittest.TestCase):
+    """
+    Test cases for /execute/batch.
+    """
+
+    def setUp(self):
+        self.client = api.app.test_client()
+        self.remove = {"operation": "removeInstance", "serviceImplementationName": "ordering-service",
+                       "address": "sefa-ordering-service", "port": 58086}
+        self.add = {"operation": "addInstances", "serviceImplementationName": "ordering-service",
+                    "numberOfInstances": 1}
+        self.weights = {"operation": "changeLBWeights", "weightsId": "ORDERING-SERVICE", "weights": {"a": 1.0}}
+
+    def test_load_balancer_changes_wait_for_instance_changes(self):
+        other_add = dict(self.add, serviceImplementationName="payment-proxy-1-service")
+        self.assertEqual(api.batch_stages([self.add, other_add, self.weights, self.add]), [[0, 1], [2], [3]])
+
+    def test_writes_to_the_same_target_keep_their_order(self):
+        self.assertEqual(api.batch_stages([self.remove, self.add]), [[0], [1]])
+        self.assertEqual(api.batch_stages([self.weights, dict(self.weights, weights={"b": 1.0})]), [[0], [1]])
+        self.assertEqual(api.batch_stages([self.remove, dict(self.remove)]), [[0], [1]])
+
+    def test_independent_actions_share_a_stage(self):
+        other_remove = dict(self.remove, port=58087)
+        other_weights = dict(self.weights, weightsId="PAYMENT-PROXY-SERVICE")
+        self.assertEqual(api.batch_stages([self.remove, other_remove]), [[0, 1]])
+        self.assertEqual(api.batch_stages([self.weights, other_weights]), [[0, 1]])
+        # a later action only waits for the actions it conflicts with
+        other_add = dict(self.add, serviceImplementationName="payment-proxy-1-service")
+        self.assertEqual(api.batch_stages([self.remove, self.add, other_add]), [[0, 2], [1]])
+
+    def test_results_are_returned_in_request_order(self):
+        calls = []
+
+        def perform(data):
+            calls.append(data["operation"])
+            if data["operation"] == "removeInstance":
+                return 500, {"error": "instance manager down"}
+            return 200, {"operation": data["operation"]}
+
+        with mock.patch.object(api, "perform_execute", side_effect=perform):
+            response = self.client.post("/execute/batch", json={"actions": [self.remove, self.add, self.weights]})
+        results = response.get_json()["results"]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual(results[0]["error"], "instance manager down")
+        self.assertEqual(results[1]["response"], {"operation": "addInstances"})
+        self.assertEqual(calls[-1], "changeLBWeights")
+
+    def test_invalid_action_does_not_fail_the_batch(self):
+        with mock.patch.object(api, "perform_execute", return_value=(200, {})):
+            results = self.client.post("/execute/batch", json=[{"operation": "unknown"}]).get_json()["results"]
+        self.assertEqual(results[0]["status"], 200)
+        results = self.client.post("/execute/batch", json=[{"operation": "unknown"}]).get_json()["results"]
+        self.assertEqual(results[0], {"index": 0, "operation": "unknown", "status": 400, "error": "Invalid operation"})
+
+    def test_batch_must_be_a_list(self):
+        response = self.client.post("/execute/batch", json={"operation": "addInstances"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_json_body_gets_a_json_error(self):
+        for path in ("/execute", "/execute/batch"):
+            response = self.client.post(path, data="not json", content_type="text/plain")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.get_json())
+
+
+def _service(snapshots, implementation="ordering-service"):
+    return {"serviceId": "ORDERING-SERVICE", "currentImplementationId": implementation,
+            "instances": [snapshot["instanceId"] for snapshot in snapshots], "snapshot": snapshots,
+            "instanceConfig": {}}
+
+
+class TestMonitorDelta(unittest.TestCase):
+    """
+    Test cases for /monitor/delta and for applying its responses to the client Knowledge.
+    """
+
+    def setUp(self):
+        self.client = api.app.test_client()
+        api.monitor_cache.invalidate()
+        api.monitor_versions = api.MonitorVersionLog(retention=4)
+        self.old = {"ORDERING-SERVICE": _service([{"instanceId": "a", "cpuUsage": 0.1, "booting": False},
+                                                  {"instanceId": "b", "cpuUsage": 0.2, "booting": False}]),
+                    "RESTAURANT-SERVICE": _service([{"instanceId": "r", "cpuUsage": 0.3}])}
+        self.new = {"ORDERING-SERVICE": _service([{"instanceId": "a", "cpuUsage": 0.9, "booting": False},
+                                                  {"instanceId": "c", "cpuUsage": 0.0, "booting": True}]),
+                    "RESTAURANT-SERVICE": _service([{"instanceId": "r", "cpuUsage": 0.3}]),
+                    "DELIVERY-SERVICE": _service([{"instanceId": "d"}])}
+
+    def test_diff_only_contains_changes(self):
+        delta = api.diff_monitor_payload(self.old, self.new)
+        self.assertEqual(list(delta["added"]), ["DELIVERY-SERVICE"])
+        self.assertNotIn("RESTAURANT-SERVICE", delta["changed"])
+        snapshot_delta = delta["changed"]["ORDERING-SERVICE"]["snapshot"]
+        self.assertEqual(snapshot_delta["changed"], {"a": {"set": {"cpuUsage": 0.9}, "unset": []}})
+        self.assertEqual(list(snapshot_delta["added"]), ["c"])
+        self.assertEqual(snapshot_delta["removed"], ["b"])
+
+    def test_applying_diff_rebuilds_payload(self):
+        knowledge = Knowledge(dict(), dict(), dict(), dict())
+        knowledge.apply_monitor_delta({"version": "1:1", "full": True, "services": json_copy(self.old)})
+        delta = api.diff_monitor_payload(self.old, self.new)
+        delta.update({"version": "1:2", "full": False})
+        self.assertEqual(knowledge.apply_monitor_delta(json_copy(delta)), self.new)
+        self.assertEqual(knowledge.monitor_cursor, "1:2")
+
+    def test_endpoint_serves_full_payload_then_deltas(self):
+        knowledge = Knowledge(dict(), dict(), dict(), dict())
+        with mock.patch.object(api, "collect_monitor_data", return_value=self.old):
+            first = self.client.get("/monitor/delta").get_json()
+        self.assertTrue(first["full"])
+        knowledge.apply_monitor_delta(first)
+        api.monitor_cache.invalidate()
+        with mock.patch.object(api, "collect_monitor_data", return_value=self.new):
+            second = self.client.get("/monitor/delta", query_string={"since": first["version"]}).get_json()
+        self.assertFalse(second["full"])
+        self.assertEqual(knowledge.apply_monitor_delta(second), self.new)
+
+    def test_unknown_cursor_gets_full_payload(self):
+        with mock.patch.object(api, "collect_monitor_data", return_value=self.old):
+            delta = self.client.get("/monitor/delta", query_string={"since": "0:1"}).get_json()
+        self.assertTrue(delta["full"])
+        self.assertEqual(delta["services"], self.old)
+
+
+class TestMonitorStream(unittest.TestCase):
+    """
+    Test cases for the /monitor/stream Server-Sent Events feed.
+    """
+
+    def setUp(self):
+        self.client = api.app.test_client()
+        api.monitor_cache.invalidate()
+        api.monitor_versions = api.MonitorVersionLog(retention=4)
+        api.monitor_stream_poller.interval = 0.05
+
+    def test_stream_pushes_full_payload_then_changes(self):
+        payloads = [{"ORDERING-SERVICE": _service([{"instanceId": "a", "cpuUsage": 0.1}])},
+                    {"ORDERING-SERVICE": _service([{"instanceId": "a", "cpuUsage": 0.5}])}]
+        calls = []
+
+        def collect():
+            calls.append(1)
+            return payloads[0] if len(calls) == 1 else payloads[1]
+
+        with mock.patch.object(api.monitor_cache, "ttl", 0), \
+                mock.patch.object(api, "collect_monitor_data", side_effect=collect):
+            response = self.client.get("/monitor/stream")
+            events = iter(response.response)
+            first = _parse_event(next(events))
+            second = _parse_event(next(events))
+            response.close()
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertTrue(first["full"])
+        self.assertFalse(second["full"])
+        knowledge = Knowledge(dict(), dict(), dict(), dict())
+        knowledge.apply_monitor_delta(first)
+        self.assertEqual(knowledge.apply_monitor_delta(second), payloads[1])
+
+    def test_strategy_reads_event_data(self):
+        from UPISAS.strategy_ramses import Strategy
+        response = mock.Mock()
+        response.iter_lines.return_value = iter([": keep-alive", "", "id: 1:1", "event: monitor",
+                                                 'data: {"a": 1}', "", 'data: {"b": 2}', ""])
+        self.assertEqual(list(Strategy._read_events(response)), ['{"a": 1}', '{"b": 2}'])
+
+
+class TestInterfaceAgainstSimulator(unittest.TestCase):
+    """
+    Test cases running the Interface against the RAMSES simulator instead of the compose stack.
+    """
+
+    def setUp(self):
+        self.simulator = RamsesSimulator(services=20, instances_per_service=3, boot_delay=0, probe_port=0,
+                                         instances_manager_port=0, config_manager_port=0).start()
+        self.addCleanup(self.simulator.stop)
+        ports = mock.patch.multiple(api, SEFA_PROBE=self.simulator.ports["probe"],
+                                    SEFA_INSTANCE_MANAGER=self.simulator.ports["instances_manager"],
+                                    SEFA_CONFIG_MANAGER=self.simulator.ports["config_manager"])
+        ports.start()
+        self.addCleanup(ports.stop)
+        self.client = api.app.test_client()
+        api.monitor_cache.invalidate()
+
+    def test_monitor_covers_every_service(self):
+        data = self.client.get('/monitor').get_json()
+        self.assertEqual(len(data), 20)
+        self.assertEqual(len(data["SERVICE-7"]["snapshot"]), 3)
+        self.assertIn("loadBalancerWeights", data["SERVICE-7"]["instanceConfig"])
+
+    def test_execute_add_instance(self):
+        response = self.client.post('/execute', json={"operation": "addInstances",
+                                                      "serviceImplementationName": "service-3",
+                                                      "numberOfInstances": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client.get('/monitor').get_json()["SERVICE-3"]["snapshot"]), 5)
+
+    def test_metrics_endpoint(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        api.instrumentation.enable()
+        self.addCleanup(api.instrumentation.disable)
+        self.addCleanup(api.instrumentation.registry.clear)
+        self.client.get('/monitor')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        self.assertIn('http_client_request_ms_count{method="GET",path="/rest/systemArchitecture"} 1', text)
+        self.assertIn('http_client_response_bytes_bucket{le="+Inf",method="GET",path="/rest/service/SERVICE-7/snapshot"} 1',
+                      text)
+
+
+def _parse_event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    data = [line[len("data: "):] for line in chunk.splitlines() if line.startswith("data: ")]
+    return json.loads("".join(data))
+
+
+def json_copy(data):
+    return json.loads(json.dumps(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import subprocess
+import time
+import unittest
+from unittest import mock
+
+from UPISAS.exceptions import ExemplarNotReady
+from UPISAS.exemplars.ramses import RAMSES, RamsesReadiness
+from UPISAS.ramses_simulator import RamsesSimulator
+
+
+def compose_ps(*containers):
+    return subprocess.CompletedProcess([], 0, stdout="\n".join(json.dumps(c) for c in containers), stderr="")
+
+
+def eureka_response(applications):
+    response = mock.Mock()
+    response.json.return_value = {"applications": {"application": applications}}
+    return response
+
+
+class TestRamsesReadiness(unittest.TestCase):
+    """
+    Test cases for the health-gated startup of the RAMSES exemplar.
+    """
+
+    def setUp(self):
+        self.readiness = RamsesReadiness("/tmp", interval=0.05)
+
+    def test_parse_compose_ps(self):
+        self.assertEqual(RamsesReadiness.parse_compose_ps('[{"Name": "a"}]'), [{"Name": "a"}])
+        self.assertEqual(RamsesReadiness.parse_compose_ps('{"Name": "a"}\n{"Name": "b"}\n'), [{"Name": "a"}, {"Name": "b"}])
+        self.assertEqual(RamsesReadiness.parse_compose_ps(""), [])
+
+    def test_containers_must_be_running_and_healthy(self):
+        with mock.patch("subprocess.run", return_value=compose_ps(
+                {"Name": "mysql", "State": "running", "Health": ""},
+                {"Name": "sefa-eureka", "State": "running", "Health": "starting"})):
+            self.assertEqual(self.readiness.check_containers(), (False, "waiting for sefa-eureka (starting)"))
+        with mock.patch("subprocess.run", return_value=compose_ps(
+                {"Name": "mysql", "State": "running", "Health": ""},
+                {"Name": "sefa-eureka", "State": "running", "Health": "healthy"})):
+            self.assertEqual(self.readiness.check_containers(), (True, "2 containers running"))
+
+    def test_eureka_applications_must_be_up(self):
+        applications = [{"name": "ORDERING-SERVICE", "instance": {"status": "UP"}},
+                        {"name": "PAYMENT-PROXY-SERVICE", "instance": [{"status": "STARTING"}]}]
+        with mock.patch("requests.get", return_value=eureka_response(applications)):
+            self.assertEqual(self.readiness.check_eureka(), (False, "not UP: PAYMENT-PROXY-SERVICE"))
+            self.readiness.expected_eureka_apps = ["ORDERING-SERVICE"]
+            self.assertEqual(self.readiness.check_eureka(), (True, "1 applications UP"))
+        with mock.patch("requests.get", return_value=eureka_response([])):
+            self.assertEqual(self.readiness.check_eureka(), (False, "not UP: ORDERING-SERVICE"))
+            self.readiness.expected_eureka_apps = None
+            self.assertEqual(self.readiness.check_eureka(), (False, "no applications registered"))
+
+    def test_interface_against_simulator(self):
+        simulator = RamsesSimulator(services=3, boot_delay=0, probe_port=0, instances_manager_port=0,
+                                    config_manager_port=0, interface_port=0).start()
+        self.addCleanup(simulator.stop)
+        self.readiness.interface_url = f"http://{simulator.host}:{simulator.ports['interface']}"
+        self.assertEqual(self.readiness.check_interface(), (True, "3 services monitored"))
+        self.readiness.interface_url = "http://127.0.0.1:1"
+        with self.assertRaises(ExemplarNotReady) as raised:
+            self.readiness.wait(timeout=0.1, checks=["interface"])
+        self.assertIn("interface: ConnectionError", str(raised.exception))
+
+    def test_checks_are_polled_concurrently(self):
+        started = time.monotonic()
+
+        def ready_after(delay):
+            return lambda: (time.monotonic() - started >= delay, f"after {delay}")
+
+        self.readiness.checks = {"a": ready_after(0.3), "b": ready_after(0.3), "c": ready_after(0.1)}
+        report = self.readiness.wait(timeout=5)
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertTrue(all(status["ready"] for status in report.values()))
+
+    def test_timeout_reports_every_failing_check(self):
+        self.readiness.checks = {"a": lambda: (True, "fine"), "b": lambda: (False, "still booting")}
+        with self.assertRaises(ExemplarNotReady) as raised:
+            self.readiness.wait(timeout=0.2)
+        message, report = raised.exception.args
+        self.assertIn("b: still booting", message)
+        self.assertNotIn("a:", message)
+        self.assertTrue(report["a"]["ready"])
+
+    def test_exited_interface_process_is_reported(self):
+        exemplar = RAMSES(auto_start=False)
+        exemplar.interface_process = mock.Mock(returncode=1, poll=mock.Mock(return_value=1))
+        self.assertEqual(exemplar.readiness.checks["interface"](), (False, "Interface process exited with code 1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
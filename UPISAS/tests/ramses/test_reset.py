@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+import docker
+
+from UPISAS.exemplars.ramses import RAMSES
+from UPISAS.ramses_simulator import RamsesSimulator
+
+
+class TestRamsesReset(unittest.TestCase):
+    """
+    Test cases for resetting a warm RAMSES stack to its baseline, against the RAMSES simulator.
+    """
+
+    def setUp(self):
+        self.simulator = RamsesSimulator(services=3, instances_per_service=2, boot_delay=0, probe_port=0,
+                                         instances_manager_port=0, config_manager_port=0, interface_port=0).start()
+        self.addCleanup(self.simulator.stop)
+        self.exemplar = RAMSES(auto_start=False)
+        self.exemplar.base_endpoint = f"http://{self.simulator.host}:{self.simulator.ports['interface']}"
+        self.exemplar.capture_baseline()
+
+    def test_restore_removes_added_instances_and_equalizes_weights(self):
+        self.simulator.execute({"operation": "addInstances", "serviceImplementationName": "service-1",
+                                "numberOfInstances": 2})
+        self.assertEqual(list(self.exemplar.baseline_differences()), ["SERVICE-1"])
+        self.exemplar.restore_baseline_instances()
+        self.assertEqual(self.exemplar.baseline_differences(), {})
+        weights = self.simulator.configuration("SERVICE-1")["loadBalancerWeights"]
+        self.assertEqual(set(weights.values()), {0.5})
+
+    def test_reset_restarts_stateful_services(self):
+        self.simulator.execute({"operation": "addInstances", "serviceImplementationName": "service-0",
+                                "numberOfInstances": 1})
+        with mock.patch.object(self.exemplar, "restart_services", return_value={}) as restart, \
+                mock.patch.object(self.exemplar, "start_run"), \
+                mock.patch.object(self.exemplar.readiness, "wait", return_value={}):
+            self.assertTrue(self.exemplar.reset())
+        services = restart.call_args.args[0]
+        self.assertIn("mysql", services)
+        self.assertNotIn("sefa-eureka", services)
+
+    def test_reset_fails_when_baseline_is_not_reached(self):
+        with mock.patch.object(self.exemplar, "restart_services", return_value={}), \
+                mock.patch.object(self.exemplar, "start_run"), \
+                mock.patch.object(self.exemplar.readiness, "wait", return_value={}), \
+                mock.patch.object(self.exemplar, "restore_baseline_instances"):
+            self.simulator.execute({"operation": "addInstances", "serviceImplementationName": "service-0",
+                                    "numberOfInstances": 1})
+            self.assertFalse(self.exemplar.reset())
+        with mock.patch.object(self.exemplar, "restart_services",
+                               return_value={"mysql": docker.errors.APIError("restart failed")}):
+            self.assertFalse(self.exemplar.reset())
+        with mock.patch.object(self.exemplar, "restart_services", side_effect=docker.errors.DockerException("no daemon")):
+            self.assertFalse(self.exemplar.reset())
+
+    def test_reset_without_baseline(self):
+        self.exemplar.baseline = None
+        self.assertFalse(self.exemplar.reset())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+from concurrent.futures import Future
+
+from UPISAS.action_executor import ActionExecutor
+from UPISAS.knowledge_ramses import Knowledge
+
+
+ADD = {"operation": "addInstances", "serviceImplementationName": "ordering-service", "numberOfInstances": 1}
+LB = {"operation": "changeLBWeights", "serviceID": "ORDERING-SERVICE", "newWeights": 1.0}
+
+
+class TestActionExecutor(unittest.TestCase):
+    """
+    Test cases for running planned actions in the background.
+    """
+
+    def setUp(self):
+        self.knowledge = Knowledge({}, {}, [], [])
+        self.executor = ActionExecutor(self.knowledge)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_action_is_in_flight_until_it_finishes(self):
+        release = threading.Event()
+        future = self.executor.submit(ADD, lambda action: release.wait(5) and {"ok": True})
+        self.assertTrue(self.executor.is_in_flight(dict(ADD)))
+        release.set()
+        self.assertEqual(future.result(5), {"ok": True})
+        self.assertFalse(self.executor.is_in_flight(ADD))
+        self.assertEqual(self.knowledge.execution_results[-1]["status"], "done")
+
+    def test_same_action_is_not_queued_twice(self):
+        release = threading.Event()
+        calls = []
+
+        def perform(action):
+            calls.append(action)
+            release.wait(5)
+            return {}
+
+        first = self.executor.submit(ADD, perform)
+        second = self.executor.submit(dict(ADD), perform)
+        release.set()
+        first.result(5)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+
+    def test_dependent_action_waits_for_its_dependencies(self):
+        order = []
+        release = threading.Event()
+        add = self.executor.submit(ADD, lambda action: release.wait(5) and order.append("add") or {})
+        lb = self.executor.submit(LB, lambda action: order.append("lb") or {}, depends_on=[add])
+        release.set()
+        lb.result(5)
+        self.assertEqual(order, ["add", "lb"])
+
+    def test_waiting_action_does_not_hold_a_worker(self):
+        executor = ActionExecutor(self.knowledge, max_workers=1)
+        self.addCleanup(executor.shutdown)
+        dependency = Future()
+        lb = executor.submit(LB, lambda action: {"lb": True}, depends_on=[dependency])
+        add = executor.submit(ADD, lambda action: {"add": True})
+        self.assertEqual(add.result(5), {"add": True})
+        self.assertFalse(lb.done())
+        dependency.set_result(None)
+        self.assertEqual(lb.result(5), {"lb": True})
+        self.assertEqual([outcome["action"] for outcome in executor.collect_finished()], [ADD, LB])
+        self.assertEqual(executor.collect_finished(), [])
+
+    def test_failures_are_recorded(self):
+        def perform(action):
+            raise RuntimeError("interface down")
+
+        future = self.executor.submit(LB, perform)
+        with self.assertRaises(RuntimeError):
+            future.result(5)
+        self.assertEqual(self.knowledge.in_flight_actions, {})
+        self.assertEqual(self.knowledge.execution_results[-1]["status"], "failed")
+        self.assertIn("interface down", self.knowledge.execution_results[-1]["result"]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from UPISAS.benchmark import PHASES, percentile, run_benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    Test cases for the MAPE-K loop benchmark against the RAMSES simulator.
+    """
+
+    def test_reports_every_phase(self):
+        result = run_benchmark("reactive", services=3, instances=2, ticks=3, failure_rate=0.2, trace_allocations=True)
+        self.assertEqual(result["ticks"], 3)
+        self.assertGreater(result["ticks_per_second"], 0)
+        self.assertEqual(set(result["phases_ms"]), set(PHASES))
+        self.assertEqual(set(result["phases_ms"]["analyze"]), {"mean", "p50", "p95", "p99", "max"})
+        self.assertIn("allocations_bytes", result)
+
+    def test_baseline_variant(self):
+        result = run_benchmark("baseline", services=2, instances=1, ticks=2)
+        self.assertNotIn("allocations_bytes", result)
+        with self.assertRaises(ValueError):
+            run_benchmark("unknown", ticks=1)
+
+    def test_percentile(self):
+        self.assertEqual(percentile([3, 1, 2, 4], 50), 2.5)
+        self.assertIsNone(percentile([], 99))
+
+
+if __name__ == '__main__':
+    unittest.main()
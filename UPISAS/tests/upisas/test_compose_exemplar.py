@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import docker
+
+from UPISAS.exemplars.compose import ComposeExemplar, compose_project_name
+
+COMPOSE_FILE = """
+services:
+  db:
+    image: mysql:8
+  api:
+    image: example/api:1.0
+    depends_on: [db]
+  web:
+    image: example/web:${WEB_TAG:-latest}
+"""
+
+
+class FakeContainer:
+    def __init__(self, project, service, status="running", health=None):
+        self.id, self.name, self.status = f"id-{service}", f"{project}-{service}-1", status
+        self.labels = {"com.docker.compose.project": project, "com.docker.compose.service": service}
+        self.attrs = {"State": {"Health": {"Status": health}} if health else {}}
+        self.calls = []
+
+    def start(self):
+        self.calls.append("start")
+        self.status = "running"
+
+    def stop(self):
+        self.calls.append("stop")
+        self.status = "exited"
+
+    def pause(self):
+        self.calls.append("pause")
+        self.status = "paused"
+
+    def unpause(self):
+        self.calls.append("unpause")
+        self.status = "running"
+
+    def restart(self, timeout=10):
+        self.calls.append("restart")
+        if self.status == "dead":
+            raise docker.errors.APIError("cannot restart a dead container")
+
+
+class FakeClient:
+    def __init__(self, containers):
+        self.containers = mock.Mock()
+        self.containers.list.side_effect = lambda all=False, filters=None: [
+            container for container in containers
+            if f"com.docker.compose.project={container.labels['com.docker.compose.project']}" == filters["label"]]
+
+
+class Stack(ComposeExemplar):
+    def start_run(self):
+        pass
+
+
+class TestComposeExemplar(unittest.TestCase):
+    """
+    Test cases for the per-service lifecycle of ComposeExemplar, against a fake Docker client.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.compose_dir = os.path.join(directory.name, "My Stack")
+        os.mkdir(self.compose_dir)
+        with open(os.path.join(self.compose_dir, "docker-compose.yml"), "w") as file:
+            file.write(COMPOSE_FILE)
+        self.containers = {service: FakeContainer("mystack", service) for service in ("db", "api", "web")}
+        self.client = FakeClient(list(self.containers.values()) + [FakeContainer("other", "db")])
+        self.exemplar = Stack("http://localhost:8080", self.compose_dir, client=self.client)
+
+    def test_project_and_services(self):
+        self.assertEqual(self.exemplar.project, "mystack")
+        self.assertEqual(self.exemplar.services, ["db", "api", "web"])
+        self.assertEqual(compose_project_name(self.exemplar.compose_file, {"COMPOSE_PROJECT_NAME": "custom"}), "custom")
+        self.assertEqual(self.exemplar.required_images(), ["mysql:8", "example/api:1.0", "example/web:latest"])
+
+    def test_lifecycle_of_selected_services(self):
+        self.assertEqual(self.exemplar.pause_container(["api", "web"]), {"api": None, "web": None})
+        self.assertEqual(self.exemplar.get_container_status("api"), "paused")
+        self.assertEqual(self.exemplar.get_container_status(), "mixed")
+        self.assertEqual(self.containers["db"].calls, [])
+        self.exemplar.unpause_container(["api", "web"])
+        self.exemplar.stop_container(services=["db"])
+        self.assertEqual(self.exemplar.container_statuses(), {"db": "exited", "api": "running", "web": "running"})
+        self.exemplar.start_container(services=["db"])
+        self.assertEqual(self.exemplar.get_container_status(), "running")
+        # the container list is looked up once and reused
+        self.assertEqual(self.client.containers.list.call_count, 5)
+
+    def test_stop_without_remove_stops_every_service(self):
+        self.exemplar.stop_container(remove=False)
+        self.assertEqual(self.exemplar.get_container_status(), "exited")
+        self.assertEqual(self.containers["db"].calls, ["stop"])
+
+    def test_whole_stack_uses_compose(self):
+        with mock.patch("subprocess.run") as run:
+            self.exemplar.start_container()
+            self.exemplar.stop_container()
+        self.assertEqual([call.args[0][-2:] for call in run.call_args_list], [["up", "-d"], [self.exemplar.compose_file, "down"]])
+        self.assertEqual(self.exemplar.service_containers, {})
+
+    def test_failures_are_returned_per_service(self):
+        self.containers["api"].status = "dead"
+        results = self.exemplar.restart_services()
+        self.assertIsInstance(results["api"], docker.errors.APIError)
+        self.assertIsNone(results["db"])
+        self.assertEqual(self.containers["web"].calls, ["restart"])
+
+    def test_restart_follows_depends_on(self):
+        restarted = []
+        for service, container in self.containers.items():
+            container.restart = lambda timeout=10, service=service: restarted.append(service)
+        self.assertEqual(self.exemplar.restart_order(), [["db", "web"], ["api"]])
+        self.exemplar.restart_services()
+        self.assertEqual(restarted[-1], "api")
+        # dependencies on services that are not restarted are looked through
+        self.exemplar.dependencies["web"] = ["api"]
+        self.assertEqual(self.exemplar.restart_order(["web", "db"]), [["db"], ["web"]])
+
+    def test_missing_containers_are_removed(self):
+        self.client.containers.list.side_effect = lambda all=False, filters=None: [self.containers["db"]]
+        self.assertEqual(self.exemplar.container_statuses(), {"db": "running", "api": "removed", "web": "removed"})
+        self.assertEqual(self.exemplar.pause_container(["api"]), {})
+
+    def test_container_details(self):
+        self.containers["db"].attrs = {"State": {"Health": {"Status": "healthy"}}}
+        details = {detail["Service"]: detail for detail in self.exemplar.container_details()}
+        self.assertEqual(details["db"], {"Service": "db", "Name": "mystack-db-1", "State": "running", "Health": "healthy"})
+        self.assertEqual(details["web"]["Health"], "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import queue
+import time
+import unittest
+
+import docker
+
+from UPISAS.container_state import ContainerStateTracker
+from UPISAS.exemplars.simulator import SimulatedRAMSES
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+
+
+class FakeContainer:
+    def __init__(self, id, name, status, health=None):
+        self.id, self.name, self.status = id, name, status
+        self.attrs = {"State": {"Health": {"Status": health}} if health else {}}
+
+
+class FakeEventStream:
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def __iter__(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.queue.put(None)
+
+
+class FakeDockerClient:
+    """Stands in for docker.DockerClient: containers.list, containers.get and events."""
+
+    def __init__(self, containers):
+        self.listed = containers
+        self.stream = FakeEventStream()
+        self.containers = self
+        self.event_filters = None
+
+    def list(self, all, filters):
+        return self.listed
+
+    def get(self, container):
+        for listed in self.listed:
+            if container in (listed.id, listed.name):
+                return listed
+        raise docker.errors.NotFound(f"no container {container}")
+
+    def events(self, since, filters, decode):
+        self.event_filters = filters
+        return self.stream
+
+    def emit(self, action, id, name):
+        self.stream.queue.put({"Type": "container", "Action": action, "Actor": {"ID": id, "Attributes": {"name": name}}})
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestContainerStateTracker(unittest.TestCase):
+    """
+    Test cases for following the container state through the Docker events stream.
+    """
+
+    def setUp(self):
+        self.client = FakeDockerClient([FakeContainer("c1", "sefa-ordering-service", "running", "healthy"),
+                                        FakeContainer("c2", "mysql", "running")])
+        self.tracker = ContainerStateTracker(self.client, labels=["com.docker.compose.project=ramses"]).start()
+        self.addCleanup(self.tracker.stop)
+
+    def test_initial_snapshot(self):
+        self.assertEqual(self.tracker.statuses(), {"sefa-ordering-service": "running", "mysql": "running"})
+        self.assertEqual(self.tracker.health("c1"), "healthy")
+        self.assertEqual(self.client.event_filters, {"type": "container", "label": ["com.docker.compose.project=ramses"]})
+
+    def test_events_update_the_status(self):
+        changes = []
+        self.tracker.subscribe(lambda name, state, action: changes.append((name, state["status"], action)))
+        self.client.emit("pause", "c2", "mysql")
+        self.client.emit("exec_start: ls", "c2", "mysql")
+        self.client.emit("unpause", "c2", "mysql")
+        self.client.emit("die", "c1", "sefa-ordering-service")
+        self.assertTrue(wait_until(lambda: len(changes) == 3))
+        self.assertEqual(changes, [("mysql", "paused", "pause"), ("mysql", "running", "unpause"),
+                                   ("sefa-ordering-service", "exited", "die")])
+        self.assertEqual(self.tracker.status("sefa-ordering-service"), "exited")
+        self.assertTrue(self.tracker.is_down("sefa-ordering-service"))
+        self.assertFalse(self.tracker.is_down("mysql"))
+
+    def test_health_and_new_containers(self):
+        self.client.emit("health_status: unhealthy", "c1", "sefa-ordering-service")
+        self.client.emit("create", "c3", "sefa-ordering-service-2")
+        self.client.emit("start", "c3", "sefa-ordering-service-2")
+        self.assertTrue(wait_until(lambda: self.tracker.status("c3") == "running"))
+        self.assertTrue(self.tracker.is_down("c1"))
+        self.assertIsNone(self.tracker.status("unknown"))
+
+    def test_only_tracked_containers(self):
+        client = FakeDockerClient(self.client.listed)
+        tracker = ContainerStateTracker(client, containers=["c2", "gone"]).start()
+        self.addCleanup(tracker.stop)
+        self.assertEqual(tracker.statuses(), {"mysql": "running"})
+        self.assertEqual(client.event_filters, {"type": "container", "container": ["c2", "gone"]})
+
+    def test_stop_ends_the_thread(self):
+        self.tracker.stop()
+        self.assertFalse(self.tracker.thread.is_alive())
+
+    def test_strategy_marks_instances_of_dead_containers_as_failed(self):
+        exemplar = SimulatedRAMSES(services=2, instances_per_service=1, boot_delay=0)
+        self.addCleanup(exemplar.stop_container)
+        strategy = ReactiveAdaptationManager(exemplar, exemplar.base_endpoint + "/monitor",
+                                             exemplar.base_endpoint + "/execute", exemplar.lb_url)
+        self.addCleanup(strategy.executor.shutdown)
+        strategy.monitor()
+        instance_id = strategy.knowledge.index.instances_of("SERVICE-0")[0]
+        container = instance_id.rpartition("@")[2].rpartition(":")[0]
+        strategy.watch_containers(self.tracker)
+        self.client.emit("die", "c9", container)
+        # the loop is woken up, and the container is recorded in the Knowledge on its next monitor()
+        self.assertTrue(strategy.wait_for_next_tick(2))
+        self.assertFalse(strategy.instance_container_down(instance_id))
+        strategy.monitor()
+        self.assertEqual(strategy.knowledge.down_containers[container]["action"], "die")
+        self.assertTrue(strategy.instance_container_down(instance_id))
+        strategy.analyze()
+        self.assertEqual(strategy.knowledge.analysis_data["failed_instances"], {"SERVICE-0": [instance_id]})
+
+        self.client.emit("start", "c9", container)
+        self.assertTrue(wait_until(lambda: self.tracker.status(container) == "running"))
+        self.assertEqual(strategy.apply_container_changes(), [])
+        self.assertNotIn(container, strategy.knowledge.down_containers)
+        self.assertFalse(strategy.wait_for_next_tick(0))
+
+    def test_strategy_records_containers_already_down(self):
+        self.client.emit("die", "c2", "mysql")
+        self.assertTrue(wait_until(lambda: self.tracker.is_down("mysql")))
+        exemplar = SimulatedRAMSES(services=1, instances_per_service=1, boot_delay=0)
+        self.addCleanup(exemplar.stop_container)
+        strategy = ReactiveAdaptationManager(exemplar, exemplar.base_endpoint + "/monitor",
+                                             exemplar.base_endpoint + "/execute", exemplar.lb_url)
+        self.addCleanup(strategy.executor.shutdown)
+        strategy.watch_containers(self.tracker)
+        self.assertEqual(strategy.apply_container_changes(), ["mysql"])
+        self.assertEqual(strategy.knowledge.down_containers["mysql"]["status"], "exited")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from UPISAS.exemplars.simulator import SimulatedRAMSES
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+
+
+class TestExecute(unittest.TestCase):
+    """
+    Test cases for executing a plan of instance and load balancer changes, against the RAMSES simulator.
+    """
+
+    def setUp(self):
+        self.exemplar = SimulatedRAMSES(services=2, instances_per_service=2, boot_delay=0)
+        self.addCleanup(self.exemplar.stop_container)
+        self.simulator = self.exemplar.simulator
+        self.strategy = ReactiveAdaptationManager(self.exemplar, self.exemplar.base_endpoint + "/monitor",
+                                                  self.exemplar.base_endpoint + "/execute", self.exemplar.lb_url)
+        self.addCleanup(self.strategy.executor.shutdown)
+        self.strategy.readiness.interval = 0
+        self.strategy.monitor()
+        self.strategy.knowledge.plan_data = [
+            {"operation": "removeInstance", "serviceImplementationName": "service-0", "address": "sefa-service-0",
+             "port": 58000},
+            {"operation": "addInstances", "serviceImplementationName": "service-0", "numberOfInstances": 1},
+            {"operation": "addInstances", "serviceImplementationName": "service-1", "numberOfInstances": 1}]
+        self.strategy.knowledge.adaptation_options = [
+            {"operation": "changeLBWeights", "serviceID": "SERVICE-0", "newWeights": 0.5,
+             "instancesToRemoveWeightOf": []},
+            {"operation": "changeLBWeights", "serviceID": "SERVICE-1", "newWeights": 0.33,
+             "instancesToRemoveWeightOf": []}]
+
+    def assert_plan_applied(self):
+        instances = self.simulator.monitor()["SERVICE-0"]["instances"]
+        # planned removals are not executed
+        self.assertEqual(len(instances), 3)
+        self.assertIn("service-0@sefa-service-0:58000", instances)
+        self.assertEqual(set(self.simulator.configuration("SERVICE-0")["loadBalancerWeights"].values()), {1 / 3})
+        self.assertEqual(len(self.simulator.configuration("SERVICE-1")["loadBalancerWeights"]), 3)
+
+    def test_execute_one_by_one(self):
+        self.strategy.execute()
+        self.assert_plan_applied()
+        self.assertFalse(any("error" in result for result in self.strategy.knowledge.adaptation_options))
+
+    def test_batch_execute_sends_two_requests(self):
+        self.strategy.use_batch_execute = True
+        with mock.patch.object(requests.Session, "post", autospec=True, side_effect=requests.Session.post) as post:
+            self.strategy.execute()
+        self.assertEqual([call.args[1].rpartition("/")[2] for call in post.call_args_list], ["batch", "batch"])
+        self.assertEqual([action["operation"] for action in post.call_args_list[0].kwargs["json"]["actions"]],
+                         ["addInstances", "addInstances"])
+        self.assert_plan_applied()
+        self.assertFalse(any("error" in result for result in self.strategy.knowledge.adaptation_options))
+
+    def test_execute_async_leaves_knowledge_to_the_loop(self):
+        monitored_data = dict(self.strategy.knowledge.monitored_data)
+        futures = self.strategy.execute_async()
+        for future in futures:
+            future.result(5)
+        self.assert_plan_applied()
+        self.assertEqual(self.strategy.knowledge.monitored_data, monitored_data)
+        self.assertEqual(self.strategy.knowledge.standby_pool, {})
+        self.strategy.apply_finished_actions()
+        self.assertEqual(set(self.strategy.knowledge.standby_pool), {"service-0", "service-1"})
+        self.assertEqual(len(self.strategy.knowledge.execution_results), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
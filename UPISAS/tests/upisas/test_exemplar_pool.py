@@ -0,0 +1,65 @@
+import unittest
+
+from UPISAS.exemplar_pool import WarmExemplarPool
+
+
+class FakeExemplar:
+    def __init__(self, resettable=True):
+        self.resettable = resettable
+        self.resets = 0
+        self.stopped = False
+
+    def reset(self):
+        self.resets += 1
+        return self.resettable
+
+    def stop_container(self):
+        self.stopped = True
+
+
+class TestWarmExemplarPool(unittest.TestCase):
+    """
+    Test cases for reusing exemplars between experiment runs.
+    """
+
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            self.created.append(FakeExemplar())
+            return self.created[-1]
+        self.pool = WarmExemplarPool(factory)
+
+    def test_released_exemplar_is_reset_and_reused(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+        self.assertEqual(first.resets, 1)
+        self.assertEqual(self.pool.stats, {"cold_starts": 1, "warm_resets": 1, "failed_resets": 0})
+
+    def test_failed_reset_replaces_the_exemplar(self):
+        first = self.pool.acquire()
+        first.resettable = False
+        self.pool.release(first)
+        second = self.pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.stopped)
+        self.assertEqual(self.pool.stats, {"cold_starts": 2, "warm_resets": 0, "failed_resets": 1})
+
+    def test_cold_pool_stops_on_release(self):
+        self.pool.warm = False
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.assertTrue(first.stopped)
+        self.assertIsNot(self.pool.acquire(), first)
+
+    def test_close_stops_idle_exemplars(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.pool.close()
+        self.assertTrue(first.stopped)
+        self.assertEqual(self.pool.idle, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
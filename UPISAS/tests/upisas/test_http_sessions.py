@@ -0,0 +1,34 @@
+import unittest
+
+from UPISAS import get_http_session, configure_http_sessions
+
+
+class TestHttpSessions(unittest.TestCase):
+    """
+    Test cases for the shared keep-alive sessions used for all outbound HTTP calls.
+    """
+
+    def tearDown(self):
+        configure_http_sessions(pool_size=10, retries=2, backoff=0.2)
+
+    def test_same_session_for_same_host(self):
+        session = get_http_session("http://127.0.0.1:50000/monitor")
+        self.assertIs(session, get_http_session("http://127.0.0.1:50000/execute"))
+
+    def test_different_session_for_different_hosts(self):
+        self.assertIsNot(get_http_session("http://127.0.0.1:50000/monitor"),
+                         get_http_session("http://localhost:32840/rest/changeLBWeights"))
+
+    def test_configure_recreates_sessions_with_new_settings(self):
+        old_session = get_http_session("http://127.0.0.1:50000/monitor")
+        configure_http_sessions(pool_size=3, retries=0)
+        new_session = get_http_session("http://127.0.0.1:50000/monitor")
+        self.assertIsNot(old_session, new_session)
+        adapter = new_session.get_adapter("http://127.0.0.1:50000/monitor")
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import docker
+
+from UPISAS.images import PullProgress, compose_images, image_present, interpolate, prepull_images
+
+RAMSES_COMPOSE = os.path.join(os.path.dirname(__file__), "..", "..", "ramses", "docker-compose.yml")
+
+
+class FakeImage:
+    def __init__(self, repo_digests):
+        self.attrs = {"RepoDigests": repo_digests}
+
+
+class FakeDockerClient:
+    """Stands in for docker.DockerClient: images.get/get_registry_data and api.pull."""
+
+    def __init__(self, local, registry=None, pull_delay=0.0):
+        self.local = local  # image -> list of RepoDigests
+        self.registry = registry or {}  # image -> published digest
+        self.pull_delay = pull_delay
+        self.pulled = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+        self.images = self
+        self.api = self
+
+    def get(self, image):
+        if image not in self.local:
+            raise docker.errors.ImageNotFound(image)
+        return FakeImage(self.local[image])
+
+    def get_registry_data(self, image):
+        return type("RegistryData", (), {"id": self.registry[image]})()
+
+    def pull(self, image, stream, decode):
+        with self.lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            time.sleep(self.pull_delay)
+            if "broken" in image:
+                yield {"error": "manifest unknown"}
+            yield {"status": "Downloading", "id": "layer", "progressDetail": {"current": 5, "total": 10}}
+            yield {"status": "Pull complete", "id": "layer", "progressDetail": {}}
+            self.pulled.append(image)
+        finally:
+            with self.lock:
+                self.concurrent -= 1
+
+
+class TestImages(unittest.TestCase):
+    """
+    Test cases for resolving and pre-pulling the images of an exemplar.
+    """
+
+    def test_interpolate(self):
+        self.assertEqual(interpolate("a/b:${ARCH}", {"ARCH": "arm64"}), "a/b:arm64")
+        self.assertEqual(interpolate("a/b:${ARCH:-amd64}", {}), "a/b:amd64")
+        self.assertEqual(interpolate("a/$NAME:1", {"NAME": "c"}), "a/c:1")
+        with self.assertRaises(KeyError):
+            interpolate("a/b:${ARCH}", {})
+
+    def test_compose_images_of_ramses(self):
+        images = compose_images(RAMSES_COMPOSE, environ={"ARCH": "amd64"})
+        self.assertEqual(len(images), 22)
+        self.assertIn("giamburrasca/sefa-eureka:amd64", images)
+        with self.assertRaises(ValueError):
+            compose_images(RAMSES_COMPOSE, environ={})
+
+    def test_compose_images_reads_env_file(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, ".env"), "w") as file:
+            file.write("# architecture\nARCH=arm64\n")
+        compose_file = os.path.join(directory, "docker-compose.yml")
+        with open(compose_file, "w") as file:
+            file.write("services:\n  a:\n    image: x/a:${ARCH}\n  b:\n    image: x/a:${ARCH}\n  c:\n    build: .\n")
+        self.assertEqual(compose_images(compose_file, environ={}), ["x/a:arm64"])
+
+    def test_image_present(self):
+        client = FakeDockerClient({"x/a:1": ["x/a@sha256:old"]}, registry={"x/a:1": "sha256:new"})
+        self.assertTrue(image_present(client, "x/a:1"))
+        self.assertFalse(image_present(client, "x/a:1", check_remote=True))
+        self.assertFalse(image_present(client, "x/b:1"))
+
+    def test_prepull_skips_present_images_and_pulls_concurrently(self):
+        client = FakeDockerClient({"x/a:1": []}, pull_delay=0.1)
+        images = ["x/a:1", "x/b:1", "x/c:1", "x/d:1", "x/broken:1"]
+        results = prepull_images(images, max_workers=3, client=client, show_progress=False)
+        self.assertEqual(results["x/a:1"], "present")
+        self.assertEqual([results[image] for image in images[1:4]], ["pulled"] * 3)
+        self.assertTrue(results["x/broken:1"].startswith("failed"))
+        self.assertEqual(client.max_concurrent, 3)
+        self.assertNotIn("x/a:1", client.pulled)
+
+    def test_progress_aggregates_layers_of_all_images(self):
+        progress = PullProgress()
+        progress.update("x/a:1", {"status": "Downloading", "id": "l1", "progressDetail": {"current": 5, "total": 10}})
+        progress.update("x/b:1", {"status": "Downloading", "id": "l1", "progressDetail": {"current": 1, "total": 30}})
+        progress.update("x/a:1", {"status": "Extracting", "id": "l1", "progressDetail": {"current": 9, "total": 10}})
+        self.assertEqual(progress.totals(), (6, 40))
+        progress.finish("x/b:1")
+        self.assertEqual(progress.totals("x/b:1"), (30, 30))
+        self.assertEqual(progress.totals(), (35, 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+from UPISAS.instance_readiness import InstanceReadinessTracker
+
+
+def _monitor_data(*snapshots):
+    return {"ORDERING-SERVICE": {"currentImplementationId": "ordering-service", "snapshot": list(snapshots)}}
+
+
+OLD = {"instanceId": "ordering-service@old:1", "active": True, "booting": False, "status": "ACTIVE"}
+BOOTING = {"instanceId": "ordering-service@new:2", "active": True, "booting": True, "status": "BOOTING"}
+READY = {"instanceId": "ordering-service@new:2", "active": True, "booting": False, "status": "ACTIVE"}
+
+
+class TestInstanceReadinessTracker(unittest.TestCase):
+    """
+    Test cases for waiting on instances added by an adaptation.
+    """
+
+    def test_returns_as_soon_as_the_new_instance_is_ready(self):
+        fetch = mock.Mock(side_effect=[_monitor_data(OLD), _monitor_data(OLD, BOOTING), _monitor_data(OLD, READY)])
+        tracker = InstanceReadinessTracker(fetch, timeout=5, interval=0)
+        ready = tracker.wait_for_new_instances(["ordering-service"], {OLD["instanceId"]})
+        self.assertEqual(ready, {"ordering-service": READY["instanceId"]})
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_known_instances_do_not_count_as_new(self):
+        tracker = InstanceReadinessTracker(mock.Mock(return_value=_monitor_data(OLD)), timeout=0.05, interval=0.01)
+        ready = tracker.wait_for_new_instances(["ORDERING-SERVICE"], InstanceReadinessTracker.known_instances(
+            _monitor_data(OLD)))
+        self.assertEqual(ready, {"ORDERING-SERVICE": None})
+
+    def test_no_wait_without_added_instances(self):
+        fetch = mock.Mock()
+        self.assertEqual(InstanceReadinessTracker(fetch).wait_for_new_instances([], set()), {})
+        fetch.assert_not_called()
+
+    def test_failing_fetch_is_retried_until_timeout(self):
+        fetch = mock.Mock(side_effect=RuntimeError("interface down"))
+        tracker = InstanceReadinessTracker(fetch, timeout=0.05, interval=0.01)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(tracker.wait_for_new_instances(["ordering-service"], set()), {"ordering-service": None})
+        self.assertGreater(fetch.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
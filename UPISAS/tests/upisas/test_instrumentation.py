@@ -0,0 +1,94 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from UPISAS import instrumentation
+from UPISAS.exemplars.simulator import SimulatedRAMSES
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Test cases for the timing and counting instrumentation and its sinks.
+    """
+
+    def setUp(self):
+        instrumentation.registry.clear()
+        self.addCleanup(instrumentation.registry.clear)
+        self.addCleanup(instrumentation.disable)
+
+    def test_disabled_records_nothing(self):
+        with instrumentation.timed("block_ms"):
+            pass
+        instrumentation.increment("calls")
+        self.assertEqual(instrumentation.registry.snapshot(), {"histograms": [], "counters": []})
+
+    def test_timed_block_and_errors(self):
+        instrumentation.enable()
+        with instrumentation.timed("block_ms", phase="a"):
+            pass
+        with self.assertRaises(KeyError):
+            with instrumentation.timed("block_ms", phase="a"):
+                raise KeyError("x")
+        snapshot = instrumentation.registry.snapshot()
+        histogram, = snapshot["histograms"]
+        self.assertEqual((histogram["name"], histogram["labels"], histogram["count"]), ("block_ms", {"phase": "a"}, 2))
+        self.assertEqual(histogram["buckets"][-1], ("+Inf", 2))
+        self.assertEqual(snapshot["counters"], [{"name": "block_ms_errors", "labels": {"phase": "a"}, "value": 1}])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = instrumentation.Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1, 2), (10, 3), ("+Inf", 4)])
+        self.assertEqual(histogram.sum, 56.5)
+
+    def test_sinks(self):
+        memory, prometheus = instrumentation.MemorySink(), instrumentation.PrometheusSink()
+        path = os.path.join(tempfile.mkdtemp(), "metrics.csv")
+        instrumentation.enable(memory, prometheus, instrumentation.CsvSink(path))
+        instrumentation.observe("size_bytes", 100, buckets=instrumentation.SIZE_BUCKETS_BYTES, path="/monitor")
+        instrumentation.increment("http_client_errors", status="500")
+        instrumentation.flush()
+        instrumentation.flush()
+        self.assertEqual(len(memory.snapshots), 2)
+        self.assertEqual(memory.last["counters"][0]["value"], 1)
+        self.assertIn("# TYPE size_bytes histogram", prometheus.text)
+        self.assertIn('size_bytes_bucket{le="128",path="/monitor"} 1', prometheus.text)
+        self.assertIn('http_client_errors{status="500"} 1', prometheus.text)
+        with open(path) as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["labels"], '{path="/monitor"}')
+
+    def test_prometheus_families_are_contiguous(self):
+        snapshot = {"histograms": [], "counters": [
+            {"name": "calls", "labels": {"path": "/a"}, "value": 1},
+            {"name": "errors", "labels": {}, "value": 2},
+            {"name": "calls", "labels": {"path": "/b"}, "value": 3}]}
+        self.assertEqual(instrumentation.prometheus_text(snapshot).splitlines(),
+                         ["# TYPE calls counter", 'calls{path="/a"} 1', 'calls{path="/b"} 3',
+                          "# TYPE errors counter", "errors 2"])
+
+    def test_strategy_phases_and_http_calls(self):
+        instrumentation.enable()
+        exemplar = SimulatedRAMSES(services=2, instances_per_service=1, boot_delay=0)
+        self.addCleanup(exemplar.stop_container)
+        strategy = ReactiveAdaptationManager(exemplar, exemplar.base_endpoint + "/monitor",
+                                             exemplar.base_endpoint + "/execute", exemplar.lb_url)
+        self.addCleanup(strategy.executor.shutdown)
+        strategy.monitor()
+        strategy.analyze()
+        strategy.plan()
+        histograms = {(h["name"], tuple(sorted(h["labels"].items()))): h
+                      for h in instrumentation.registry.snapshot()["histograms"]}
+        for phase in ("monitor", "analyze", "plan"):
+            key = ("mape_k_phase_ms", (("phase", phase), ("strategy", "ReactiveAdaptationManager")))
+            self.assertEqual(histograms[key]["count"], 1)
+        self.assertEqual(histograms[("http_client_request_ms", (("method", "GET"), ("path", "/monitor")))]["count"], 1)
+        self.assertGreater(histograms[("http_client_response_bytes", (("method", "GET"), ("path", "/monitor")))]["sum"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from UPISAS.journal import KnowledgeJournal
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+
+
+def _payload(cpu_usage, success):
+    return {"ORDERING-SERVICE": {"currentImplementationId": "ordering-service", "instances": ["o@host:1"],
+                                 "snapshot": [{"instanceId": "o@host:1", "cpuUsage": cpu_usage, "httpMetrics": {
+                                     "orders": {"outcomeMetrics": {"SUCCESS": {"totalDuration": success * 10,
+                                                                               "count": success}}}}}]}}
+
+
+class TestKnowledgeJournal(unittest.TestCase):
+    """
+    Test cases for the append-only Knowledge journal.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_entries_after_the_checkpoint_are_replayed(self):
+        journal = KnowledgeJournal(self.directory.name, checkpoint_every=2)
+        self.assertFalse(journal.append("monitor", {"n": 1}))
+        self.assertTrue(journal.append("monitor", {"n": 2}))
+        journal.checkpoint({"n": 2})
+        journal.append("plan", {"n": 3})
+        journal.close()
+
+        state, entries = KnowledgeJournal(self.directory.name).load()
+        self.assertEqual(state, {"n": 2})
+        self.assertEqual([(entry["kind"], entry["data"]) for entry in entries], [("plan", {"n": 3})])
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["checkpoint-1.json.gz", "journal-1.jsonl.gz"])
+
+    def test_segment_cut_off_by_a_crash(self):
+        journal = KnowledgeJournal(self.directory.name)
+        journal.append("monitor", {"n": 1})
+        journal.append("monitor", {"n": 2})
+        journal.close()
+        journal = KnowledgeJournal(self.directory.name)
+        journal.append("monitor", {"n": 3})
+        journal.close()
+        segment = os.path.join(self.directory.name, "journal-0.jsonl.gz")
+        with open(segment, 'rb+') as file:
+            file.truncate(os.path.getsize(segment) - 12)
+
+        state, entries = KnowledgeJournal(self.directory.name).load()
+        self.assertIsNone(state)
+        self.assertEqual([entry["data"]["n"] for entry in entries][:2], [1, 2])
+
+    def test_strategy_warm_start(self):
+        strategy = ReactiveAdaptationManager(mock.Mock(), "http://monitor", "http://execute", "http://lb")
+        strategy.enable_journal(self.directory.name, checkpoint_every=2)
+        strategy._update_knowledge(_payload(0.5, 10), timestamp=100)
+        strategy._update_knowledge(_payload(0.7, 20), timestamp=110)
+        strategy._update_knowledge(_payload(0.9, 30), timestamp=120)
+        strategy.knowledge.standby_pool["ordering-service"] = ["ordering-service-standby-0"]
+        strategy.close_journal()
+
+        restarted = ReactiveAdaptationManager(mock.Mock(), "http://monitor", "http://execute", "http://lb")
+        restarted.enable_journal(self.directory.name, warm_start=True)
+        self.assertEqual(list(restarted.knowledge.history.last("o@host:1", "cpuUsage")), [0.5, 0.7, 0.9])
+        self.assertEqual(restarted.knowledge.standby_pool, {"ordering-service": ["ordering-service-standby-0"]})
+        self.assertEqual(restarted.knowledge.index.implementation_of("ORDERING-SERVICE"), "ordering-service")
+        self.assertEqual(restarted.rates.report().instances["o@host:1"]["successful_requests"], 20)
+
+    def test_strategy_cold_start_clears_the_journal(self):
+        strategy = ReactiveAdaptationManager(mock.Mock(), "http://monitor", "http://execute", "http://lb")
+        strategy.enable_journal(self.directory.name, checkpoint_every=2)
+        strategy._update_knowledge(_payload(0.5, 10), timestamp=100)
+        strategy.close_journal()
+
+        restarted = ReactiveAdaptationManager(mock.Mock(), "http://monitor", "http://execute", "http://lb")
+        restarted.enable_journal(self.directory.name)
+        self.assertEqual(list(restarted.knowledge.history.last("o@host:1", "cpuUsage")), [])
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
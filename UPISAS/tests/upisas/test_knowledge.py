@@ -0,0 +1,108 @@
+import unittest
+
+from UPISAS.knowledge_ramses import Knowledge, KnowledgeIndex, MetricRingBuffer, TimeSeriesStore
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+
+
+class TestMetricRingBuffer(unittest.TestCase):
+    """
+    Test cases for the fixed-capacity metric history.
+    """
+
+    def test_keeps_only_the_last_capacity_values_in_order(self):
+        buffer = MetricRingBuffer(3)
+        for value in range(1, 6):
+            buffer.append(value, timestamp=value * 10)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer.last()), [3.0, 4.0, 5.0])
+        self.assertEqual(list(buffer.last(2)), [4.0, 5.0])
+        self.assertEqual(list(buffer.timestamps()), [30.0, 40.0, 50.0])
+
+    def test_mean_and_percentile(self):
+        buffer = MetricRingBuffer(5)
+        for value in [4, 1, 3, 2, 5]:
+            buffer.append(value)
+        self.assertEqual(buffer.mean(), 3.0)
+        self.assertEqual(buffer.mean(2), 3.5)
+        self.assertEqual(buffer.percentile(50), 3.0)
+        self.assertEqual(buffer.percentile(90), 4.6)
+        self.assertEqual(buffer.percentile(100, n=3), 5.0)
+
+    def test_empty_buffer(self):
+        buffer = MetricRingBuffer(2)
+        self.assertEqual(list(buffer.last(5)), [])
+        self.assertIsNone(buffer.mean())
+        self.assertIsNone(buffer.percentile(50))
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """
+    Test cases for the per-instance history kept in Knowledge.
+    """
+
+    def test_records_every_metric_of_an_instance(self):
+        store = TimeSeriesStore(window=2)
+        store.record("svc@host:1", {"cpuUsage": 0.5, "bootingStatus": True})
+        store.record("svc@host:1", {"cpuUsage": 0.7, "bootingStatus": False})
+        store.record("svc@host:1", {"cpuUsage": 0.9, "bootingStatus": None})
+        self.assertEqual(list(store.last("svc@host:1", "cpuUsage")), [0.7, 0.9])
+        self.assertEqual(list(store.last("svc@host:1", "bootingStatus")), [0.0, 0.0])
+        self.assertAlmostEqual(store.mean("svc@host:1", "cpuUsage"), 0.8)
+
+    def test_unknown_instances_have_no_history(self):
+        store = TimeSeriesStore()
+        self.assertEqual(len(store.last("svc@host:1", "cpuUsage", 5)), 0)
+        self.assertIsNone(store.percentile("svc@host:1", "cpuUsage", 95))
+
+    def test_knowledge_window(self):
+        knowledge = Knowledge({}, {}, [], [], history_window=10)
+        self.assertEqual(knowledge.history.window, 10)
+
+
+def _service(implementation_id, *instance_ids):
+    return {"currentImplementationId": implementation_id, "instances": list(instance_ids),
+            "snapshot": [{"instanceId": instance_id} for instance_id in instance_ids]}
+
+
+class TestKnowledgeIndex(unittest.TestCase):
+    """
+    Test cases for the indexed view of the monitored data.
+    """
+
+    def test_lookups(self):
+        index = KnowledgeIndex()
+        index.update({"ORDERING-SERVICE": _service("ordering-service", "o@host:1", "o@host:2"),
+                      "PAYMENT-SERVICE": _service("payment-service", "p@host:3")})
+        self.assertEqual(index.implementation_of("ORDERING-SERVICE"), "ordering-service")
+        self.assertEqual(index.instances_of("ORDERING-SERVICE"), ["o@host:1", "o@host:2"])
+        self.assertEqual(index.service_of("p@host:3"), "PAYMENT-SERVICE")
+        self.assertEqual(index.snapshot_of("o@host:2"), {"instanceId": "o@host:2"})
+        self.assertEqual(index.services_of("payment-service"), {"PAYMENT-SERVICE"})
+        self.assertIsNone(index.implementation_of("UNKNOWN-SERVICE"))
+        self.assertEqual(index.instances_of("UNKNOWN-SERVICE"), [])
+
+    def test_updates_are_incremental(self):
+        index = KnowledgeIndex()
+        index.update({"ORDERING-SERVICE": _service("ordering-service", "o@host:1", "o@host:2"),
+                      "PAYMENT-SERVICE": _service("payment-service", "p@host:3")})
+        removed = index.update({"ORDERING-SERVICE": _service("ordering-service-v2", "o@host:2", "o@host:4")})
+        self.assertEqual(removed, ["o@host:1"])
+        self.assertNotIn("o@host:1", index.instances)
+        self.assertEqual(index.service_of("o@host:4"), "ORDERING-SERVICE")
+        self.assertEqual(index.services_of("ordering-service"), set())
+        self.assertEqual(index.services_of("ordering-service-v2"), {"ORDERING-SERVICE"})
+        # services missing from the payload are kept, like in monitored_data
+        self.assertEqual(index.service_of("p@host:3"), "PAYMENT-SERVICE")
+
+    def test_history_of_removed_instances_is_dropped(self):
+        strategy = ReactiveAdaptationManager(None, "http://localhost/monitor", "http://localhost/execute", None)
+        self.addCleanup(strategy.executor.shutdown)
+        strategy._update_knowledge({"ORDERING-SERVICE": _service("ordering-service", "o@host:1", "o@host:2")})
+        strategy._update_knowledge({"ORDERING-SERVICE": _service("ordering-service", "o@host:2", "o@host:3")})
+        self.assertNotIn("o@host:1", strategy.knowledge.history)
+        self.assertIn("o@host:2", strategy.knowledge.history)
+        self.assertIn("o@host:3", strategy.knowledge.history)
+
+
+if __name__ == '__main__':
+    unittest.main()
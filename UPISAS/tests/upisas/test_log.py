@@ -0,0 +1,82 @@
+import io
+import json
+import logging
+import unittest
+
+from UPISAS.log import LazyJSON, configure_logging, parse_levels, shutdown_logging
+
+
+class CountingJSON(LazyJSON):
+    serialized = 0
+
+    def __str__(self):
+        CountingJSON.serialized += 1
+        return super().__str__()
+
+
+class TestLogging(unittest.TestCase):
+    """
+    Test cases for the queue-based logging of UPISAS.log.
+    """
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(shutdown_logging)
+        self.logger = logging.getLogger("UPISAS.tests.log")
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+        CountingJSON.serialized = 0
+
+    def test_records_are_written_by_the_listener(self):
+        stream = io.StringIO()
+        configure_logging(stream=stream)
+        self.logger.info("Instance %s added", "a@h:1", extra={"fields": {"service": "A"}})
+        shutdown_logging()
+        self.assertRegex(stream.getvalue(), r"INFO +UPISAS\.tests\.log: Instance a@h:1 added service=A\n")
+
+    def test_disabled_debug_is_never_formatted(self):
+        stream = io.StringIO()
+        configure_logging(stream=stream)
+        self.logger.debug("Plan: %s", CountingJSON({"actions": []}))
+        shutdown_logging()
+        self.assertEqual(CountingJSON.serialized, 0)
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_per_module_levels(self):
+        stream = io.StringIO()
+        configure_logging(stream=stream, levels={"UPISAS.tests.log": "DEBUG"})
+        self.logger.debug("Plan: %s", CountingJSON({"actions": []}))
+        logging.getLogger("UPISAS.other").debug("hidden")
+        shutdown_logging()
+        self.assertGreater(CountingJSON.serialized, 0)
+        self.assertIn('Plan: {"actions": []}', stream.getvalue())
+        self.assertNotIn("hidden", stream.getvalue())
+
+    def test_payload_is_logged_as_it_was(self):
+        stream = io.StringIO()
+        configure_logging(stream=stream)
+        plan = {"actions": []}
+        self.logger.info("Plan: %s", LazyJSON(plan))
+        plan["actions"].append("addInstances")
+        shutdown_logging()
+        self.assertIn('Plan: {"actions": []}', stream.getvalue())
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        configure_logging(stream=stream, json_lines=True)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("Execution failed", extra={"fields": {"service": "A"}})
+        shutdown_logging()
+        entry = json.loads(stream.getvalue())
+        self.assertEqual((entry["level"], entry["message"], entry["service"]), ("ERROR", "Execution failed", "A"))
+        self.assertIn("ValueError: boom", entry["exception"])
+
+    def test_parse_levels(self):
+        self.assertEqual(parse_levels("UPISAS.qos=debug, UPISAS.rates=WARNING,"),
+                         {"UPISAS.qos": "DEBUG", "UPISAS.rates": "WARNING"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from UPISAS.qos import compute_metrics_window, compute_qos, compute_qos_for_payload, compute_qos_for_snapshots
+
+
+def _snapshot(instance_id, **endpoints):
+    """endpoints maps endpoint name to (SUCCESS totalDuration, SUCCESS count, SERVER_ERROR count)."""
+    return {"instanceId": instance_id, "httpMetrics": {
+        endpoint: {"outcomeMetrics": {"SUCCESS": {"totalDuration": duration, "count": success},
+                                      "SERVER_ERROR": {"count": errors}}}
+        for endpoint, (duration, success, errors) in endpoints.items()}}
+
+
+class TestQoS(unittest.TestCase):
+    """
+    Test cases for the QoS computation over monitor payloads.
+    """
+
+    def test_window_between_two_snapshots(self):
+        oldest = _snapshot("a@host:1", orders=(100, 10, 0), pay=(50, 5, 5))
+        latest = _snapshot("a@host:1", orders=(400, 20, 0), pay=(150, 10, 10))
+        avg_response_time, availability = compute_metrics_window(latest, oldest)
+        self.assertEqual(avg_response_time, 400 / 15)
+        self.assertEqual(availability, 15 / 20 * 100)
+
+    def test_reset_counters_count_from_zero(self):
+        oldest = _snapshot("a@host:1", orders=(100, 10, 0), pay=(500, 50, 0))
+        latest = _snapshot("a@host:1", orders=(300, 20, 10), pay=(10, 1, 0))
+        report = compute_qos_for_payload({"ORDERING-SERVICE": {"snapshot": [latest]}}, {"a@host:1": oldest})
+        metrics = report.instances["a@host:1"]
+        self.assertEqual(metrics["avg_response_time"], 210 / 11)
+        self.assertEqual(metrics["availability"], 11 / 21 * 100)
+        self.assertEqual(metrics["reset_endpoints"], 1)
+
+    def test_service_and_overall_pool_the_instances(self):
+        payload = {
+            "ORDERING-SERVICE": {"snapshot": [_snapshot("a@host:1", orders=(100, 10, 0)),
+                                              _snapshot("b@host:2", orders=(300, 10, 10))]},
+            "PAYMENT-SERVICE": {"snapshot": [_snapshot("c@host:3", pay=(0, 0, 0))]},
+        }
+        report = compute_qos_for_payload(payload, {})
+        self.assertEqual(report.services["ORDERING-SERVICE"]["avg_response_time"], 20)
+        self.assertEqual(report.services["ORDERING-SERVICE"]["availability"], 20 / 30 * 100)
+        self.assertEqual(report.instance_metrics("c@host:3"), (0, 0))
+        self.assertEqual(report.overall["total_requests"], 30)
+
+    def test_instances_without_endpoints(self):
+        payload = {"ORDERING-SERVICE": {"snapshot": [{"instanceId": "a@host:1"}, _snapshot("b@host:2", orders=(100, 10, 0)),
+                                                     {"instanceId": "c@host:3", "httpMetrics": {}}]},
+                   "PAYMENT-SERVICE": {"snapshot": [{"instanceId": "d@host:4"}]}}
+        report = compute_qos_for_payload(payload, {})
+        self.assertEqual(report.instances["a@host:1"]["total_requests"], 0)
+        self.assertEqual(report.instance_metrics("b@host:2"), (10, 100))
+        self.assertEqual(report.services["ORDERING-SERVICE"]["successful_requests"], 10)
+        self.assertEqual(report.services["PAYMENT-SERVICE"]["total_requests"], 0)
+        self.assertEqual(compute_qos_for_payload({}, {}).overall["total_requests"], 0)
+
+    def test_snapshots_of_one_service(self):
+        oldest = _snapshot("a@host:1", orders=(100, 10, 0))
+        columns = compute_qos_for_snapshots([_snapshot("a@host:1", orders=(300, 20, 0)),
+                                             _snapshot("b@host:2", orders=(50, 5, 0))],
+                                            {"a@host:1": oldest}, require_baseline=True)
+        self.assertEqual(compute_qos(columns).instance_metrics("a@host:1"), (20, 100))
+        self.assertEqual(columns.instance_ids, ["a@host:1"])
+
+    def test_instances_without_baseline_can_be_left_out(self):
+        payload = {"ORDERING-SERVICE": {"snapshot": [_snapshot("a@host:1", orders=(100, 10, 0))]}}
+        report = compute_qos_for_payload(payload, {}, require_baseline=True)
+        self.assertEqual(report.instances, {})
+        self.assertEqual(report.instance_metrics("a@host:1"), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
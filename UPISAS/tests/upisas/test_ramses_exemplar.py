@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from UPISAS.exemplars.ramses import RAMSES, RESET_SERVICES, RamsesReadiness, eureka_application_name
+from UPISAS.exemplars.simulator import SimulatedRAMSES
+
+COMPOSE_FILE = """
+services:
+  mysql:
+    image: mysql:8
+  sefa-eureka:
+    image: sefa-eureka
+  sefa-configserver:
+    image: sefa-configserver
+    depends_on: [sefa-eureka]
+  sefa-ordering-service:
+    image: sefa-ordering-service
+    depends_on: [sefa-configserver, sefa-eureka]
+  sefa-payment-proxy-1-service:
+    image: sefa-payment-proxy-1-service
+    depends_on:
+      sefa-configserver:
+        condition: service_started
+"""
+
+
+def _eureka_apps(*names):
+    response = mock.Mock()
+    response.json.return_value = {"applications": {"application": [
+        {"name": name, "instance": {"status": "UP"}} for name in names]}}
+    return response
+
+
+class TestRamsesReadiness(unittest.TestCase):
+    """
+    Test cases for the readiness checks of the RAMSES exemplar.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, "docker-compose.yml"), "w") as file:
+            file.write(COMPOSE_FILE)
+        self.readiness = RamsesReadiness(directory.name)
+
+    def test_expected_applications_come_from_the_compose_file(self):
+        self.assertEqual(self.readiness.expected_eureka_apps, ["ORDERING-SERVICE", "PAYMENT-PROXY-SERVICE"])
+        self.assertEqual(eureka_application_name("sefa-api-gateway"), "API-GATEWAY")
+
+    def test_eureka_waits_for_every_expected_application(self):
+        with mock.patch("requests.get", return_value=_eureka_apps("ORDERING-SERVICE")):
+            self.assertEqual(self.readiness.check_eureka(), (False, "not UP: PAYMENT-PROXY-SERVICE"))
+        with mock.patch("requests.get", return_value=_eureka_apps("ORDERING-SERVICE", "PAYMENT-PROXY-SERVICE")):
+            self.assertTrue(self.readiness.check_eureka()[0])
+
+
+class TestRestoreBaseline(unittest.TestCase):
+    """
+    Test cases for bringing the RAMSES stack back to its baseline instances, against the simulator.
+    """
+
+    def setUp(self):
+        self.stack = SimulatedRAMSES(services=2, instances_per_service=2, boot_delay=0)
+        self.addCleanup(self.stack.stop_container)
+        self.simulator = self.stack.simulator
+        self.exemplar = RAMSES(auto_start=False)
+        self.exemplar.base_endpoint = self.stack.base_endpoint
+        self.exemplar.capture_baseline()
+
+    def _instances(self, service_id):
+        return sorted(self.exemplar._monitor()[service_id]["instances"])
+
+    def test_database_is_restarted_first(self):
+        self.assertEqual(self.exemplar.restart_order(RESET_SERVICES), [["mysql"], list(RESET_SERVICES[1:])])
+
+    def test_added_instances_are_removed(self):
+        baseline = self._instances("SERVICE-0")
+        self.exemplar._execute({"operation": "addInstances", "serviceImplementationName": "service-0",
+                                "numberOfInstances": 2})
+        self.assertEqual(self.exemplar.baseline_differences(), {"SERVICE-0": (4, 2)})
+        self.exemplar.restore_baseline_instances()
+        self.assertEqual(self._instances("SERVICE-0"), baseline)
+        self.assertEqual(self.exemplar.baseline_differences(), {})
+
+    def test_missing_instances_are_added_back(self):
+        removed, kept = self._instances("SERVICE-1")
+        address, _, port = removed.partition("@")[2].partition(":")
+        self.exemplar._execute({"operation": "removeInstance", "serviceImplementationName": "service-1",
+                                "address": address, "port": int(port)})
+        self.exemplar.restore_baseline_instances()
+        instances = self._instances("SERVICE-1")
+        self.assertEqual(len(instances), 2)
+        self.assertIn(kept, instances)
+        self.assertEqual(self.simulator.services["SERVICE-1"].weights, {instance_id: 0.5 for instance_id in instances})
+        self.assertEqual(self.exemplar.baseline_differences(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+import requests
+
+from UPISAS.ramses_simulator import RamsesSimulator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRamsesSimulator(unittest.TestCase):
+    """
+    Test cases for the in-process RAMSES stand-in.
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.simulator = RamsesSimulator(services=3, instances_per_service=2, request_rate=100, error_rate=0.1,
+                                         boot_delay=5, probe_port=0, instances_manager_port=0, config_manager_port=0,
+                                         clock=self.clock).start()
+        self.addCleanup(self.simulator.stop)
+        self.probe = f"http://127.0.0.1:{self.simulator.ports['probe']}"
+
+    def _snapshot(self, service_id="SERVICE-0"):
+        return requests.get(f"{self.probe}/rest/service/{service_id}/snapshot").json()
+
+    def _post(self, surface, path, body):
+        return requests.post(f"http://127.0.0.1:{self.simulator.ports[surface]}{path}", json=body)
+
+    def test_architecture(self):
+        architecture = requests.get(f"{self.probe}/rest/systemArchitecture").json()
+        self.assertEqual(sorted(architecture), ["SERVICE-0", "SERVICE-1", "SERVICE-2"])
+        self.assertEqual(architecture["SERVICE-1"]["currentImplementationId"], "service-1")
+        self.assertEqual(len(architecture["SERVICE-1"]["instances"]), 2)
+
+    def test_counters_are_cumulative(self):
+        self._snapshot()
+        self.clock.now += 10
+        first = self._snapshot()
+        self.clock.now += 10
+        second = self._snapshot()
+
+        def total(snapshots):
+            return sum(outcome["count"] for snapshot in snapshots
+                       for metrics in snapshot["httpMetrics"].values() for outcome in metrics["outcomeMetrics"].values())
+        self.assertEqual(total(first), 1000)
+        self.assertEqual(total(second), 2000)
+
+    def test_added_instance_boots(self):
+        response = self._post("instances_manager", "/rest/addInstances",
+                              {"serviceImplementationName": "service-0", "numberOfInstances": 1}).json()
+        instance_id = response["newInstance"]["instanceId"]
+        status = {snapshot["instanceId"]: snapshot["status"] for snapshot in self._snapshot()}
+        self.assertEqual(status[instance_id], "BOOTING")
+        self.clock.now += 5
+        status = {snapshot["instanceId"]: snapshot for snapshot in self._snapshot()}
+        self.assertEqual(status[instance_id]["status"], "ACTIVE")
+        self.assertFalse(status[instance_id]["booting"])
+
+    def test_scripted_failure_and_removal(self):
+        instance_id = self._snapshot()[0]["instanceId"]
+        self.simulator.at(3, self.simulator.fail_instance, instance_id)
+        self.clock.now += 2
+        self.assertFalse(self._snapshot()[0]["failed"])
+        self.clock.now += 2
+        failed = self._snapshot()[0]
+        self.assertTrue(failed["failed"])
+        self.assertFalse(failed["active"])
+
+        address, port = instance_id.split("@")[1].split(":")
+        response = self._post("instances_manager", "/rest/removeInstance",
+                              {"serviceImplementationName": "SERVICE-0", "address": address, "port": int(port)})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(instance_id, [snapshot["instanceId"] for snapshot in self._snapshot()])
+
+    def test_lb_weights(self):
+        instances = [snapshot["instanceId"] for snapshot in self._snapshot()]
+        response = self._post("config_manager", "/rest/changeLBWeights",
+                              {"weightsId": "SERVICE-0", "weights": {instances[0]: 1.0},
+                               "instancesToRemoveWeightOf": [instances[1]]})
+        self.assertEqual(response.json()["weights"], {instances[0]: 1.0})
+        configuration = requests.get(f"{self.probe}/rest/service/SERVICE-0/configuration").json()
+        self.assertEqual(configuration["loadBalancerWeights"], {instances[0]: 1.0})
+
+        self.clock.now += 10
+        served = {snapshot["instanceId"]: sum(outcome["count"] for metrics in snapshot["httpMetrics"].values()
+                                              for outcome in metrics["outcomeMetrics"].values())
+                  for snapshot in self._snapshot()}
+        self.assertEqual(served[instances[1]], 0)
+        self.assertEqual(served[instances[0]], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+from UPISAS.rates import CounterRateTracker
+
+
+def _payload(instance_id, duration, success, errors, service_id="ORDERING-SERVICE"):
+    return {service_id: {"snapshot": [{"instanceId": instance_id, "httpMetrics": {
+        "orders": {"outcomeMetrics": {"SUCCESS": {"totalDuration": duration, "count": success},
+                                      "SERVER_ERROR": {"count": errors}}}}}]}}
+
+
+class TestCounterRateTracker(unittest.TestCase):
+    """
+    Test cases for the sliding-window rates of the cumulative httpMetrics counters.
+    """
+
+    def test_increases_within_the_window(self):
+        tracker = CounterRateTracker(window=30)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 400, 20, 10), timestamp=10)
+        tracker.observe(_payload("a@host:1", 500, 25, 10), timestamp=20)
+        self.assertEqual(tracker.report().instance_metrics("a@host:1"), (400 / 15, 15 / 25 * 100))
+
+        # the increase observed at 10 slides out of the window
+        tracker.observe(_payload("a@host:1", 600, 30, 10), timestamp=45)
+        self.assertEqual(tracker.report().instance_metrics("a@host:1"), (200 / 10, 100))
+
+    def test_first_observation_is_a_baseline(self):
+        tracker = CounterRateTracker(window=60)
+        tracker.observe(_payload("a@host:1", 10000, 1000, 500), timestamp=0)
+        self.assertEqual(tracker.report().instances["a@host:1"]["total_requests"], 0)
+        tracker.observe(_payload("a@host:1", 10100, 1010, 500), timestamp=5)
+        self.assertEqual(tracker.report().instances["a@host:1"]["total_requests"], 10)
+
+    def test_instances_started_later_count_from_zero(self):
+        tracker = CounterRateTracker(window=60)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("b@host:2", 50, 5, 0), timestamp=5)
+        tracker.observe(_payload("c@host:3", 50, 5, 0, service_id="PAYMENT-SERVICE"), timestamp=5)
+        self.assertEqual(tracker.report().instances["b@host:2"]["total_requests"], 5)
+        # the first instance seen of a service may have been running for long
+        self.assertEqual(tracker.report().instances["c@host:3"]["total_requests"], 0)
+
+    def test_expired_instance_seen_again_takes_a_new_baseline(self):
+        tracker = CounterRateTracker(window=30)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 200, 20, 0), timestamp=10)
+        # the probe of the instance times out for longer than the window
+        tracker.observe({"ORDERING-SERVICE": {"snapshot": []}}, timestamp=50)
+        self.assertNotIn("a@host:1", tracker.instances)
+        tracker.observe(_payload("a@host:1", 90000, 9000, 0), timestamp=60)
+        self.assertEqual(tracker.report().instances["a@host:1"]["total_requests"], 0)
+        tracker.observe(_payload("a@host:1", 90100, 9010, 0), timestamp=65)
+        self.assertEqual(tracker.report().instances["a@host:1"]["total_requests"], 10)
+
+    def test_restored_tracker_takes_a_new_baseline(self):
+        tracker = CounterRateTracker(window=60)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 200, 20, 0), timestamp=10)
+        restored = CounterRateTracker()
+        restored.load_dict(tracker.to_dict())
+        restored.rebaseline()
+        restored.observe(_payload("a@host:1", 5000, 500, 0), timestamp=30)
+        self.assertEqual(restored.report().instances["a@host:1"]["total_requests"], 10)
+        restored.observe(_payload("a@host:1", 5100, 510, 0), timestamp=75)
+        self.assertEqual(restored.report().instances["a@host:1"]["total_requests"], 10)
+
+    def test_restart_resets_the_counters(self):
+        tracker = CounterRateTracker(window=60)
+        tracker.observe(_payload("a@host:1", 1000, 100, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 1100, 110, 0), timestamp=5)
+        tracker.observe(_payload("a@host:1", 50, 5, 5), timestamp=10)
+        metrics = tracker.report().instances["a@host:1"]
+        self.assertEqual(metrics["successful_requests"], 15)
+        self.assertEqual(metrics["total_requests"], 20)
+        self.assertEqual(tracker.resets, 1)
+
+    def test_unchanged_counters_add_nothing(self):
+        tracker = CounterRateTracker(window=60)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=5)
+        self.assertEqual(len(tracker.instances["a@host:1"].increases), 0)
+
+    def test_instances_gone_for_a_window_are_dropped(self):
+        tracker = CounterRateTracker(window=10)
+        tracker.observe(_payload("a@host:1", 100, 10, 0), timestamp=0)
+        tracker.observe(_payload("b@host:2", 100, 10, 0), timestamp=20)
+        self.assertEqual(set(tracker.report().instances), {"b@host:2"})
+        self.assertEqual(tracker.report().services["ORDERING-SERVICE"]["successful_requests"], 10)
+
+    def test_endpoint_rates(self):
+        tracker = CounterRateTracker(window=10)
+        tracker.observe(_payload("a@host:1", 0, 0, 0), timestamp=0)
+        tracker.observe(_payload("a@host:1", 100, 10, 10), timestamp=5)
+        rates = tracker.endpoint_rates("a@host:1")["orders"]
+        self.assertEqual(rates["requests_per_second"], 2)
+        self.assertEqual(rates["availability"], 50)
+        self.assertEqual(tracker.endpoint_rates("b@host:2"), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
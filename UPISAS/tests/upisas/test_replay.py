@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from UPISAS import get_http_session, configure_http_sessions
+from UPISAS.exemplars.replay import ReplayExemplar
+from UPISAS.strategies.ramses_reactive_strategy import ReactiveAdaptationManager
+from UPISAS.trace import TraceRecorder, read_trace
+
+
+def _monitor_payload(failed):
+    return {"ORDERING-SERVICE": {"serviceId": "ORDERING-SERVICE", "currentImplementationId": "ordering-service",
+                                 "instances": ["ordering-service@ordering:58085"],
+                                 "snapshot": [{"instanceId": "ordering-service@ordering:58085", "active": True,
+                                               "failed": failed, "httpMetrics": {}}]}}
+
+
+class _InterfaceHandler(BaseHTTPRequestHandler):
+    monitor_calls = 0
+
+    def do_GET(self):
+        _InterfaceHandler.monitor_calls += 1
+        self._reply(_monitor_payload(failed=_InterfaceHandler.monitor_calls > 1))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({"status": "ok"})
+
+    def _reply(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTraceReplay(unittest.TestCase):
+    """
+    Test cases for recording a live run and replaying it without containers.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(configure_http_sessions)
+        self.trace_path = os.path.join(self.directory.name, "trace.jsonl.gz")
+
+    def _record(self):
+        _InterfaceHandler.monitor_calls = 0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _InterfaceHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        recorder = TraceRecorder(self.trace_path)
+        recorder.install(base)
+        for _ in range(2):
+            get_http_session(base).get(base + "/monitor")
+        get_http_session(base).post(base + "/execute", json={"operation": "addInstances"})
+        recorder.close()
+        return base
+
+    def test_recorded_trace(self):
+        self._record()
+        entries = read_trace(self.trace_path)
+        self.assertEqual([(entry["method"], entry["status"]) for entry in entries], [("GET", 200), ("GET", 200), ("POST", 200)])
+        self.assertEqual(entries[2]["request"], {"operation": "addInstances"})
+        self.assertFalse(json.loads(entries[0]["body"])["ORDERING-SERVICE"]["snapshot"][0]["failed"])
+
+    def test_regular_adapters_are_mounted_back(self):
+        session = get_http_session("http://127.0.0.1:1")
+        adapter = session.get_adapter("http://127.0.0.1:1")
+        recorder = TraceRecorder(self.trace_path)
+        recorder.install("http://127.0.0.1:1")
+        self.assertEqual(session.get_adapter("http://127.0.0.1:1").max_retries.allowed_methods, {"GET"})
+        recorder.close()
+        self.assertIs(session.get_adapter("http://127.0.0.1:1"), adapter)
+
+        other = get_http_session("http://127.0.0.1:2")
+        exemplar = ReplayExemplar(self.trace_path, base_endpoint="http://127.0.0.1:1")
+        exemplar.stop_container()
+        self.assertIs(get_http_session("http://127.0.0.1:1"), session)
+        self.assertIs(session.get_adapter("http://127.0.0.1:1"), adapter)
+        self.assertIs(get_http_session("http://127.0.0.1:2"), other)
+
+    def test_strategy_runs_against_the_replay(self):
+        base = self._record()
+        exemplar = ReplayExemplar(self.trace_path, base_endpoint=base)
+        strategy = ReactiveAdaptationManager(exemplar, base + "/monitor", base + "/execute", base + "/lb")
+
+        strategy.monitor()
+        strategy.analyze()
+        self.assertEqual(strategy.knowledge.analysis_data["failed_instances"], {})
+        strategy.monitor()
+        strategy.analyze()
+        self.assertEqual(strategy.knowledge.analysis_data["failed_instances"],
+                         {"ORDERING-SERVICE": ["ordering-service@ordering:58085"]})
+        strategy.plan()
+        self.assertIn("removeInstance", [action["operation"] for action in strategy.knowledge.plan_data])
+
+        self.assertTrue(exemplar.adapter.exhausted("GET", base + "/monitor"))
+        exemplar.start_run()
+        self.assertFalse(exemplar.adapter.exhausted("GET", base + "/monitor"))
+        self.assertEqual(get_http_session(base).get(base + "/unknown").status_code, 404)
+        exemplar.stop_container()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+import jsonschema
+
+from UPISAS import validate_schema, get_schema_validator
+from UPISAS.exceptions import IncompleteJSONSchema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "f": {
+            "type": "number",
+        }
+    }
+}
+
+
+class TestValidation(unittest.TestCase):
+    """
+    Test cases for validate_schema and the cache of compiled validators behind it.
+    """
+
+    def test_validator_is_compiled_once_per_schema(self):
+        validator = get_schema_validator(SCHEMA)
+        self.assertIs(validator, get_schema_validator(dict(SCHEMA)))
+
+    def test_same_schema_object_is_not_serialized_again(self):
+        validator = get_schema_validator(SCHEMA)
+        with mock.patch("UPISAS.json.dumps", side_effect=AssertionError("schema serialized")):
+            self.assertIs(validator, get_schema_validator(SCHEMA))
+
+    def test_valid_instance(self):
+        with self.assertLogs() as cm:
+            validate_schema({"f": 1.5}, SCHEMA)
+            self.assertTrue("JSON object validated by JSON Schema" in ", ".join(cm.output))
+
+    def test_instance_not_conforming_to_schema(self):
+        with self.assertRaises(jsonschema.exceptions.ValidationError):
+            validate_schema({"f": "not a number"}, SCHEMA)
+
+    def test_invalid_schema_is_not_cached(self):
+        schema = {"type": "strange_value", "properties": {"f": {"type": "number"}}}
+        for _ in range(2):
+            with self.assertRaises(jsonschema.exceptions.SchemaError):
+                validate_schema({"f": 1}, schema)
+
+    def test_incomplete_schema(self):
+        with self.assertRaises(IncompleteJSONSchema):
+            validate_schema({"f": 1}, {"type": "object", "properties": {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
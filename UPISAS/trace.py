@@ -0,0 +1,185 @@
+"""
+Recording and replaying the HTTP traffic of a strategy.
+
+TraceRecorder mounts a RecordingAdapter on the shared sessions of UPISAS (see get_http_session()), so every
+request a strategy sends during a live run (/monitor polls, /execute calls, load balancer changes) is written
+with its response to a trace file, one JSON line per request (gzip-compressed when the path ends in .gz):
+
+    recorder = TraceRecorder("ramses_trace.jsonl.gz")
+    recorder.install(monitor_url, execute_url, lb_url)
+    ...  # run the strategy
+    recorder.close()
+
+ReplayAdapter serves such a trace back without any network or container, see UPISAS.exemplars.replay.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from UPISAS import get_http_session, http_session_settings
+from UPISAS.instrumentation import InstrumentedAdapter
+
+
+def open_trace(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_trace(path):
+    """The entries of a trace file, in the order they were recorded."""
+    with open_trace(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def host_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def request_key(method, url):
+    """Requests are matched on method, path and query, so the same trace replays against any host alias."""
+    parts = urlsplit(url)
+    return method.upper(), parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def _request_body(request):
+    body = request.body
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+class RecordingAdapter(InstrumentedAdapter):
+    """InstrumentedAdapter that passes every request on and hands it with its response to the recorder."""
+
+    def __init__(self, recorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        started = time.time()
+        response = super().send(request, **kwargs)
+        if not kwargs.get("stream"):
+            self.recorder.record(request, response, started)
+        return response
+
+
+class TraceRecorder:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open_trace(path, 'a')
+        self.sessions = []
+
+    def install(self, *urls):
+        """Records the traffic of the shared sessions towards the hosts of urls."""
+        for url in urls:
+            host = host_of(url)
+            session = get_http_session(url)
+            # kept to be mounted back by close(), with its retry policy
+            previous = session.get_adapter(host)
+            session.mount(host, RecordingAdapter(self, pool_connections=1,
+                                                 pool_maxsize=http_session_settings["pool_size"],
+                                                 max_retries=previous.max_retries))
+            self.sessions.append((session, host, previous))
+
+    def record(self, request, response, started):
+        entry = {
+            "t": started,
+            "elapsed": time.time() - started,
+            "method": request.method,
+            "url": request.url,
+            "request": _request_body(request),
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.text,
+        }
+        with self.lock:
+            self.file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self.file.flush()
+
+    def close(self):
+        """Stops recording and mounts the adapters the sessions had before install() back."""
+        for session, host, previous in reversed(self.sessions):
+            recording = session.get_adapter(host)
+            session.mount(host, previous)
+            recording.close()
+        self.sessions = []
+        with self.lock:
+            self.file.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter answering requests from a trace. Every request gets the next recorded response
+    for the same method and path; once those run out the last one is repeated, or the sequence starts over
+    with loop=True. Requests that were never recorded get a 404. The requests sent are kept in sent.
+    """
+
+    def __init__(self, entries, loop=False):
+        super().__init__()
+        self.loop = loop
+        self.responses = defaultdict(list)
+        for entry in entries:
+            self.responses[request_key(entry["method"], entry["url"])].append(entry)
+        self.position = defaultdict(int)
+        self.sent = deque(maxlen=10000)
+        self.lock = threading.Lock()
+
+    def next_entry(self, key):
+        recorded = self.responses.get(key)
+        if not recorded:
+            return None
+        with self.lock:
+            index = self.position[key]
+            if index >= len(recorded):
+                index = 0 if self.loop else len(recorded) - 1
+            self.position[key] = index + 1
+        return recorded[index]
+
+    def exhausted(self, method, url):
+        """Whether every recorded response for method and url was served at least once."""
+        key = request_key(method, url)
+        return self.position[key] >= len(self.responses.get(key, ()))
+
+    def rewind(self):
+        with self.lock:
+            self.position.clear()
+            self.sent.clear()
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+        self.sent.append({"method": request.method, "url": request.url, "request": _request_body(request)})
+        entry = self.next_entry(key)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if entry is None:
+            response.status_code = 404
+            response.reason = "Not Found"
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = json.dumps({"error": f"{key[0]} {key[1]} is not in the trace"}).encode('utf-8')
+        else:
+            response.status_code = entry["status"]
+            response.reason = "OK" if entry["status"] < 400 else "Error"
+            response.headers = CaseInsensitiveDict({"Content-Type": entry.get("content_type", "application/json")})
+            response._content = entry["body"].encode('utf-8')
+        return response
+
+    def close(self):
+        pass
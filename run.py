@@ -33,6 +33,7 @@
 #         sys.exit(0)
 
 
+import os
 import signal
 import sys
 import time
@@ -40,32 +41,42 @@ from threading import Thread
 from UPISAS.exemplar import Exemplar
 from UPISAS.exemplars.ramses import RAMSES
 from UPISAS.strategies.baseline_reactive_strategy import ReactiveAdaptationManager
+from UPISAS.log import configure_logging
 # from failure_injection import FailureInjector
 
 if __name__ == '__main__':
+    # Log records are written by a background thread, set per-module levels with UPISAS_LOG_LEVELS
+    configure_logging()
     exemplar = RAMSES(auto_start=True)
     monitor_url = "http://127.0.0.1:50000/monitor"
     execute_url = "http://127.0.0.1:50000/execute"
     lb_url = "http://localhost:32840/rest/changeLBWeights"
+    journal_dir = "knowledge_journal"
 
 
     #failure_injector = FailureInjector()
     #failure_injector_thread = Thread(target=failure_injector.inject_failures)
     #failure_injector_thread.start()
 
-    time.sleep(20)  # Allow some time for the container to start
-    exemplar.start_run()
-    time.sleep(10)  # Allow some time for the API endpoints to initialize
-
+    strategy = None
     try:
+        exemplar.start_run()
+        # Wait for the containers, the Eureka registrations and the Interface instead of fixed sleeps
+        exemplar.wait_until_ready()
         strategy = ReactiveAdaptationManager(exemplar, monitor_url, execute_url, lb_url)
+        # Persist the Knowledge. Only warm-start from the journal left by a previous run when asked to with
+        # UPISAS_WARM_START=1: the exit path below tears the containers down, so by default that journal is stale
+        strategy.enable_journal(journal_dir, warm_start=os.environ.get("UPISAS_WARM_START") == "1")
+        # Container deaths are pushed from the Docker events stream instead of waiting for the probe
+        strategy.watch_containers(exemplar.track_state())
 
         while True:
             strategy.run()
             
     except (Exception, KeyboardInterrupt) as e:
-        print(str(e))
-        input("Something went wrong. Press Enter to exit.")
+        print(f"Something went wrong, stopping: {e}")
+        if strategy is not None:
+            strategy.close_journal()
         exemplar.stop_container()
         sys.exit(0)
 